@@ -5,7 +5,14 @@ from ProtoCaller.Utils.ConditionalList import ConditionalList as _ConditionalLis
 
 class PerturbationList(_ConditionalList):
     """
-    A ProtoCaller.Utils.ConditionalList.ConditionalList of ProtoCaller.Ensemble.Perturbation.Perturbation
+    A ProtoCaller.Utils.ConditionalList.ConditionalList of ProtoCaller.Ensemble.Perturbation.Perturbation. Every added
+    element is transformed into a perturbation, including the first elements added to an empty list. A list of two
+    ligands, e.g. append([ligand1, ligand2]), is added as a single perturbation between them.
+
+    Parameters
+    ----------
+    perturbations : [ProtoCaller.Ensemble.Perturbation.Perturbation or [ProtoCaller.Ensemble.Ligand.Ligand]]
+        The initial perturbations or pairs of ligands.
     """
     def __init__(self, perturbations):
         _ConditionalList.__init__(self, perturbations, transformfunc=self._transformMorph)
@@ -1,10 +1,12 @@
 import copy as _copy
 import logging as _logging
+import numbers as _numbers
 import os as _os
 import re as _re
 import warnings as _warnings
 
 from Bio import SeqIO as _SeqIO
+import numpy as _np
 import parmed as _pmd
 
 import ProtoCaller as _PC
@@ -133,7 +135,8 @@ class Protein:
         if input is None and self._downloader:
             input = self._downloader.getLigands()
         if input:
-            self._ligands = [Ligand(x, name=_os.path.splitext(_os.path.basename(x))[0], workdir=".", minimise=False)
+            self._ligands = [Ligand(x, name=_os.path.splitext(_os.path.basename(_fileio.splitCompression(x)[0]))[0],
+                                    workdir=".", minimise=False)
                              if not isinstance(x, Ligand) else x for x in input]
 
     @property
@@ -197,7 +200,8 @@ class Protein:
             elif isinstance(value, _BSS._SireWrappers.Molecule):
                 _BSS.IO.saveMolecules(self.name, _BSS._SireWrappers.System(value), "pdb")
             elif isinstance(value, _pmd.Structure):
-                _pmdwrap.saveFilesFromParmed(value, self._pdb)
+                self._pdb_obj = _PDB.PDB.fromParmed(value, self._pdb)
+                self._pdb_obj.writePDB()
             else:
                 self._pdb = None
                 if value is not None:
@@ -207,17 +211,27 @@ class Protein:
                         try:
                             self._pdb = value
                             self._pdb_obj = _PDB.PDB(self.pdb)
+                            # the downstream tools need plain PDB files
+                            if _PDB.isCIF(value) or _fileio.splitCompression(value)[1]:
+                                self._pdb = self._pdb_obj.writePDB("{}.pdb".format(self.name))
+                                self._pdb_obj.filename = self._pdb
                         except:
                             obj = _pmdwrap.openFilesAsParmed(value)
                             self._pdb = "{}.pdb".format(self.name)
-                            _pmdwrap.saveFilesFromParmed(obj, self._pdb)
-                            self._pdb_obj = _PDB.PDB(self.pdb)
+                            self._pdb_obj = _PDB.PDB.fromParmed(obj, self._pdb)
+                            self._pdb_obj.writePDB()
                         self._checkfasta()
                     except:
                         self._pdb = None
 
             if not self._pdb:
                 self._pdb_obj = _PDB.PDB(self.pdb) if self.pdb else None
+                # large assemblies are only available as mmCIF files, which are converted for the downstream tools, as
+                # are compressed files
+                if self._pdb_obj is not None and (_PDB.isCIF(self._pdb_obj.filename) or
+                                                  _fileio.splitCompression(self._pdb_obj.filename)[1]):
+                    self._pdb = self._pdb_obj.writePDB("{}.pdb".format(self.name))
+                    self._pdb_obj.filename = self._pdb
 
     @property
     def pdb_obj(self):
@@ -252,27 +266,34 @@ class Protein:
             One of "all" or "middle". Determines whether to only add missing residues when they are non-terminal.
         chains : str
             One of "all" or an iterable of characters for chains to keep.
-        waters : str or None
+        waters : str or float or None
             One of "all", "chain" (only keep molecules belonging to a chain), "site" (only keep if they are mentioned in
-            the PDB SITE directive) or None (no molecules are included).
-        ligands : str or None
+            the PDB SITE directive), a distance in Angstroms (only keep if they are within this distance of the
+            reference ligand) or None (no molecules are included).
+        ligands : str or float or None
             One of "all", "chain" (only keep molecules belonging to a chain), "site" (only keep if they are mentioned in
-            the PDB SITE directive) or None (no molecules are included).
-        cofactors : str or None
+            the PDB SITE directive), a distance in Angstroms (only keep if they are within this distance of the
+            reference ligand) or None (no molecules are included).
+        cofactors : str or float or None
             One of "all", "chain" (only keep molecules belonging to a chain), "site" (only keep if they are mentioned in
-            the PDB SITE directive) or None (no molecules are included).
-        simple_anions : str or None
+            the PDB SITE directive), a distance in Angstroms (only keep if they are within this distance of the
+            reference ligand) or None (no molecules are included).
+        simple_anions : str or float or None
             One of "all", "chain" (only keep molecules belonging to a chain), "site" (only keep if they are mentioned in
-            the PDB SITE directive) or None (no molecules are included).
-        complex_anions : str or None
+            the PDB SITE directive), a distance in Angstroms (only keep if they are within this distance of the
+            reference ligand) or None (no molecules are included).
+        complex_anions : str or float or None
             One of "all", "chain" (only keep molecules belonging to a chain), "site" (only keep if they are mentioned in
-            the PDB SITE directive) or None (no molecules are included).
-        simple_cations : str or None
+            the PDB SITE directive), a distance in Angstroms (only keep if they are within this distance of the
+            reference ligand) or None (no molecules are included).
+        simple_cations : str or float or None
             One of "all", "chain" (only keep molecules belonging to a chain), "site" (only keep if they are mentioned in
-            the PDB SITE directive) or None (no molecules are included).
-        complex_cations : str or None
+            the PDB SITE directive), a distance in Angstroms (only keep if they are within this distance of the
+            reference ligand) or None (no molecules are included).
+        complex_cations : str or float or None
             One of "all", "chain" (only keep molecules belonging to a chain), "site" (only keep if they are mentioned in
-            the PDB SITE directive) or None (no molecules are included).
+            the PDB SITE directive), a distance in Angstroms (only keep if they are within this distance of the
+            reference ligand) or None (no molecules are included).
         include_mols : [str]
             A list of strings which specify molecules that should be included. Overrides
             previous filters.
@@ -282,8 +303,15 @@ class Protein:
         """
         if include_mols is None: include_mols = []
         if exclude_mols is None: exclude_mols = []
+        params = [waters, ligands, cofactors, simple_anions, complex_anions, simple_cations, complex_cations]
+        for param in params:
+            if param not in ["all", "chain", "site", None] and not self._isDistance(param):
+                raise ValueError("Filter parameters need to be one of 'all', 'chain', 'site', a distance in Angstroms "
+                                 "or None, not {}".format(param))
 
         with self.workdir:
+            reference = self._referenceCoordinates() if any(self._isDistance(x) for x in params) else None
+
             # filter ligands / cofactors
             temp_dict = {"ligand": [], "cofactor": []}
             for molecule in self.ligands + self.cofactors:
@@ -304,17 +332,23 @@ class Protein:
                             for residue in self._pdb_obj.site_residues:
                                 if residue.resSeq == resSeq and residue.iCode == iCode:
                                     temp_dict[name] += [molecule]
+                        elif self._isDistance(param) and (chains == "all" or chainID in chains):
+                            # the molecules have already been removed from the PDB object, so their own coordinates
+                            # are compared with the reference ligand
+                            coordinates = molecule.molecule.GetConformer().GetPositions()
+                            if _PDB.CellList(coordinates, max(param, 2.)).within(reference, param).any():
+                                temp_dict[name] += [molecule]
             self.ligands = temp_dict["ligand"]
             self.cofactors = temp_dict["cofactor"]
 
             # filter residues / molecules in protein
 
             # filter by chain
-            filter = []
             mask = "type in ['amino_acid', 'amino_acid_modified']"
             if chains != "all":
                 mask += "&chainID in %s" % str(list(chains))
-            filter += self._pdb_obj.filter(mask)
+            filter = self._pdb_obj.filter(mask)
+            missing_residues_filter = []
 
             # filter missing residues
             if self._pdb_obj.missing_residues:
@@ -324,79 +358,60 @@ class Protein:
                     raise ValueError("Not all chains are contained in the FASTA sequence")
 
                 if missing_residues == "middle":
-                    missing_reslist = self._pdb_obj.totalResidueList()
-                    missing_reslist_new = []
-
-                    for chainID in chainIDs:
-                        fasta = fastas[chainID]
-                        seq = fasta.seq.tomutable()
-                        curr_missing = [x for x in missing_reslist if x.chainID == chainID]
-
-                        for i in range(2):
-                            curr_missing.reverse()
-                            seq.reverse()
-                            current_chain = None
-                            for j in reversed(range(0, len(curr_missing))):
-                                res = curr_missing[j]
-                                if type(res) is _PDB.Missing.MissingResidue and current_chain != res.chainID:
-                                    del curr_missing[j]
-                                    del seq[j]
-                                else:
-                                    break
-                        fasta.seq = seq
-                        missing_reslist_new += curr_missing
-
-                    missing_residue_list = [x for x in missing_reslist_new if type(x) == _PDB.MissingResidue]
-                    missing_residues_filter = missing_residue_list
+                    total_residues = [x for x in self._pdb_obj.totalResidueList() if x.chainID in chainIDs]
+                    missing_residues_filter = self._trimTerminalMissingResidues(total_residues, fastas)
                 else:
                     missing_residues_filter = self._pdb_obj.missing_residues
 
-                _SeqIO.write([fastas[chainId] for chainId in chainIDs if chains == "all" or chainID in chains],
+                _SeqIO.write([fastas[chainID] for chainID in chainIDs if chains == "all" or chainID in chains],
                              self.fasta, "fasta")
                 if chains != "all":
                     missing_residues_filter = [x for x in missing_residues_filter if x.chainID in chains]
-                filter += missing_residues_filter
 
             # filter by waters / anions / cations
             for param, name in zip([waters, simple_anions, complex_anions, simple_cations, complex_cations],
                                    ["water", "simple_anion", "complex_anion", "simple_cation", "complex_cation"]):
                 if param == "all" or (param == "chain" and chains == "all"):
-                    filter += self._pdb_obj.filter("type=='%s'" % name)
+                    filter |= self._pdb_obj.filter("type=='%s'" % name)
                 elif param == "chain":
-                    filter += self._pdb_obj.filter("type=='%s'&chainID in %s" % (name, str(list(chains))))
-                elif param == "site":
+                    filter |= self._pdb_obj.filter("type=='%s'&chainID in %s" % (name, str(list(chains))))
+                elif param == "site" or self._isDistance(param):
                     if chains == "all":
                         filter_temp = self._pdb_obj.filter("type=='%s'" % name)
                     else:
                         filter_temp = self._pdb_obj.filter("type=='%s'&chainID in %s" % (name, str(list(chains))))
-                    filter += [res for res in filter_temp if res in self._pdb_obj.site_residues]
+                    if param == "site":
+                        filter |= filter_temp & self._pdb_obj.site_residues
+                    else:
+                        filter |= filter_temp & self._pdb_obj.within(param, of=reference)
 
             # include extra molecules / residues
+            incl_filter = []
             for include_mol in include_mols:
-                chainID, resSeq, iCode = self._residTransform(include_mol)
-                filter_str = "chainID=='{}'&resSeq=={}&iCode=='{}'&type not in " \
-                             "['ligand', 'cofactor']".format(chainID, resSeq,
-                                                             iCode)
-                residue = self._pdb_obj.filter(filter_str)
-                if not len(residue):
+                residue = self._pdb_obj.residue(*self._residTransform(include_mol))
+                if residue is None or residue.type in ["ligand", "cofactor"]:
                     _warnings.warn("Could not find residue {}.".format(include_mol))
-                filter += residue
+                else:
+                    incl_filter += [residue]
 
             # exclude extra molecules / residues
             excl_filter = []
             for exclude_mol in exclude_mols:
-                chainID, resSeq, iCode = self._residTransform(exclude_mol)
-                filter_str = "chainID=='{}'&resSeq=={}&iCode=='{}'&type not in " \
-                             "['ligand', 'cofactor']".format(chainID, resSeq,
-                                                             iCode)
-                residue = self._pdb_obj.filter(filter_str)
-                if not len(residue):
+                residue = self._pdb_obj.residue(*self._residTransform(exclude_mol))
+                if residue is None or residue.type in ["ligand", "cofactor"]:
                     _warnings.warn(
                         "Could not find residue {}.".format(exclude_mol))
-                excl_filter += residue
+                else:
+                    excl_filter += [residue]
+
+            filter = (filter | incl_filter) - excl_filter
 
-            filter = list(set(filter) - set(excl_filter))
+            # missing residues are not part of the selection and are restored after the purge
+            missing_identifiers = {(x.resName, x.chainID, x.resSeq, x.iCode) for x in missing_residues_filter}
+            missing_residues = [x for x in self._pdb_obj.missing_residues
+                                if (x.resName, x.chainID, x.resSeq, x.iCode) in missing_identifiers]
             self._pdb_obj.purgeResidues(filter, "keep")
+            self._pdb_obj.missing_residues = missing_residues
             self._pdb_obj.writePDB(self.pdb)
 
     def prepare(self, add_missing_residues="pdbfixer",
@@ -498,7 +513,7 @@ class Protein:
 
             # convert modified residues to normal ones
             if replace_nonstandard_residues and self._pdb_obj.modified_residues:
-                self.pdb = _pdbfix.pdbfixerTransform(self.pdb, True, False, False)
+                self._runStage(_pdbfix.pdbfixerTransform, True, False, False)
 
             # add missing residues
             if len(self._pdb_obj.missing_residues):
@@ -511,15 +526,14 @@ class Protein:
                         atoms = False
                     if not self.fasta:
                         raise ValueError("No fasta file supplied.")
-                    self.pdb = _modeller.modellerTransform(
-                        self.pdb, self.fasta, atoms, self.code, **kwargs)
+                    self._runStage(_modeller.modellerTransform, self.fasta,
+                                   atoms, self.code, **kwargs)
                 elif add_missing_residues == "charmm-gui":
-                    self.pdb = _charmmwrap.charmmguiTransform(
-                        self.pdb, **kwargs)
+                    self._runStage(_charmmwrap.charmmguiTransform, **kwargs)
                 elif add_missing_residues == "pdbfixer":
                     atoms = True if add_missing_atoms == "pdbfixer" else False
-                    self.pdb = _pdbfix.pdbfixerTransform(
-                        self.pdb, False, True, atoms, **kwargs)
+                    self._runStage(_pdbfix.pdbfixerTransform, False, True,
+                                   atoms, **kwargs)
                 else:
                     _warnings.warn("Protein has missing residues. Please check"
                                    " your PDB file or choose a valid "
@@ -537,8 +551,8 @@ class Protein:
                     add_missing_atoms = "pdb2pqr"
                 elif add_missing_atoms == "pdbfixer" and \
                          add_missing_residues != "pdbfixer":
-                    self.pdb = _pdbfix.pdbfixerTransform(
-                        self.pdb, False, False, True, **kwargs)
+                    self._runStage(_pdbfix.pdbfixerTransform, False, False,
+                                   True, **kwargs)
 
             # protonate proteins
             if "pdb2pqr" in [add_missing_atoms, protonate_proteins]:
@@ -547,7 +561,7 @@ class Protein:
                     kwargs = missing_atom_options
                 if protonate_proteins == "pdb2pqr":
                     kwargs = {**kwargs, **protonate_proteins_options}
-                self.pdb = _PDB2PQR.pdb2pqrTransform(self.pdb, **kwargs)
+                self._runStage(_PDB2PQR.pdb2pqrTransform, **kwargs)
 
             # protonate ligands
             kwargs = protonate_ligands_options
@@ -616,10 +630,111 @@ class Protein:
             else:
                 self.complex_template = system
 
+    @staticmethod
+    def _trimTerminalMissingResidues(total_residues, fastas):
+        """
+        Removes the missing residues at the termini of all chains from the
+        corresponding FASTA sequences. The leading and trailing gaps of every
+        chain are found in a single pass over a mask of the missing residues
+        and each sequence is trimmed with a single slice.
+
+        Parameters
+        ----------
+        total_residues : [ProtoCaller.IO.PDB.Residue.Residue or ProtoCaller.IO.PDB.Missing.MissingResidue]
+            The residues of all chains sorted by chain, as returned by
+            ProtoCaller.IO.PDB.PDB.totalResidueList().
+        fastas : dict
+            The FASTA sequence of every chain, as returned by _openfasta().
+            The sequences of all chains in total_residues are trimmed in place.
+
+        Returns
+        -------
+        missing_residues : [ProtoCaller.IO.PDB.Missing.MissingResidue]
+            The missing residues which are not at the termini of their chain.
+        """
+        n_residues = len(total_residues)
+        if not n_residues:
+            return []
+        chainIDs = _np.array([x.chainID for x in total_residues], dtype=object)
+        # residues are a subclass of missing residues
+        missing = _np.array([type(x) is _PDB.MissingResidue for x in total_residues], dtype=bool)
+
+        # the first and last residue with coordinates in every chain
+        indices = _np.arange(n_residues)
+        starts = _np.flatnonzero(_np.concatenate([[True], chainIDs[1:] != chainIDs[:-1]]))
+        stops = _np.append(starts[1:], n_residues)
+        first = _np.minimum.reduceat(_np.where(missing, n_residues, indices), starts)
+        last = _np.maximum.reduceat(_np.where(missing, -1, indices), starts)
+        # chains without any residues with coordinates are trimmed completely
+        last = _np.where(first == n_residues, stops - 1, last)
+        first = _np.minimum(first, stops)
+
+        for chainID, n_leading, n_trailing in zip(chainIDs[starts].tolist(), (first - starts).tolist(),
+                                                  (stops - 1 - last).tolist()):
+            fasta = fastas[chainID]
+            fasta.seq = fasta.seq[n_leading:len(fasta.seq) - n_trailing]
+
+        owners = _np.repeat(_np.arange(len(starts)), stops - starts)
+        internal = missing & (indices > first[owners]) & (indices < last[owners])
+        return [total_residues[i] for i in _np.flatnonzero(internal).tolist()]
+
+    def _referenceCoordinates(self):
+        """
+        Returns the coordinates of the reference ligand, which are used to filter molecules by distance. Warns if the
+        reference ligand is not close to any atom of the PDB object, since then it is most likely not in the same frame
+        of reference as the PDB file.
+
+        Returns
+        -------
+        coordinates : numpy.ndarray
+            An (N, 3) array of the coordinates of the reference ligand in Angstroms.
+        """
+        if not self.ligand_ref:
+            raise ValueError("Need a reference ligand in order to filter molecules by distance")
+        coordinates = self.ligand_ref.molecule.GetConformer().GetPositions()
+        if self._pdb_obj.numberOfAtoms and not len(self._pdb_obj.within(5., of=coordinates, type="atoms")):
+            _warnings.warn("The reference ligand is not within 5 Angstroms of any atom in the PDB file. Please make "
+                           "sure that both use the same coordinate frame.")
+        return coordinates
+
+    @staticmethod
+    def _isDistance(param):
+        """bool: Returns whether a filter parameter is a cutoff distance."""
+        return isinstance(param, _numbers.Real) and not isinstance(param, (bool, _np.bool_))
+
+    def _runStage(self, transform, *args, **kwargs):
+        """
+        Runs a preparation stage on the PDB object. The stage fixes the object
+        in place and writes it to a new file for the downstream tools, so that
+        the object does not need to be re-read from disk.
+
+        Parameters
+        ----------
+        transform : callable
+            A wrapper which accepts the PDB object as its first argument and
+            returns the absolute path to the fixed file.
+        args
+            Positional arguments to be passed to the wrapper.
+        kwargs
+            Keyword arguments to be passed to the wrapper.
+        """
+        if self._pdb_obj.filename != _os.path.abspath(self.pdb):
+            self._pdb_obj.filename = self._pdb_obj.writePDB(self.pdb)
+        self._pdb = transform(self._pdb_obj, *args, **kwargs)
+        self._checkfasta()
+
     def _checkfasta(self):
         if hasattr(self, "_fasta") and hasattr(self, "_pdb_obj"):
-            seqlen = sum(len(x.seq) for x in _SeqIO.parse(open(self.fasta), 'fasta'))
-            reslen = len(self._pdb_obj.totalResidueList())
+            # the FASTA file is only parsed again when it has changed
+            stat = _os.stat(self.fasta)
+            key = (_os.path.abspath(self.fasta), stat.st_mtime_ns, stat.st_size)
+            if getattr(self, "_fasta_length", (None, None))[0] != key:
+                with open(self.fasta) as file:
+                    self._fasta_length = key, sum(len(x.seq) for x in _SeqIO.parse(file, 'fasta'))
+            seqlen = self._fasta_length[1]
+            # the same number of residues as in totalResidueList() without creating or sorting the residues
+            reslen = len(self._pdb_obj.filter("type in ['amino_acid', 'amino_acid_modified']")) + \
+                len(self._pdb_obj.missing_residues)
             if seqlen != reslen:
                 _warnings.warn("Length of FASTA sequence ({}) does not match "
                                "the length of PDB sequence ({}). Please check "
@@ -0,0 +1,179 @@
+import bisect as _bisect
+import warnings as _warnings
+
+
+class ResidueAlignment:
+    """
+    Maps the residues of an original structure onto the corresponding residues of a structure modified by an external
+    tool, e.g. PDBFixer or PDB2PQR. The residues are indexed once, so that every lookup takes constant time, and all
+    residues without a counterpart or with a different residue name are reported at once.
+
+    Parameters
+    ----------
+    original : [ProtoCaller.IO.PDB.Residue.Residue or ProtoCaller.IO.PDB.Missing.MissingResidue]
+        Initialises original.
+    modified : [ProtoCaller.IO.PDB.Residue.Residue or ProtoCaller.IO.PDB.Missing.MissingResidue]
+        Initialises modified.
+    by : str
+        Initialises by.
+    source : str
+        Initialises source.
+
+    Attributes
+    ----------
+    original : [ProtoCaller.IO.PDB.Residue.Residue or ProtoCaller.IO.PDB.Missing.MissingResidue]
+        The residues of the original structure.
+    modified : [ProtoCaller.IO.PDB.Residue.Residue or ProtoCaller.IO.PDB.Missing.MissingResidue]
+        The residues of the modified structure.
+    by : str
+        How the residues are matched. "order" matches the residues of both lists in order, which requires them to have
+        the same length. An original residue is then identified by its chainID, resName, resSeq and iCode, as in
+        ProtoCaller.IO.PDB.Residue.Residue.sameResidue(). "number" matches every original residue with the first
+        modified residue with the same chainID, resSeq and iCode.
+    source : str
+        The name of the tool which created the modified structure. Only used in messages.
+    """
+    _identifiers = {"order": ["chainID", "resName", "resSeq", "iCode"], "number": ["chainID", "resSeq", "iCode"]}
+
+    def __init__(self, original, modified, by="order", source="the external tool"):
+        if by not in self._identifiers:
+            raise ValueError("Matching needs to be one of: {}".format(list(self._identifiers)))
+        self.original = list(original)
+        self.modified = list(modified)
+        self.by = by
+        self.source = source
+
+        if by == "order":
+            if len(self.original) != len(self.modified):
+                raise ValueError("Mismatch between original number of residues ({}) and number of residues output by "
+                                 "{} ({}).".format(len(self.original), source, len(self.modified)))
+            indexed = self.original
+        else:
+            indexed = self.modified
+        self._index = {}
+        for i, residue in enumerate(indexed):
+            self._index.setdefault(self._identifier(residue), i)
+
+    def __len__(self):
+        return len(self.original)
+
+    def __repr__(self):
+        return "<ResidueAlignment of {} residues>".format(len(self))
+
+    def __getitem__(self, residue):
+        counterpart = self.get(residue)
+        if counterpart is None:
+            raise KeyError("No residue output by {} corresponds to residue {} {}{}{}".format(
+                self.source, residue.resName, residue.chainID, residue.resSeq, residue.iCode.strip()))
+        return counterpart
+
+    def get(self, residue, default=None):
+        """
+        Returns the modified residue corresponding to an original residue.
+
+        Parameters
+        ----------
+        residue : ProtoCaller.IO.PDB.Residue.Residue or ProtoCaller.IO.PDB.Missing.MissingResidue
+            The original residue.
+        default
+            The value returned if there is no corresponding residue.
+
+        Returns
+        -------
+        residue : ProtoCaller.IO.PDB.Residue.Residue or ProtoCaller.IO.PDB.Missing.MissingResidue
+            The corresponding modified residue.
+        """
+        i = self._index.get(self._identifier(residue))
+        return default if i is None else self.modified[i]
+
+    def match(self, residues, check_names=False):
+        """
+        Returns the modified residues corresponding to several original residues.
+
+        Parameters
+        ----------
+        residues : [ProtoCaller.IO.PDB.Residue.Residue or ProtoCaller.IO.PDB.Missing.MissingResidue]
+            The original residues.
+        check_names : bool
+            Whether to issue a single warning which lists all residues whose names have been changed.
+
+        Returns
+        -------
+        counterparts : [ProtoCaller.IO.PDB.Residue.Residue or ProtoCaller.IO.PDB.Missing.MissingResidue]
+            The corresponding modified residues in the same order.
+        """
+        residues = list(residues)
+        counterparts = [self.get(residue) for residue in residues]
+        unmatched = [residue for residue, counterpart in zip(residues, counterparts) if counterpart is None]
+        if unmatched:
+            raise ValueError("No residues output by {} correspond to the original residues: {}.".format(
+                self.source, ", ".join("{} {}{}{}".format(x.resName, x.chainID, x.resSeq, x.iCode.strip())
+                                       for x in unmatched)))
+        if check_names:
+            renamed = [(residue, counterpart) for residue, counterpart in zip(residues, counterparts)
+                       if residue.resName != counterpart.resName]
+            if renamed:
+                _warnings.warn("Mismatch between original residue names and the residue names output by {}: {}.".format(
+                    self.source, ", ".join("{} -> {} in chain {}, residue number {}".format(
+                        x.resName, y.resName, x.chainID, x.resSeq) for x, y in renamed)))
+        return counterparts
+
+    def unmatched(self):
+        """[ProtoCaller.IO.PDB.Residue.Residue or ProtoCaller.IO.PDB.Missing.MissingResidue]: Returns all original
+        residues without a corresponding modified residue."""
+        return [residue for residue in self.original if self.get(residue) is None]
+
+    def renamed(self):
+        """[(ProtoCaller.IO.PDB.Residue.Residue or ProtoCaller.IO.PDB.Missing.MissingResidue, ProtoCaller.IO.PDB.Residue.\
+Residue or ProtoCaller.IO.PDB.Missing.MissingResidue)]: Returns all pairs of original and modified residues with
+        different residue names."""
+        pairs = [(residue, self.get(residue)) for residue in self.original]
+        return [(x, y) for x, y in pairs if y is not None and x.resName != y.resName]
+
+    def fillMissingResidues(self, pdb):
+        """
+        Replaces all missing residues of a PDB object with the corresponding modified residues. Each modified residue
+        is renumbered to match the missing residue and is inserted in front of the first residue of the same chain with
+        an equal or higher number. All residues which are inserted at the same place are copied at once.
+
+        Parameters
+        ----------
+        pdb : ProtoCaller.IO.PDB.PDB
+            The original PDB object, which is modified in place.
+        """
+        missing_residues = list(pdb.missing_residues)
+        counterparts = self.match(missing_residues, check_names=True)
+
+        chains = {}
+        for chain in pdb:
+            chains.setdefault(chain.chainID, chain)
+        insertions = {}
+        for missing_residue, residue in zip(missing_residues, counterparts):
+            if missing_residue.chainID not in chains:
+                raise ValueError("Missing residue {} {}{}{} does not belong to any chain".format(
+                    missing_residue.resName, missing_residue.chainID, missing_residue.resSeq,
+                    missing_residue.iCode.strip()))
+            residue.chainID = missing_residue.chainID
+            residue.resSeq = missing_residue.resSeq
+            residue.iCode = missing_residue.iCode
+            insertions.setdefault(missing_residue.chainID, []).append(residue)
+
+        for chainID, residues in insertions.items():
+            chain = chains[chainID]
+            # the running maximum of the residue numbers makes the first residue with an equal or higher number
+            # searchable even if the chain is not sorted
+            maxima = []
+            for number in ((x.resSeq, x.iCode) for x in chain):
+                maxima += [number if not maxima or number > maxima[-1] else maxima[-1]]
+            groups = {}
+            for residue in residues:
+                index = _bisect.bisect_left(maxima, (residue.resSeq, residue.iCode))
+                groups.setdefault(index, []).append(residue)
+            # insert from the back so that the indices of the remaining groups stay valid
+            for index in sorted(groups, reverse=True):
+                chain._insert(index, groups[index])
+        pdb.missing_residues = []
+
+    def _identifier(self, residue):
+        """tuple: Returns the identifiers of a residue which are used for matching."""
+        return tuple(getattr(residue, name) for name in self._identifiers[self.by])
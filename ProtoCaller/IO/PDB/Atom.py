@@ -1,10 +1,17 @@
+import numpy as _np
+
 from . import _Helper_Mixin
+from .AtomTable import AtomTable as _AtomTable
+from .Hybrid36 import decodeHybrid36 as _decodeHybrid36
+from .Records import AtomRecord as _AtomRecord
 
 
 class Atom(_Helper_Mixin.HelperMixin):
     """
     Represents a single ATOM or HETATM instance in a PDB file. The attributes in this atom have been taken from:
-    https://swift.cmbi.umcn.nl/gv/whatcheck/HTML/Format.pdf, p. 194.
+    https://swift.cmbi.umcn.nl/gv/whatcheck/HTML/Format.pdf, p. 194. The atom is a view into a row of a
+    ProtoCaller.IO.PDB.AtomTable.AtomTable and all attributes are read from and written to the table. An atom created
+    from a line only keeps the line and decodes the fields on access until it is modified or added to a residue.
 
     Parameters
     ----------
@@ -47,59 +54,104 @@ class Atom(_Helper_Mixin.HelperMixin):
     _common_properties = ["type", "serial", "name", "altLoc", "resName", "chainID", "resSeq", "iCode", "x", "y", "z",
                           "occupancy", "tempFactor", "element", "charge"]
 
+    _level = "atom"
+
+    __slots__ = ["_line", "_tableref", "_key", "_rowhint", "_version", "__weakref__"]
+
     def __init__(self, pdb_line):
-        pdb_line = "{0: <81}".format(pdb_line.strip())
-        self.type = pdb_line[:6]
-        self.serial = pdb_line[6:11]
-        self.name = pdb_line[12:16]
-        self.altLoc = pdb_line[16]
-        self.resName = pdb_line[17:20]
-        self.chainID = pdb_line[21]
-        self.resSeq = pdb_line[22:26]
-        self.iCode = pdb_line[26]
-        self.x = pdb_line[30:38]
-        self.y = pdb_line[38:46]
-        self.z = pdb_line[46:54]
-        self.occupancy = pdb_line[54:60]
-        self.tempFactor = pdb_line[60:66]
-        self.element = pdb_line[76:78]
-        self.charge = pdb_line[78:80]
+        if pdb_line[:6].strip().upper() not in ["ATOM", "HETATM"]:
+            raise ValueError("Atom type needs to be either ATOM or HETATM")
+        object.__setattr__(self, "_line", pdb_line.rstrip("\r\n"))
+        object.__setattr__(self, "_tableref", None)
 
     def __getattr__(self, item):
         if item not in self._common_properties:
             return self.__getattribute__(item)
+        elif self._tableref is None:
+            return getattr(_AtomRecord(self._line), item)
         else:
-            return self.__getattribute__("_" + item)
+            return self._table.value(item, self._position())
 
     def __str__(self):
-        string = "{:<6.6}{:5d} {:<4.4}{:>1.1}{:<3.3} {:>1.1}{:4d}{:>1.1}   {:>8.3f}{:>8.3f}{:>8.3f}{:>6.6}{:>6.6}" \
-                 "          {:>2.2}{:>2.2}".format(self.type, self.serial, self.name, self.altLoc, self.resName,
-                                                   self.chainID, self.resSeq, self.iCode, self.x, self.y, self.z,
-                                                   self.occupancy, self.tempFactor, self.element, self.charge)
-        return string.strip() + "\n"
+        return _AtomTable._formatLine([getattr(self, name) for name, _, _, _ in _AtomTable._line_fields])
 
     def __setattr__(self, key, value):
-        if key not in self._common_properties:
+        self._table.setValues(key, self._position(), self._validate(key, value))
+
+    def __repr__(self):
+        return "<Atom of type {}>".format(self.type)
+
+    def __getstate__(self):
+        return {key: getattr(self, key) for key in self.__slots__[:-1] if hasattr(self, key)}
+
+    def __setstate__(self, state):
+        for key, value in state.items():
+            object.__setattr__(self, key, value)
+
+    @classmethod
+    def _validate(cls, key, value):
+        """Checks and converts a value before it is assigned to an attribute."""
+        if key not in cls._common_properties:
             raise ValueError("Invalid attribute {}. Attributes need to be one of {}".format(key,
-                                                                                            self._common_properties))
+                                                                                            cls._common_properties))
         if isinstance(value, str): value = value.strip()
 
         # checks
         if key in ["serial", "resSeq"]:
-            value = int(float(value))
+            value = _decodeHybrid36(value)
         elif key in ["x", "y", "z"]:
             value = float(value)
-        elif key in ["iCode", "chainID"]:
+        elif key == "iCode":
             if not isinstance(value, str) or len(value) > 1:
                 raise ValueError("{} must be a single character".format(key))
             value = value.upper() if value != "" else " "
+        elif key == "chainID":
+            # mmCIF files can contain case-sensitive chain identifiers with up to 4 characters
+            if not isinstance(value, str) or len(value) > 4:
+                raise ValueError("{} must be between 1 and 4 characters".format(key))
+            value = value if value != "" else " "
         elif key == "type":
             value = value.upper()
             if value not in ["ATOM", "HETATM"]:
                 raise ValueError("Atom type needs to be either ATOM or HETATM")
+        return value
 
-        # setter
-        super(Atom, self).__setattr__("_" + key, value)
+    @classmethod
+    def _validateMany(cls, key, values):
+        """numpy.ndarray: Checks and converts many values of the same attribute at once. Integers are taken as they are
+        and every other distinct value is only validated once."""
+        values = _np.asarray(values)
+        if key in ["serial", "resSeq"] and values.dtype.kind in "iu":
+            return values.astype(_np.int64).reshape(-1)
+        unique, inverse = _np.unique(values, return_inverse=True)
+        return _np.array([cls._validate(key, x) for x in unique.tolist()])[inverse.reshape(-1)]
 
-    def __repr__(self):
-        return "<Atom of type {}>".format(self.type)
+    @property
+    def _table(self):
+        """ProtoCaller.IO.PDB.AtomTable.AtomTable: Returns the table, which is only created when it is needed."""
+        if self._tableref is None:
+            table = _AtomTable.fromLines([self._line], detached=True)
+            self._bind(table, table.keys("atom")[0].item())
+        return self._tableref
+
+    def _bind(self, table, key):
+        """Binds the object to the atom with a given key in a table."""
+        object.__setattr__(self, "_line", None)
+        object.__setattr__(self, "_tableref", table)
+        object.__setattr__(self, "_key", key)
+        object.__setattr__(self, "_version", None)
+        table._views[self._level][key] = self
+
+    def _setRowHint(self, row):
+        """Caches the current row of the atom in the table."""
+        object.__setattr__(self, "_rowhint", row)
+        object.__setattr__(self, "_version", self._table._version)
+
+    def _position(self):
+        """int: Returns the current row of the atom in the table."""
+        if self._version != self._table._version:
+            row = self._table.position(self._level, self._key)
+            if row is None:
+                raise ValueError("Atom no longer exists")
+            self._setRowHint(row)
+        return self._rowhint
@@ -0,0 +1,972 @@
+import weakref as _weakref
+
+import numpy as _np
+
+import ProtoCaller as _PC
+from .Categorical import Categorical as _Categorical
+from .Hybrid36 import encodeHybrid36 as _encodeHybrid36, _decodeHybrid36Array, _encodeHybrid36Array
+from .Spatial import CellList as _CellList
+
+
+class AtomTable:
+    """
+    A columnar (structure-of-arrays) store of all atoms in a PDB structure. Every atom property is kept in a typed
+    NumPy array while the chain / residue hierarchy is stored as run lengths over the atom rows. String properties are
+    stored as :class:`~ProtoCaller.IO.PDB.Categorical.Categorical` columns of integer codes into a per-table vocabulary
+    and are only decoded on demand. The
+    :class:`~ProtoCaller.IO.PDB.Atom.Atom`, :class:`~ProtoCaller.IO.PDB.Residue.Residue` and
+    :class:`~ProtoCaller.IO.PDB.Chain.Chain` classes are lightweight views into this table.
+
+    Parameters
+    ----------
+    columns : dict, optional
+        Initialises the atom properties. Properties which are not supplied are given default values.
+    coordinates : numpy.ndarray, optional
+        Initialises frames from an (N, 3) array of coordinates or from an (n_frames, N, 3) array of frames.
+    residue_sizes : [int], optional
+        The number of atoms in each residue. Default: all atoms belong to a single residue.
+    chain_sizes : [int], optional
+        The number of residues in each chain. Default: all residues belong to a single chain.
+    detached : bool, optional
+        Initialises detached.
+
+    Attributes
+    ----------
+    frames : numpy.ndarray
+        An (n_frames, N, 3) array of the orthogonal coordinates in Angstroms of all frames, e.g. the models of an NMR
+        ensemble. All frames share the atom properties and the hierarchy.
+    frame : int
+        The index of the current frame.
+    coordinates : numpy.ndarray
+        An (N, 3) array of the orthogonal coordinates in Angstroms. This is a view of the current frame.
+    detached : bool
+        Whether the table does not belong to a PDB object. Views into a detached table are moved instead of copied
+        when they are added to another structure.
+    """
+    # data types of all atom properties apart from the coordinates
+    _dtypes = {
+        "type": "U6",
+        "serial": _np.int64,
+        "name": "U4",
+        "altLoc": "U1",
+        "resName": "U4",
+        "chainID": "U4",
+        "resSeq": _np.int64,
+        "iCode": "U1",
+        "occupancy": "U6",
+        "tempFactor": "U6",
+        "element": "U2",
+        "charge": "U2",
+    }
+    _defaults = {"type": "ATOM", "serial": 0, "resSeq": 0, "chainID": " ", "iCode": " "}
+    # the string properties, which are stored as integer codes
+    _categorical = ["type", "name", "altLoc", "resName", "chainID", "iCode", "occupancy", "tempFactor", "element",
+                    "charge"]
+    # the hierarchy: each level contains elements of the next level
+    _levels = ["chain", "residue", "atom"]
+    _child = {None: "chain", "chain": "residue", "residue": "atom"}
+    _parent = {"chain": None, "residue": "chain", "atom": "residue"}
+    # the atom properties which identify a residue
+    _index_columns = ["chainID", "resSeq", "iCode"]
+    # the format of a single ATOM / HETATM line and the alignment, start and width of each of its fields. Serial and
+    # residue numbers which do not fit into their fields are written in the hybrid-36 format
+    _line_format = "{:<6.6}{:>5.5} {:<4.4}{:>1.1}{:<3.3} {:>1.1}{:>4.4}{:>1.1}   {:>8.3f}{:>8.3f}{:>8.3f}{:>6.6}" \
+                   "{:>6.6}          {:>2.2}{:>2.2}"
+    _line_fields = [("type", "<", 0, 6), ("serial", "d", 6, 5), ("name", "<", 12, 4), ("altLoc", ">", 16, 1),
+                    ("resName", "<", 17, 3), ("chainID", ">", 21, 1), ("resSeq", "d", 22, 4), ("iCode", ">", 26, 1),
+                    ("x", "f", 30, 8), ("y", "f", 38, 8), ("z", "f", 46, 8), ("occupancy", ">", 54, 6),
+                    ("tempFactor", ">", 60, 6), ("element", ">", 76, 2), ("charge", ">", 78, 2)]
+    # the maximum number of lines which are formatted at once
+    _chunk_size = 65536
+    # the maximum number of spatial indices with different cell sizes which are cached at once
+    _max_cell_lists = 4
+
+    def __init__(self, columns=None, coordinates=None, residue_sizes=None, chain_sizes=None, detached=False):
+        if columns is None:
+            columns = {}
+        if coordinates is not None:
+            n_atoms = _np.shape(coordinates)[-2]
+        elif columns:
+            n_atoms = len(next(iter(columns.values())))
+        else:
+            n_atoms = 0
+        if residue_sizes is None:
+            residue_sizes = [n_atoms] if n_atoms else []
+        if chain_sizes is None:
+            chain_sizes = [len(residue_sizes)] if len(residue_sizes) else []
+
+        self._columns = {}
+        for name, dtype in self._dtypes.items():
+            if name in self._categorical:
+                values = columns[name] if name in columns else _Categorical.fromCodes(
+                    _np.zeros(n_atoms, dtype=_np.int8), _np.array([self._defaults.get(name, "")], dtype=dtype))
+                self._columns[name] = _toCategorical(values, dtype)
+                if len(self._columns[name]) != n_atoms:
+                    raise ValueError("Column {} does not match the number of atoms".format(name))
+            elif name in columns:
+                self._columns[name] = _np.array(columns[name], dtype=dtype).reshape(n_atoms)
+            else:
+                self._columns[name] = _np.full(n_atoms, self._defaults.get(name, ""), dtype=dtype)
+        if coordinates is None:
+            coordinates = _np.zeros((n_atoms, 3))
+        coordinates = _np.array(coordinates, dtype=_np.float64)
+        n_frames = len(coordinates) if coordinates.ndim == 3 else 1
+        self.frames = coordinates.reshape(n_frames, n_atoms, 3)
+        self._frame = 0
+
+        self._sizes = {
+            "chain": _np.array(chain_sizes, dtype=_np.int64).reshape(-1),
+            "residue": _np.array(residue_sizes, dtype=_np.int64).reshape(-1),
+        }
+        if self._sizes["residue"].sum() != n_atoms or self._sizes["chain"].sum() != len(self._sizes["residue"]):
+            raise ValueError("Residue and chain sizes do not match the number of atoms and residues")
+        self._keys = {level: _np.arange(self.count(level), dtype=_np.int64) for level in self._levels}
+        self._next_keys = {level: self.count(level) for level in self._levels}
+        self.detached = detached
+        self._version = 0
+        self._generation = 0
+        self._cache = {}
+        self._views = {level: _weakref.WeakValueDictionary() for level in self._levels}
+
+    def __len__(self):
+        return self.frames.shape[1]
+
+    def __repr__(self):
+        return "<AtomTable of {} atoms>".format(len(self))
+
+    @property
+    def nbytes(self):
+        """int: The number of bytes used by the atom properties and the frames."""
+        return sum(column.nbytes for column in self._columns.values()) + self.frames.nbytes
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_cache"] = {}
+        state["_views"] = {level: list(views.items()) for level, views in self._views.items()}
+        return state
+
+    @property
+    def coordinates(self):
+        """numpy.ndarray: The coordinates of the current frame."""
+        return self.frames[self._frame]
+
+    @coordinates.setter
+    def coordinates(self, value):
+        self.frames[self._frame] = value
+        self._cache.pop("cellList", None)
+
+    @property
+    def frame(self):
+        """int: The index of the current frame."""
+        return self._frame
+
+    @frame.setter
+    def frame(self, value):
+        value = int(value)
+        if value < 0:
+            value += len(self.frames)
+        if not 0 <= value < len(self.frames):
+            raise IndexError("Frame index out of range")
+        self._frame = value
+        self._cache.pop("cellList", None)
+
+    def addFrames(self, frames):
+        """
+        Appends new frames for all atoms.
+
+        Parameters
+        ----------
+        frames : numpy.ndarray
+            An (N, 3) array of coordinates or an (n_frames, N, 3) array of frames.
+        """
+        frames = _np.asarray(frames, dtype=_np.float64)
+        frames = frames.reshape(len(frames) if frames.ndim == 3 else 1, len(self), 3)
+        self.frames = _np.concatenate([self.frames, frames])
+
+    def __setstate__(self, state):
+        views = state.pop("_views")
+        self.__dict__.update(state)
+        self._views = {level: _weakref.WeakValueDictionary(items) for level, items in views.items()}
+
+    @classmethod
+    def fromLines(cls, lines, segments=None, detached=False):
+        """
+        Creates a table from ATOM / HETATM lines.
+
+        Parameters
+        ----------
+        lines : [str]
+            Lines from a PDB file that start with "ATOM" or "HETATM".
+        segments : [int], optional
+            A segment index for each line. Chains and residues are always split when the segment index changes, e.g.
+            after a TER record. Default: all lines belong to the same segment.
+        detached : bool, optional
+            Whether the table does not belong to a PDB object.
+
+        Returns
+        -------
+        table : ProtoCaller.IO.PDB.AtomTable.AtomTable
+            The resulting table.
+        """
+        n_atoms = len(lines)
+        buffer = "".join(["{:<80.80}".format(line.strip()) for line in lines]).encode("ascii", "replace")
+        chars = _np.frombuffer(buffer, dtype="S1").reshape(n_atoms, 80)
+
+        def field(start, stop):
+            return _np.char.strip(chars[:, start:stop].copy().view("S%d" % (stop - start)).reshape(n_atoms))
+
+        # string fields are encoded directly from the raw bytes, so that they are only decoded once per unique value
+        def categorical(start, stop, upper=False):
+            column = _Categorical(chars[:, start:stop].copy().view("S%d" % (stop - start)).reshape(n_atoms))
+            return column.map(lambda x: _np.char.upper(_np.char.strip(x)) if upper else _np.char.strip(x))
+
+        def number(start, stop):
+            return _decodeHybrid36Array(chars[:, start:stop].copy().view("S%d" % (stop - start)).reshape(n_atoms))
+
+        columns = {
+            "type": categorical(0, 6, upper=True),
+            "serial": number(6, 11),
+            "name": categorical(12, 16),
+            "altLoc": categorical(16, 17),
+            "resName": categorical(17, 20),
+            "chainID": categorical(21, 22),
+            "resSeq": number(22, 26),
+            "iCode": categorical(26, 27, upper=True),
+            "occupancy": categorical(54, 60),
+            "tempFactor": categorical(60, 66),
+            "element": categorical(76, 78),
+            "charge": categorical(78, 80),
+        }
+        coordinates = _np.stack([field(30, 38), field(38, 46), field(46, 54)], axis=1).astype(_np.float64)
+        return cls.fromColumns(columns, coordinates, segments, detached=detached)
+
+    @staticmethod
+    def coordinatesFromLines(lines):
+        """
+        Reads only the coordinates of ATOM / HETATM lines, e.g. of additional models.
+
+        Parameters
+        ----------
+        lines : [str]
+            Lines from a PDB file that start with "ATOM" or "HETATM".
+
+        Returns
+        -------
+        coordinates : numpy.ndarray
+            An (N, 3) array of coordinates.
+        """
+        buffer = "".join(["{:<24.24}".format(line[30:54]) for line in lines]).encode("ascii", "replace")
+        fields = _np.frombuffer(buffer, dtype="S8").reshape(len(lines), 3)
+        return _np.char.strip(fields).astype(_np.float64)
+
+    @classmethod
+    def fromColumns(cls, columns, coordinates, segments=None, detached=False):
+        """
+        Creates a table from atom properties and splits it into chains and residues.
+
+        Parameters
+        ----------
+        columns : dict
+            The atom properties. Blank chain identifiers and insertion codes are replaced by " ".
+        coordinates : numpy.ndarray
+            An (N, 3) array of coordinates or an (n_frames, N, 3) array of frames.
+        segments : [int], optional
+            A segment index for each atom. Chains and residues are always split when the segment index changes, e.g.
+            after a TER record. Default: all atoms belong to the same segment.
+        detached : bool, optional
+            Whether the table does not belong to a PDB object.
+
+        Returns
+        -------
+        table : ProtoCaller.IO.PDB.AtomTable.AtomTable
+            The resulting table.
+        """
+        n_atoms = _np.shape(coordinates)[-2]
+        columns = {name: _toCategorical(values, cls._dtypes[name]) if name in cls._categorical else
+                   _np.array(values, dtype=cls._dtypes[name]) for name, values in columns.items()}
+        for name in ["chainID", "iCode"]:
+            columns[name] = columns[name].map(lambda x: _np.where(x == "", " ", x))
+        if not _np.isin(columns["type"].categories, ["ATOM", "HETATM"]).all():
+            raise ValueError("Atom type needs to be either ATOM or HETATM")
+
+        # split into residues and chains whenever the identifiers or the segment change
+        if segments is None:
+            segments = _np.zeros(n_atoms, dtype=_np.int64)
+        segments = _np.asarray(segments)
+        new_chain = _np.ones(n_atoms, dtype=bool)
+        # the categorical columns are compared by their codes
+        codes = {name: getattr(column, "codes", column) for name, column in columns.items()}
+        new_chain[1:] = (codes["chainID"][1:] != codes["chainID"][:-1]) | (segments[1:] != segments[:-1])
+        new_residue = new_chain.copy()
+        for name in ["resName", "resSeq", "iCode"]:
+            new_residue[1:] |= codes[name][1:] != codes[name][:-1]
+        residue_starts = _np.flatnonzero(new_residue)
+        chain_starts = _np.flatnonzero(new_chain[residue_starts])
+        residue_sizes = _np.diff(_np.append(residue_starts, n_atoms))
+        chain_sizes = _np.diff(_np.append(chain_starts, len(residue_starts)))
+
+        return cls(columns, coordinates, residue_sizes, chain_sizes, detached=detached)
+
+    def toArrays(self):
+        """
+        Returns the contents of the table as plain arrays, which can be stored e.g. with numpy.savez.
+
+        Returns
+        -------
+        arrays : dict
+            A dictionary of all atom properties, the frames and the residue and chain sizes. String properties are
+            stored as codes together with their categories.
+        """
+        arrays = {}
+        for name, values in self._columns.items():
+            if name in self._categorical:
+                arrays["column_" + name], arrays["categories_" + name] = values.codes, values.categories
+            else:
+                arrays["column_" + name] = values
+        arrays["frames"] = self.frames
+        arrays["residue_sizes"] = self._sizes["residue"]
+        arrays["chain_sizes"] = self._sizes["chain"]
+        return arrays
+
+    @classmethod
+    def fromArrays(cls, arrays, detached=False):
+        """
+        Creates a table from the output of toArrays().
+
+        Parameters
+        ----------
+        arrays : dict
+            A dictionary of all atom properties, the frames and the residue and chain sizes.
+        detached : bool, optional
+            Whether the table does not belong to a PDB object.
+
+        Returns
+        -------
+        table : ProtoCaller.IO.PDB.AtomTable.AtomTable
+            The resulting table.
+        """
+        columns = {name: arrays["column_" + name] for name in cls._dtypes if "column_" + name in arrays}
+        for name in cls._categorical:
+            if "categories_" + name in arrays:
+                columns[name] = _Categorical.fromCodes(columns[name], arrays["categories_" + name])
+        return cls(columns, arrays["frames"], arrays["residue_sizes"], arrays["chain_sizes"], detached=detached)
+
+    def count(self, level):
+        """int: Returns the number of elements on a given level of the hierarchy."""
+        if level == "atom":
+            return len(self)
+        return len(self._sizes[level])
+
+    def keys(self, level):
+        """numpy.ndarray: Returns the unique keys of all elements on a given level of the hierarchy."""
+        return self._keys[level]
+
+    def column(self, name):
+        """numpy.ndarray: Returns the array corresponding to a given atom property. String properties are decoded into
+        a new array, which is not linked to the table."""
+        if name in ["x", "y", "z"]:
+            return self.coordinates[:, "xyz".index(name)]
+        if name in self._categorical:
+            return self._columns[name].decode()
+        return self._columns[name]
+
+    def value(self, name, row):
+        """Returns the value of an atom property for a single row as a Python object."""
+        if name in self._categorical:
+            return self._columns[name].value(row)
+        return self.column(name)[row].item()
+
+    def setValues(self, name, rows, value):
+        """Sets the value of an atom property for a row or a slice of rows."""
+        if name in self._categorical:
+            self._columns[name][rows] = value
+        else:
+            self.column(name)[rows] = value
+        if name not in ["x", "y", "z"]:
+            self._generation += 1
+            self._cache.pop("derived", None)
+        if name in self._index_columns:
+            self._cache.pop("residueIndex", None)
+        elif name == "resName":
+            self._cache.pop("residueTypes", None)
+        elif name in ["x", "y", "z"]:
+            self._cache.pop("cellList", None)
+
+    def formatLines(self, rows=None, terminate=None, chainIDs=None):
+        """
+        Formats atoms as ATOM / HETATM lines, identically to ProtoCaller.IO.PDB.Atom.Atom.__str__.
+
+        Parameters
+        ----------
+        rows : numpy.ndarray, optional
+            The rows to be formatted as indices or as a boolean mask. Default: all rows.
+        terminate : numpy.ndarray, optional
+            A boolean array which is True for every formatted row which is to be followed by a TER record.
+        chainIDs : dict, optional
+            Replaces the chain identifiers which are keys of this dictionary by the corresponding values in the
+            output, e.g. to fit mmCIF chain identifiers into a single character. Default: no replacement.
+
+        Returns
+        -------
+        lines : str
+            The formatted lines.
+        """
+        return "".join(self.iterFormattedLines(rows, terminate, chainIDs))
+
+    def iterFormattedLines(self, rows=None, terminate=None, chainIDs=None):
+        """
+        Lazily formats atoms as ATOM / HETATM lines in chunks of at most _chunk_size rows, so that very large
+        structures can be streamed to a file. Within a chunk all fields are formatted column by column into a single
+        preallocated character buffer.
+
+        Parameters
+        ----------
+        rows : numpy.ndarray, optional
+            The rows to be formatted as indices or as a boolean mask. Default: all rows.
+        terminate : numpy.ndarray, optional
+            A boolean array which is True for every formatted row which is to be followed by a TER record.
+        chainIDs : dict, optional
+            Replaces the chain identifiers which are keys of this dictionary by the corresponding values in the
+            output, e.g. to fit mmCIF chain identifiers into a single character. Default: no replacement.
+
+        Returns
+        -------
+        lines : generator
+            Yields the formatted lines of every chunk as a single string.
+        """
+        rows = _np.arange(len(self)) if rows is None else _np.asarray(rows).reshape(-1)
+        if rows.dtype == bool:
+            rows = _np.flatnonzero(rows)
+        terminate = _np.zeros(len(rows), dtype=bool) if terminate is None else _np.asarray(terminate, dtype=bool)
+        chainIDs = {} if chainIDs is None else chainIDs
+        # every category is only formatted once
+        categories = {}
+        for name, alignment, start, width in self._line_fields:
+            if alignment not in ["d", "f"]:
+                values = self._columns[name].categories
+                if name == "chainID" and chainIDs:
+                    values = _np.array([chainIDs.get(x, x) for x in values.tolist()], dtype=values.dtype)
+                categories[name] = _formatStrings(values, width, alignment == "<")
+        for start in range(0, len(rows), self._chunk_size):
+            yield self._formatChunk(rows[start:start + self._chunk_size], terminate[start:start + self._chunk_size],
+                                    categories, chainIDs)
+
+    def _formatChunk(self, rows, terminate, categories, chainIDs):
+        """str: Formats the lines of a single chunk of rows, given the formatted categories of all string fields and
+        the replaced chain identifiers."""
+        n_rows = len(rows)
+        # columns 0-79 contain the line, column 80 the newline and columns 81-84 an optional TER record
+        chars = _np.full((n_rows, 85), ord(" "), dtype=_np.uint8)
+        chars[:, 80] = ord("\n")
+        chars[:, 81:] = _np.frombuffer(b"TER\n", dtype=_np.uint8)
+        # rows which do not fit into the fixed-width fields are formatted separately
+        irregular = _np.zeros(n_rows, dtype=bool)
+        for name, alignment, start, width in self._line_fields:
+            if alignment in ["d", "f"]:
+                values = self.column(name)[rows]
+                field, invalid = _formatNumbers(values, width, 3 if alignment == "f" else 0)
+                if alignment == "d" and invalid.any():
+                    # integers which are too large are written in the hybrid-36 format
+                    overflow = _np.flatnonzero(invalid)
+                    field[overflow], invalid[overflow] = _encodeHybrid36Array(values[overflow], width)
+            else:
+                codes = self._columns[name].codes[rows]
+                field, invalid = categories[name][0][codes], categories[name][1][codes]
+            chars[:, start:start + width] = field
+            irregular |= invalid
+
+        # remove trailing whitespace and select the TER records
+        lengths = 80 - _np.argmax(chars[:, 79::-1] != ord(" "), axis=1)
+        columns = _np.arange(85)
+        keep = (columns < lengths[:, None]) | (columns == 80) | ((columns > 80) & terminate[:, None])
+
+        pieces, previous = [], 0
+        for i in _np.flatnonzero(irregular).tolist() + [n_rows]:
+            pieces += [chars[previous:i][keep[previous:i]].tobytes().decode("ascii", "replace")]
+            if i < n_rows:
+                values = [self.value(name, rows[i]) for name, _, _, _ in self._line_fields]
+                values = [chainIDs.get(x, x) if name == "chainID" else x
+                          for (name, _, _, _), x in zip(self._line_fields, values)]
+                pieces += [self._formatLine(values) + ("TER\n" if terminate[i] else "")]
+            previous = i + 1
+        return "".join(pieces)
+
+    @classmethod
+    def _formatLine(cls, values):
+        """str: Formats a single ATOM / HETATM line from the values of all fields in the order of _line_fields."""
+        values = list(values)
+        for i, (name, alignment, _, width) in enumerate(cls._line_fields):
+            if alignment == "d":
+                values[i] = _encodeHybrid36(values[i], width)
+        return cls._line_format.format(*values).strip() + "\n"
+
+    def offsets(self, level):
+        """numpy.ndarray: Returns the start of every element of a given level in units of its children."""
+        if ("offsets", level) not in self._cache:
+            self._cache["offsets", level] = _np.concatenate([[0], _np.cumsum(self._sizes[level])]).astype(_np.int64)
+        return self._cache["offsets", level]
+
+    def parents(self, level):
+        """numpy.ndarray: Returns the position of the parent of every element of a given level."""
+        if ("parents", level) not in self._cache:
+            parent = self._parent[level]
+            if parent is None:
+                parents = _np.zeros(self.count(level), dtype=_np.int64)
+            else:
+                parents = _np.repeat(_np.arange(self.count(parent), dtype=_np.int64), self._sizes[parent])
+            self._cache["parents", level] = parents
+        return self._cache["parents", level]
+
+    def position(self, level, key):
+        """int or None: Returns the current position of an element with a given key."""
+        if ("positions", level) not in self._cache:
+            keys = self._keys[level].tolist()
+            self._cache["positions", level] = dict(zip(keys, range(len(keys))))
+        return self._cache["positions", level].get(key)
+
+    def childRange(self, level, position):
+        """(int, int): Returns the range of children of a given element. level=None denotes the whole table."""
+        if level is None:
+            return 0, self.count("chain")
+        offsets = self.offsets(level)
+        return int(offsets[position]), int(offsets[position + 1])
+
+    def rowRange(self, level, position):
+        """(int, int): Returns the range of atom rows of a given element. level=None denotes the whole table."""
+        if level is None:
+            return 0, len(self)
+        offsets = self.rowOffsets(level)
+        return int(offsets[position]), int(offsets[position + 1])
+
+    def rowOffsets(self, level):
+        """numpy.ndarray: Returns the first atom row of every element of a given level, followed by the number of
+        atoms."""
+        if ("rowOffsets", level) not in self._cache:
+            if level == "atom":
+                offsets = _np.arange(self.count("atom") + 1, dtype=_np.int64)
+            else:
+                offsets = self.offsets(level)
+                for child in self._levels[self._levels.index(level) + 1:-1]:
+                    offsets = self.offsets(child)[offsets]
+            self._cache["rowOffsets", level] = offsets
+        return self._cache["rowOffsets", level]
+
+    def levelColumn(self, level, name):
+        """
+        Returns an atom property for all elements of a given level of the hierarchy. The value of the first atom is
+        used for chains and residues and elements which contain no atoms are assigned None.
+
+        Parameters
+        ----------
+        level : str
+            One of "chain", "residue" and "atom".
+        name : str
+            The name of the atom property.
+
+        Returns
+        -------
+        values : numpy.ndarray
+            The values of the property. The data type is object if any element is empty.
+        """
+        if name in self._categorical:
+            return self.levelCategorical(level, name).decode()
+        column = self.column(name)
+        if level == "atom":
+            return column
+        offsets = self.rowOffsets(level)
+        starts, empty = offsets[:-1], offsets[:-1] == offsets[1:]
+        if not empty.any():
+            return column[starts]
+        values = _np.full(len(starts), None, dtype=object)
+        values[~empty] = column[starts[~empty]].tolist()
+        return values
+
+    def levelCategorical(self, level, name):
+        """
+        Returns a string property for all elements of a given level of the hierarchy without decoding it. The code of
+        the first atom is used for chains and residues and elements which contain no atoms are assigned the code -1.
+
+        Parameters
+        ----------
+        level : str
+            One of "chain", "residue" and "atom".
+        name : str
+            The name of the atom property.
+
+        Returns
+        -------
+        values : ProtoCaller.IO.PDB.Categorical.Categorical
+            The codes and the categories of the property.
+        """
+        column = self._columns[name]
+        if level == "atom":
+            return column
+        offsets = self.rowOffsets(level)
+        starts, empty = offsets[:-1], offsets[:-1] == offsets[1:]
+        codes = _np.full(len(starts), -1, dtype=column.codes.dtype)
+        codes[~empty] = column.codes[starts[~empty]]
+        return _Categorical.fromCodes(codes, column.categories)
+
+    def residueIndex(self):
+        """dict: Returns a map from (chainID, resSeq, iCode) to the positions of all residues with these identifiers,
+        in the order in which they appear in the structure."""
+        if "residueIndex" not in self._cache:
+            index = {}
+            identifiers = zip(*[self.levelColumn("residue", name).tolist() for name in self._index_columns])
+            for position, identifier in enumerate(identifiers):
+                index.setdefault(identifier, []).append(position)
+            self._cache["residueIndex"] = index
+        return self._cache["residueIndex"]
+
+    def residueTypes(self):
+        """numpy.ndarray: Returns the type of every residue as determined by ProtoCaller.RESIDUETYPE or None for
+        residues without atoms. Every residue name is only classified once and the result is cached until the structure
+        or the residue names change."""
+        if "residueTypes" not in self._cache:
+            resnames = self.levelCategorical("residue", "resName")
+            # the last entry is used for residues without atoms
+            types = [_PC.RESIDUETYPE(x) for x in resnames.categories.tolist()] + [None]
+            self._cache["residueTypes"] = _np.array(types, dtype=object)[resnames.codes]
+        return self._cache["residueTypes"]
+
+    def derived(self, name, function, key=None):
+        """
+        Returns a quantity derived from the table, e.g. a sequence. The quantity is computed on first access and cached
+        until the structure or any atom property apart from the coordinates changes.
+
+        Parameters
+        ----------
+        name : hashable
+            A unique name of the quantity.
+        function : callable
+            A function without arguments which computes the quantity.
+        key : hashable, optional
+            Any further state the quantity depends on. The quantity is recomputed whenever the key changes.
+
+        Returns
+        -------
+        value
+            The cached or newly computed quantity.
+        """
+        derived = self._cache.setdefault("derived", {})
+        if name not in derived or derived[name][0] != key:
+            derived[name] = key, function()
+        return derived[name][1]
+
+    def cellList(self, cell_size):
+        """
+        Returns a spatial index over the coordinates of all atoms. The index is cached until the atoms or their
+        coordinates change. Coordinates which are modified directly through the coordinates array are not tracked.
+        Only the indices of the _max_cell_lists most recently used cell sizes are kept.
+
+        Parameters
+        ----------
+        cell_size : float
+            The length of a cell in Angstroms.
+
+        Returns
+        -------
+        cell_list : ProtoCaller.IO.PDB.Spatial.CellList
+            The spatial index.
+        """
+        cell_lists = self._cache.setdefault("cellList", {})
+        cell_size = float(cell_size)
+        # the dictionary is ordered from the least to the most recently used cell size
+        cell_list = cell_lists.pop(cell_size, None)
+        if cell_list is None:
+            cell_list = _CellList(self.coordinates, cell_size)
+        cell_lists[cell_size] = cell_list
+        while len(cell_lists) > self._max_cell_lists:
+            del cell_lists[next(iter(cell_lists))]
+        return cell_list
+
+    def view(self, cls, key, row=None):
+        """Returns the unique view of a given class which corresponds to an element with a given key."""
+        view = self._views[cls._level].get(key)
+        if view is None:
+            view = cls.__new__(cls)
+            view._bind(self, key)
+        if row is not None:
+            # share the integer object while the row coincides with the key
+            view._setRowHint(key if row == key else row)
+        return view
+
+    def extract(self, level, positions):
+        """
+        Copies selected elements and everything they contain into a new detached table. The keys are preserved.
+
+        Parameters
+        ----------
+        level : str
+            One of "chain", "residue" and "atom".
+        positions : [int]
+            The positions of the elements to be extracted.
+
+        Returns
+        -------
+        table : ProtoCaller.IO.PDB.AtomTable.AtomTable
+            The detached table.
+        """
+        positions = _np.asarray(positions, dtype=_np.int64).reshape(-1)
+        selected = {level: positions}
+        sizes = {}
+        child_level = level
+        while child_level != "atom":
+            offsets = self.offsets(child_level)
+            sizes[child_level] = self._sizes[child_level][selected[child_level]]
+            starts, stops = offsets[selected[child_level]], offsets[selected[child_level] + 1]
+            selected[self._child[child_level]] = _expandRanges(starts, stops)
+            child_level = self._child[child_level]
+
+        rows = selected["atom"]
+        # elements above the extracted level are wrapped in a single parent
+        if "residue" not in sizes:
+            sizes["residue"] = [len(rows)]
+        if "chain" not in sizes:
+            sizes["chain"] = [len(sizes["residue"])]
+
+        table = AtomTable({name: column[rows] for name, column in self._columns.items()}, self.frames[:, rows],
+                          sizes["residue"], sizes["chain"], detached=True)
+        table._frame = self._frame
+        for key_level, keys in selected.items():
+            table._keys[key_level] = self._keys[key_level][keys]
+        table._next_keys = dict(self._next_keys)
+        return table
+
+    def insert(self, parent_level, parent_position, index, block):
+        """
+        Inserts the contents of another table as children of a given element.
+
+        Parameters
+        ----------
+        parent_level : str or None
+            The level of the parent element. None denotes the whole table.
+        parent_position : int or None
+            The position of the parent element.
+        index : int
+            The index within the parent at which the new children are inserted.
+        block : ProtoCaller.IO.PDB.AtomTable.AtomTable
+            The table to be inserted. Only the elements below parent_level are used.
+
+        Returns
+        -------
+        keys : dict
+            A dictionary of levels and the tuples of the old and new keys of the inserted elements.
+        """
+        start, stop = self.childRange(parent_level, parent_position)
+        if index < 0:
+            index = max(0, index + stop - start)
+        position = start + min(index, stop - start)
+
+        # find the positions of insertion on all levels before modifying anything
+        level = self._child[parent_level]
+        positions = {level: position}
+        while level != "atom":
+            positions[self._child[level]] = int(self.offsets(level)[positions[level]])
+            level = self._child[level]
+
+        keys = {}
+        for level, position in positions.items():
+            new_keys = _np.arange(self._next_keys[level], self._next_keys[level] + block.count(level), dtype=_np.int64)
+            self._next_keys[level] += len(new_keys)
+            keys[level] = (block._keys[level], new_keys)
+            self._keys[level] = _np.concatenate([self._keys[level][:position], new_keys,
+                                                 self._keys[level][position:]])
+            if level != "atom":
+                self._sizes[level] = _np.concatenate([self._sizes[level][:position], block._sizes[level],
+                                                      self._sizes[level][position:]])
+            else:
+                for name, column in self._columns.items():
+                    concatenate = _Categorical.concatenate if name in self._categorical else _np.concatenate
+                    self._columns[name] = concatenate([column[:position], block._columns[name], column[position:]])
+                self.frames = _np.concatenate([self.frames[:, :position], self._matchFrames(block),
+                                               self.frames[:, position:]], axis=1)
+        if parent_level is not None:
+            self._sizes[parent_level][parent_position] += block.count(self._child[parent_level])
+        self._invalidate()
+        return keys
+
+    def delete(self, level, positions, detach=True):
+        """
+        Deletes selected elements and everything they contain.
+
+        Parameters
+        ----------
+        level : str
+            One of "chain", "residue" and "atom".
+        positions : [int] or numpy.ndarray
+            The positions or a boolean mask of the elements to be deleted.
+        detach : bool
+            Whether to move any existing views of the deleted elements into a new detached table. Otherwise these
+            views become invalid.
+        """
+        positions = _np.asarray(positions).reshape(-1)
+        if positions.dtype == bool:
+            mask = positions.copy()
+        else:
+            mask = _np.zeros(self.count(level), dtype=bool)
+            mask[positions.astype(_np.int64)] = True
+        if not mask.any():
+            return
+        if detach:
+            self._detach(level, _np.flatnonzero(mask))
+
+        masks = {level: mask}
+        child_level = level
+        while child_level != "atom":
+            masks[self._child[child_level]] = _np.repeat(masks[child_level], self._sizes[child_level])
+            child_level = self._child[child_level]
+        parent_level = self._parent[level]
+        if parent_level is not None:
+            self._sizes[parent_level] = self._sizes[parent_level] - _np.bincount(
+                self.parents(level)[mask], minlength=self.count(parent_level))
+
+        for child_level, child_mask in masks.items():
+            keep = ~child_mask
+            self._keys[child_level] = self._keys[child_level][keep]
+            if child_level != "atom":
+                self._sizes[child_level] = self._sizes[child_level][keep]
+            else:
+                for name, column in self._columns.items():
+                    self._columns[name] = column[keep]
+                self.frames = self.frames[:, keep]
+        self._invalidate()
+
+    def move(self, level, positions, target, parent_level, parent_position, index):
+        """
+        Moves selected elements into another table and rebinds all of their views.
+
+        Parameters
+        ----------
+        level : str
+            One of "chain", "residue" and "atom".
+        positions : [int]
+            The positions of the elements to be moved.
+        target : ProtoCaller.IO.PDB.AtomTable.AtomTable
+            The table where the elements are inserted.
+        parent_level : str or None
+            The level of the new parent element in target. None denotes the whole table.
+        parent_position : int or None
+            The position of the new parent element in target.
+        index : int
+            The index within the new parent at which the elements are inserted.
+        """
+        block = self.extract(level, positions)
+        keys = target.insert(parent_level, parent_position, index, block)
+        if target is self:
+            return
+        self.delete(level, positions, detach=False)
+        for view_level, (old, new) in keys.items():
+            views = self._views[view_level]
+            if not len(views):
+                continue
+            for old_key, new_key in zip(old.tolist(), new.tolist()):
+                view = views.pop(old_key, None)
+                if view is not None:
+                    view._bind(target, new_key)
+
+    def _matchFrames(self, block):
+        """numpy.ndarray: Returns the frames of another table, where a single frame is repeated for all frames of the
+        current table."""
+        if len(block.frames) == len(self.frames):
+            return block.frames
+        if len(block.frames) == 1:
+            return _np.repeat(block.frames, len(self.frames), axis=0)
+        raise ValueError("Cannot combine tables with {} and {} frames".format(len(self.frames), len(block.frames)))
+
+    def _detach(self, level, positions):
+        """Moves the views of elements which are about to be deleted into a new detached table."""
+        view_levels = [x for x in self._levels[self._levels.index(level):] if len(self._views[x])]
+        if not view_levels:
+            return
+        block = self.extract(level, positions)
+        for view_level in view_levels:
+            views = self._views[view_level]
+            for key in block.keys(view_level).tolist():
+                view = views.pop(key, None)
+                if view is not None:
+                    view._bind(block, key)
+
+    def _invalidate(self):
+        """Marks all derived quantities as out of date after a change in the structure."""
+        self._version += 1
+        self._generation += 1
+        self._cache = {}
+
+
+def _expandRanges(starts, stops):
+    """numpy.ndarray: Concatenates the integer ranges given by starts and stops."""
+    lengths = stops - starts
+    if not len(lengths):
+        return _np.zeros(0, dtype=_np.int64)
+    return _np.repeat(stops - _np.cumsum(lengths), lengths) + _np.arange(lengths.sum(), dtype=_np.int64)
+
+
+def _toCategorical(values, dtype):
+    """ProtoCaller.IO.PDB.Categorical.Categorical: Converts values into a categorical column of a given data type."""
+    if isinstance(values, _Categorical):
+        return values if values.dtype == _np.dtype(dtype) else values.map(lambda x: x.astype(dtype))
+    return _Categorical(values, dtype)
+
+
+def _formatNumbers(values, width, precision):
+    """
+    Formats numbers right-aligned into a character matrix, identically to "%{width}.{precision}f" or "%{width}d".
+    Returns the matrix and a mask of all values which cannot be formatted into the given width.
+    """
+    values = _np.asarray(values)
+    negative = _np.signbit(values)
+    if precision:
+        scaled = _np.abs(values) * 10 ** precision
+        invalid = ~(scaled < 2 ** 52)
+        scaled[invalid] = 0
+        digits = _np.floor(scaled + 0.5).astype(_np.int64)
+        # values close to a rounding boundary are rounded by Python
+        for i in _np.flatnonzero(_np.abs(scaled - _np.floor(scaled) - 0.5) < 1e-6).tolist():
+            digits[i] = int(("%.{}f".format(precision) % abs(values[i])).replace(".", ""))
+    else:
+        digits = _np.abs(values.astype(_np.int64))
+        invalid = digits < 0
+
+    n_digits = _np.ones(len(values), dtype=_np.int64)
+    for power in range(1, 19):
+        n_digits += digits >= 10 ** power
+    n_digits = _np.maximum(n_digits, precision + 1)
+    length = n_digits + bool(precision) + negative
+    invalid |= length > width
+
+    chars = _np.full((len(values), width), ord(" "), dtype=_np.uint8)
+    column = width - 1
+    for power in range(min(width, 19)):
+        if precision and power == precision:
+            chars[:, column] = ord(".")
+            column -= 1
+        if column < 0:
+            break
+        digit = (digits // 10 ** power) % 10
+        chars[:, column] = _np.where(power < n_digits, ord("0") + digit, ord(" "))
+        column -= 1
+    signed = _np.flatnonzero(negative & ~invalid)
+    chars[signed, width - length[signed]] = ord("-")
+    return chars, invalid
+
+
+def _formatStrings(values, width, left):
+    """
+    Formats strings into a character matrix, identically to "{:<{width}.{width}}" or "{:>{width}.{width}}". Returns the
+    matrix and a mask of all values which contain non-ASCII characters.
+    """
+    codes = _np.ascontiguousarray(values, dtype="U{}".format(width)).view(_np.uint32).reshape(len(values), width)
+    invalid = (codes > 127).any(axis=1)
+    lengths = width - _np.argmax(codes[:, ::-1] != 0, axis=1)
+    lengths[~codes.any(axis=1)] = 0
+    columns = _np.arange(width)
+    if left:
+        indices = _np.broadcast_to(columns, codes.shape)
+        inside = columns < lengths[:, None]
+    else:
+        indices = columns - (width - lengths)[:, None]
+        inside = indices >= 0
+    chars = _np.take_along_axis(codes, _np.clip(indices, 0, width - 1), axis=1)
+    chars = _np.where(inside, chars, ord(" ")).astype(_np.uint8)
+    return chars, invalid
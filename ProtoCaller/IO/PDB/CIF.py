@@ -0,0 +1,174 @@
+import os as _os
+import re as _re
+
+import numpy as _np
+
+import ProtoCaller.Utils.fileio as _fileio
+from .Records import _openFile
+
+
+def isCIF(filename):
+    """
+    Determines whether a file is in mmCIF format, based on its extension or, failing that, its first record.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the input file.
+
+    Returns
+    -------
+    is_cif : bool
+        Whether the file is an mmCIF file.
+    """
+    if not isinstance(filename, str):
+        return False
+    extension = _os.path.splitext(_fileio.splitCompression(filename)[0])[1].lower()
+    if extension in [".cif", ".mmcif"]:
+        return True
+    if extension in [".pdb", ".ent", ".pqr"] or not _os.path.isfile(filename):
+        return False
+    with _openFile(filename) as file:
+        for line in file:
+            if line.strip() and line[0] != "#":
+                return line.startswith("data_")
+    return False
+
+
+def readCIF(input):
+    """
+    Parses the first data block of an mmCIF file. Loop tables are split into columns directly.
+
+    Parameters
+    ----------
+    input : str or file
+        Name of the input mmCIF file or an open file handle. Files compressed with gzip, bzip2 or xz are decompressed on
+        the fly.
+
+    Returns
+    -------
+    categories : dict
+        A dictionary of categories, e.g. "atom_site", each of which is a dictionary of items, e.g. "Cartn_x", mapped
+        to NumPy string arrays with one element per row. The special values "?" and "." are kept as they are.
+    """
+    categories = {}
+    with _openFile(input) as file:
+        lines = _LineReader(file)
+        started = False
+        while lines.peek() is not None:
+            line = lines.pop()
+            stripped = line.strip()
+            if not stripped or stripped[0] == "#":
+                continue
+            elif stripped.startswith("data_"):
+                if started:
+                    break
+                started = True
+            elif stripped == "loop_":
+                # read the item names and then the values until the next keyword
+                names = []
+                while lines.peek() is not None and lines.peek().lstrip().startswith("_"):
+                    names += [lines.pop().strip()]
+                values = _readLoopValues(lines)
+                if len(values) % len(names):
+                    raise ValueError("Number of values in loop is not a multiple of the number of items: {}".format(
+                        ", ".join(names)))
+                values = values.reshape(-1, len(names))
+                for j, name in enumerate(names):
+                    category, item = _splitName(name)
+                    categories.setdefault(category, {})[item] = values[:, j]
+            elif stripped[0] == "_":
+                # a single item, whose value can also be on the next line(s)
+                name, _, rest = stripped.partition(" ")
+                if not rest.strip():
+                    if lines.peek() is None:
+                        raise ValueError("Missing value of item {} in mmCIF file".format(name))
+                    field = [lines.pop()]
+                    if field[0].startswith(";"):
+                        while lines.peek() is not None and not lines.peek().startswith(";"):
+                            field += [lines.pop()]
+                        if lines.peek() is not None:
+                            field += [lines.pop()]
+                    tokens = _tokenize(field)
+                else:
+                    tokens = _tokenize([rest])
+                category, item = _splitName(name)
+                categories.setdefault(category, {})[item] = _np.array(tokens[:1], dtype=str)
+            else:
+                raise ValueError("Unexpected line in mmCIF file: {}".format(line))
+    return categories
+
+
+class _LineReader:
+    """Iterates over the lines of a file without their line endings and allows looking at the next line without
+    consuming it, so that the file is read incrementally."""
+    def __init__(self, file):
+        self._lines = (line.rstrip("\r\n") for line in file)
+        self._next = None
+
+    def peek(self):
+        """str or None: Returns the next line without consuming it or None at the end of the file."""
+        if self._next is None:
+            self._next = next(self._lines, None)
+        return self._next
+
+    def pop(self):
+        """str or None: Returns and consumes the next line or returns None at the end of the file."""
+        line = self.peek()
+        self._next = None
+        return line
+
+
+def _readLoopValues(lines):
+    """numpy.ndarray: Reads the values of a loop up to the next keyword. The lines are tokenized in chunks of at most
+    _chunk_lines lines, so that large loops such as atom_site are never joined into a single string."""
+    chunks, chunk, in_field = [], [], False
+    while lines.peek() is not None and (in_field or not _isKeyword(lines.peek())):
+        line = lines.pop()
+        if line.startswith(";"):
+            in_field = not in_field
+        chunk += [line]
+        # text fields are never split between chunks
+        if len(chunk) >= _chunk_lines and not in_field:
+            chunks += [_np.array(_tokenize(chunk), dtype=str)]
+            chunk = []
+    chunks += [_np.array(_tokenize(chunk), dtype=str)]
+    return _np.concatenate(chunks)
+
+
+def _isKeyword(line):
+    """bool: Returns whether a line starts a new item, loop, data block or comment."""
+    stripped = line.lstrip()
+    return stripped[:1] in ["_", "#"] or stripped.startswith("loop_") or stripped.startswith("data_")
+
+
+def _splitName(name):
+    """(str, str): Splits an item name into a category and an item, e.g. "_atom_site.id" -> ("atom_site", "id")."""
+    category, _, item = name[1:].partition(".")
+    return category, item
+
+
+def _tokenize(lines):
+    """[str]: Splits lines into values, taking care of quoted strings and semicolon-delimited text fields."""
+    text = "\n".join(lines)
+    if not _re.search(r"(^|\s)['\"]|^;", text, _re.M):
+        return text.split()
+
+    tokens, i = [], 0
+    while i < len(lines):
+        if lines[i].startswith(";"):
+            field = [lines[i][1:]]
+            i += 1
+            while i < len(lines) and not lines[i].startswith(";"):
+                field += [lines[i]]
+                i += 1
+            tokens += ["\n".join(field).strip()]
+        else:
+            tokens += [next(x for x in match.groups() if x is not None) for match in _token.finditer(lines[i])]
+        i += 1
+    return tokens
+
+
+# the maximum number of lines of a loop which are tokenized at once
+_chunk_lines = 65536
+_token = _re.compile(r"'(.*?)'(?=\s|$)|\"(.*?)\"(?=\s|$)|(\S+)")
@@ -0,0 +1,104 @@
+import hashlib as _hashlib
+import os as _os
+
+import numpy as _np
+
+# bump this whenever the layout of the cached arrays changes
+_CACHE_VERSION = 3
+
+
+def cacheFilename(filename):
+    """
+    Returns the name of the binary cache file corresponding to an input file. The cache is kept next to the input file
+    as a hidden file.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the input file.
+
+    Returns
+    -------
+    cache_filename : str
+        The absolute path to the cache file.
+    """
+    dirname, basename = _os.path.split(_os.path.abspath(filename))
+    return _os.path.join(dirname, ".{}.pccache.npz".format(basename))
+
+
+def contentHash(filename):
+    """
+    Computes the SHA-1 hash of the contents of a file.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the input file.
+
+    Returns
+    -------
+    hash : str
+        The hexadecimal digest.
+    """
+    sha1 = _hashlib.sha1()
+    with open(filename, "rb") as file:
+        for block in iter(lambda: file.read(1 << 20), b""):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+def loadCache(filename):
+    """
+    Loads the cached arrays of an input file if the cache exists and was created from the current contents of the
+    file.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the input file.
+
+    Returns
+    -------
+    arrays : dict or None
+        The cached arrays or None if there is no valid cache.
+    """
+    cache_filename = cacheFilename(filename)
+    if not _os.path.isfile(cache_filename):
+        return None
+    try:
+        with _np.load(cache_filename, allow_pickle=False) as data:
+            if data["cache_version"].item() != _CACHE_VERSION or data["content_hash"].item() != contentHash(filename):
+                return None
+            return {key: data[key] for key in data.files}
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def saveCache(filename, arrays):
+    """
+    Saves arrays to the cache of an input file. Failures, e.g. due to a read-only directory, are silently ignored.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the input file.
+    arrays : dict
+        The arrays to be cached. None of them can be object arrays.
+
+    Returns
+    -------
+    cache_filename : str or None
+        The absolute path to the cache file or None if the cache could not be written.
+    """
+    cache_filename = cacheFilename(filename)
+    arrays = dict(arrays, cache_version=_np.array(_CACHE_VERSION), content_hash=_np.array(contentHash(filename)))
+    # write to a temporary file first so that concurrent readers never see a partially written cache
+    temp_filename = "{}.{}.tmp.npz".format(cache_filename[:-4], _os.getpid())
+    try:
+        _np.savez(temp_filename, **arrays)
+        _os.replace(temp_filename, cache_filename)
+    except OSError:
+        if _os.path.exists(temp_filename):
+            _os.remove(temp_filename)
+        return None
+    return cache_filename
@@ -0,0 +1,179 @@
+import numpy as _np
+
+
+class Categorical:
+    """
+    A column of strings which is stored as small integer codes into a vocabulary of unique values. Columns with many
+    repeated values, such as residue names or element symbols, only store every distinct string once and equality
+    comparisons can be carried out on the codes. The codes use the smallest signed integer type which can hold all
+    categories and a code of -1 denotes a missing value.
+
+    Parameters
+    ----------
+    values : [str] or numpy.ndarray
+        The values of the column.
+    dtype : str or numpy.dtype, optional
+        The data type of the decoded values, e.g. "U4". Longer values are truncated, as in a NumPy array of this type.
+        Default: the data type of values.
+
+    Attributes
+    ----------
+    codes : numpy.ndarray
+        The code of every value.
+    categories : numpy.ndarray
+        The vocabulary of values. Categories are only ever added and the array is replaced instead of being modified,
+        so that it can be shared between columns.
+    """
+    def __init__(self, values=(), dtype=None):
+        values = _np.asarray(values, dtype=dtype).reshape(-1)
+        categories, codes = _np.unique(values, return_inverse=True)
+        self._set(codes.reshape(-1), categories)
+
+    @classmethod
+    def fromCodes(cls, codes, categories):
+        """
+        Creates a column from existing codes and categories.
+
+        Parameters
+        ----------
+        codes : numpy.ndarray
+            The code of every value.
+        categories : numpy.ndarray
+            The vocabulary of unique values.
+
+        Returns
+        -------
+        column : ProtoCaller.IO.PDB.Categorical.Categorical
+            The resulting column.
+        """
+        obj = cls.__new__(cls)
+        obj._set(_np.asarray(codes).reshape(-1), _np.asarray(categories).reshape(-1))
+        return obj
+
+    @classmethod
+    def concatenate(cls, columns):
+        """
+        Concatenates several columns. The categories of the first column are extended by those of the other columns.
+
+        Parameters
+        ----------
+        columns : [ProtoCaller.IO.PDB.Categorical.Categorical]
+            The columns to be concatenated.
+
+        Returns
+        -------
+        column : ProtoCaller.IO.PDB.Categorical.Categorical
+            The resulting column.
+        """
+        result = cls.fromCodes(columns[0].codes, columns[0].categories)
+        codes = [columns[0].codes]
+        for column in columns[1:]:
+            if column.categories is result.categories or not len(column.codes):
+                codes += [column.codes]
+            else:
+                codes += [result._remap(column)]
+        result._set(_np.concatenate(codes), result.categories)
+        return result
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __repr__(self):
+        return "<Categorical of {} values in {} categories>".format(len(self), len(self.categories))
+
+    def __getitem__(self, item):
+        return Categorical.fromCodes(self.codes[item], self.categories)
+
+    def __setitem__(self, item, values):
+        codes = self.encode(values)
+        self.codes[item] = codes
+
+    @property
+    def dtype(self):
+        """numpy.dtype: The data type of the decoded values."""
+        return self.categories.dtype
+
+    @property
+    def nbytes(self):
+        """int: The number of bytes used by the codes and the categories."""
+        return self.codes.nbytes + self.categories.nbytes
+
+    def value(self, index):
+        """Returns a single decoded value as a Python object or None if the value is missing."""
+        code = self.codes[index]
+        return None if code < 0 else self.categories[code].item()
+
+    def decode(self):
+        """numpy.ndarray: Returns the values as a string array or as an object array if any values are missing."""
+        missing = self.codes < 0
+        if not missing.any():
+            return self.categories[self.codes]
+        values = _np.full(len(self.codes), None, dtype=object)
+        values[~missing] = self.categories[self.codes[~missing]].tolist()
+        return values
+
+    def find(self, value):
+        """int or None: Returns the code of a value without adding it to the categories."""
+        return self._lookup().get(value)
+
+    def encode(self, values):
+        """
+        Returns the codes of one or several values. Values which are not yet part of the categories are added.
+
+        Parameters
+        ----------
+        values : str or [str] or numpy.ndarray
+            The values to be encoded.
+
+        Returns
+        -------
+        codes : int or numpy.ndarray
+            The codes, with the same shape as the input.
+        """
+        values = _np.asarray(values, dtype=self.dtype)
+        unique, inverse = _np.unique(values.reshape(-1), return_inverse=True)
+        lookup = self._lookup()
+        new = [x for x in unique.tolist() if x not in lookup]
+        if new:
+            self._set(self.codes, _np.concatenate([self.categories, _np.array(new, dtype=self.dtype)]))
+            lookup = self._lookup()
+        codes = _np.array([lookup[x] for x in unique.tolist()], dtype=self.codes.dtype)[inverse.reshape(-1)]
+        return codes.reshape(values.shape) if values.ndim else codes[0]
+
+    def map(self, function):
+        """
+        Transforms all values by applying a vectorised function to the categories, e.g. numpy.char.upper. Categories
+        which become equal are merged.
+
+        Parameters
+        ----------
+        function : callable
+            A function which takes and returns an array of strings.
+
+        Returns
+        -------
+        column : ProtoCaller.IO.PDB.Categorical.Categorical
+            The transformed column.
+        """
+        categories, inverse = _np.unique(_np.asarray(function(self.categories)), return_inverse=True)
+        inverse = inverse.reshape(-1)
+        codes = _np.where(self.codes >= 0, inverse[self.codes.clip(min=0)] if len(inverse) else -1, -1)
+        return Categorical.fromCodes(codes, categories)
+
+    def _remap(self, other):
+        """numpy.ndarray: Returns the codes of another column translated into the categories of the current column."""
+        mapping = self.encode(other.categories) if len(other.categories) else _np.zeros(0, dtype=self.codes.dtype)
+        mapping = _np.append(mapping, -1).astype(self.codes.dtype)
+        return mapping[other.codes]
+
+    def _lookup(self):
+        """dict: Returns a map from every category to its code."""
+        if self._lookup_dict is None:
+            self._lookup_dict = {value: code for code, value in enumerate(self.categories.tolist())}
+        return self._lookup_dict
+
+    def _set(self, codes, categories):
+        """Sets the codes and the categories, choosing the smallest code type which fits all categories."""
+        self.codes = codes.astype(_np.min_scalar_type(-max(len(categories), 1)), copy=False)
+        self.categories = categories
+        self._lookup_dict = None
@@ -1,10 +1,16 @@
-import ProtoCaller.Utils.ConditionalList as _CondList
+import collections as _collections
+
+import numpy as _np
+
+from .Atom import Atom as _Atom
+from .AtomTable import AtomTable as _AtomTable, _expandRanges
 from . import Residue as _Residue
 
 
-class Chain(_Residue, _CondList.ConditionalList):
+class Chain(_Residue):
     """
-    Represents a single Chain in a PDB file.
+    Represents a single Chain in a PDB file. The chain is a view into a range of residues of a
+    ProtoCaller.IO.PDB.AtomTable.AtomTable and behaves like a list of residues.
 
     Parameters
     ----------
@@ -19,10 +25,16 @@ class Chain(_Residue, _CondList.ConditionalList):
     # properties which have to be conserved within the whole chain
     _common_properties = ["chainID"]
 
+    _level = "chain"
+    _childClass = _Residue
+
     def __init__(self, residues=None):
-        if residues is None:
-            residues = []
-        _CondList.ConditionalList.__init__(self, residues, self._checkResidue)
+        if "_table" in self.__dict__:
+            self.clear()
+        else:
+            self._bind(_AtomTable(chain_sizes=[0], detached=True), 0)
+        if residues is not None:
+            self.extend(residues)
 
     def __eq__(self, other):
         return self.sameChain(other)
@@ -37,29 +49,30 @@ class Chain(_Residue, _CondList.ConditionalList):
     def sequence(self):
         """str: Returns the single-character sequence of the amino acids in
                 the chain. Missing amino acids are not taken into account."""
-        try:
-            seq = "".join([residue.sequence for residue in self
-                           if residue.type in ["amino_acid",
-                                               "amino_acid_modified"]])
-        except:
-            seq = ""
-        return seq
+        def sequence():
+            try:
+                return "".join([residue.sequence for residue in self
+                                if residue.type in ["amino_acid", "amino_acid_modified"]])
+            except:
+                return ""
+        return self._table.derived(("sequence", self._key), sequence)
 
     @property
     def type(self):
         """str: Returns the type of the chain: "chain" if it has amino acid
                 residues and "molecules" otherwise."""
-        if not len(self):
-            return None
-        else:
-            for residue in self:
-                if residue.type in ["amino_acid"]:
-                    return "chain"
-            return "molecules"
+        def type():
+            start, stop = self._childRange()
+            if start == stop:
+                return None
+            return "chain" if (self._table.residueTypes()[start:stop] == "amino_acid").any() else "molecules"
+        return self._table.derived(("type", self._key), type)
 
     @property
     def numberOfAtoms(self):
-        return sum([residue.numberOfAtoms for residue in self])
+        """int: Returns the number of atoms."""
+        start, stop = self._rowRange()
+        return stop - start
 
     @property
     def numberOfResidues(self):
@@ -68,14 +81,10 @@ class Chain(_Residue, _CondList.ConditionalList):
 
     def reNumberAtoms(self, start=1, custom_serials=None):
         if custom_serials is None:
-            custom_serials = [start + i for i in range(self.numberOfAtoms)]
+            custom_serials = _np.arange(start, start + self.numberOfAtoms)
         if not len(custom_serials) == self.numberOfAtoms:
             raise ValueError("Custom number of atoms does not match chain number of atoms")
-
-        i = 0
-        for residue in self:
-            residue.reNumberAtoms(custom_serials=custom_serials[i:i + residue.numberOfAtoms])
-            i += residue.numberOfAtoms
+        self._table.setValues("serial", slice(*self._rowRange()), _Atom._validateMany("serial", custom_serials))
 
     def reNumberResidues(self, start=1, custom_resSeqs=None, custom_iCodes=None):
         """
@@ -97,19 +106,28 @@ class Chain(_Residue, _CondList.ConditionalList):
         if not len(custom_resSeqs) == len(custom_iCodes) == len(self):
             raise ValueError("Custom number of residues does not match chain number of residues")
 
-        for resSeq, iCode, residue in zip(custom_resSeqs, custom_iCodes, self):
-            residue.resSeq, residue.iCode = resSeq, iCode
+        start, stop = self._childRange()
+        self._setResidueNumbers(_np.arange(start, stop), _Atom._validateMany("resSeq", custom_resSeqs),
+                                _Atom._validateMany("iCode", custom_iCodes))
+
+    def _setResidueNumbers(self, positions, resSeqs, iCodes):
+        """Assigns new residue numbers and insertion codes to the residues at the given positions in the table."""
+        offsets = self._table.offsets("residue")
+        rows = _expandRanges(offsets[positions], offsets[positions + 1])
+        sizes = offsets[positions + 1] - offsets[positions]
+        self._table.setValues("resSeq", rows, _np.repeat(resSeqs, sizes))
+        self._table.setValues("iCode", rows, _np.repeat(iCodes, sizes))
 
     def purgeAtoms(self, atoms, mode):
-        for residue in self:
-            residue.purgeAtoms(atoms, mode)
+        _Residue.purgeAtoms(self, atoms, mode)
         self.purgeEmpty()
 
     def purgeEmpty(self):
         """Removes empty elements."""
-        empty_residues = [res for res in self if not len(res)]
-        for empty_residue in empty_residues:
-            self.remove(empty_residue)
+        start, stop = self._childRange()
+        level = self._childClass._level
+        sizes = _np.diff(self._table.offsets(level)[start:stop + 1])
+        self._table.delete(level, start + _np.flatnonzero(sizes == 0))
 
     def purgeResidues(self, residues, mode):
         """
@@ -123,9 +141,32 @@ class Chain(_Residue, _CondList.ConditionalList):
             One of "keep" and "discard" - either keeps only the selection or discards the latter.
         """
         assert mode in ["keep", "discard"]
-        residues_to_remove = residues if mode == "discard" else [x for x in self if x not in residues]
-        for residue in residues_to_remove:
-            self.remove(residue)
+        start, stop = self._childRange()
+        self._table.delete("residue", start + _np.flatnonzero(self._residueMask(residues, mode, start, stop)))
+
+    def _residueMask(self, residues, mode, start, stop):
+        """numpy.ndarray: Returns a mask over the residues between start and stop which is True for the residues to be
+        removed. Residues are matched by their identifiers and in "discard" mode every element of residues removes at
+        most one matching residue per chain."""
+        properties = _Residue._common_properties
+        columns = [self._table.levelColumn("residue", name)[start:stop].tolist() for name in properties]
+        identifiers = list(zip(*columns))
+        selected = _collections.Counter(tuple(getattr(x, name) for name in properties) for x in residues)
+        if mode == "keep":
+            return _np.array([x not in selected for x in identifiers], dtype=bool).reshape(-1)
+
+        mask = _np.zeros(len(identifiers), dtype=bool)
+        removed = _collections.Counter()
+        for i, (parent, identifier) in enumerate(zip(self._table.parents("residue")[start:stop].tolist(),
+                                                     identifiers)):
+            if removed[parent, identifier] < selected.get(identifier, 0):
+                removed[parent, identifier] += 1
+                mask[i] = True
+        return mask
+
+    def _checkChild(self, child):
+        """Checks whether a child can be added to the current object."""
+        self._checkResidue(child)
 
     def _checkResidue(self, residue):
         """Checks whether the residue has the same chainID as the current object."""
@@ -0,0 +1,122 @@
+import numpy as _np
+
+_DIGITS_UPPER = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+_DIGITS_LOWER = "0123456789abcdefghijklmnopqrstuvwxyz"
+# the value of every ASCII character as an upper-case and as a lower-case base-36 digit or -1 for invalid characters,
+# since the digits of a hybrid-36 number cannot mix both cases
+_DIGIT_VALUES = _np.full((2, 256), -1, dtype=_np.int64)
+for _i, (_upper, _lower) in enumerate(zip(_DIGITS_UPPER, _DIGITS_LOWER)):
+    _DIGIT_VALUES[0, ord(_upper)] = _DIGIT_VALUES[1, ord(_lower)] = _i
+# hybrid-36 numbers are only used in fields which are at least this wide
+_MIN_WIDTH = 4
+
+
+def encodeHybrid36(value, width):
+    """
+    Encodes an integer in the hybrid-36 format used by PDB files with more than 99999 atoms or 9999 residues. Numbers
+    which fit into the field are written as right-aligned decimals, followed by upper-case base-36 numbers starting
+    with "A" and lower-case base-36 numbers starting with "a".
+
+    Parameters
+    ----------
+    value : int
+        The number to be encoded.
+    width : int
+        The width of the field, e.g. 5 for atom serial numbers and 4 for residue sequence numbers.
+
+    Returns
+    -------
+    string : str
+        The encoded number with exactly width characters.
+    """
+    value = int(value)
+    if -10 ** (width - 1) < value < 10 ** width:
+        return "{:{}d}".format(value, width)
+    block = 26 * 36 ** (width - 1)
+    shifted = value - 10 ** width
+    for digits in [_DIGITS_UPPER, _DIGITS_LOWER]:
+        if 0 <= shifted < block:
+            # the offset makes the first digit a letter
+            shifted += 10 * 36 ** (width - 1)
+            string = ""
+            for _ in range(width):
+                shifted, digit = divmod(shifted, 36)
+                string = digits[digit] + string
+            return string
+        shifted -= block
+    raise ValueError("Cannot encode {} in {} hybrid-36 characters".format(value, width))
+
+
+def decodeHybrid36(value):
+    """
+    Decodes a number which may be in the hybrid-36 format. The width of hybrid-36 numbers is inferred from the length
+    of the string, since they always fill their field. Hybrid-36 numbers with mixed-case digits or with less than 4
+    characters are invalid.
+
+    Parameters
+    ----------
+    value : str or int or float
+        The number to be decoded. Values which are not hybrid-36 strings are converted using int(float(value)).
+
+    Returns
+    -------
+    number : int
+        The decoded number.
+    """
+    if not isinstance(value, str):
+        return int(float(value))
+    value = value.strip()
+    if not value[:1].isalpha():
+        return int(float(value))
+    width = len(value)
+    digits = _DIGITS_LOWER if value[0].islower() else _DIGITS_UPPER
+    if width < _MIN_WIDTH or not all(x in digits for x in value):
+        raise ValueError("Invalid hybrid-36 number: {}".format(value))
+    number = int(value, 36) - 10 * 36 ** (width - 1) + 10 ** width
+    return number + 26 * 36 ** (width - 1) if value[0].islower() else number
+
+
+def _encodeHybrid36Array(values, width):
+    """
+    Encodes numbers which do not fit into a decimal field in the hybrid-36 format into a character matrix. Returns the
+    matrix and a mask of all values which cannot be encoded.
+    """
+    values = _np.asarray(values, dtype=_np.int64).reshape(-1)
+    block = 26 * 36 ** (width - 1)
+    shifted = values - 10 ** width
+    lower = shifted >= block
+    invalid = (shifted < 0) | (shifted >= 2 * block)
+    shifted = _np.where(invalid, 0, shifted - lower * block + 10 * 36 ** (width - 1))
+    alphabets = _np.frombuffer((_DIGITS_UPPER + _DIGITS_LOWER).encode("ascii"), dtype=_np.uint8)
+    chars = _np.zeros((len(values), width), dtype=_np.uint8)
+    for column in range(width - 1, -1, -1):
+        shifted, digit = _np.divmod(shifted, 36)
+        chars[:, column] = alphabets[digit + 36 * lower]
+    chars[invalid] = ord(" ")
+    return chars, invalid
+
+
+def _decodeHybrid36Array(fields):
+    """
+    numpy.ndarray: Decodes an array of fixed-width byte strings, as read from a PDB file, which contain decimal or
+    hybrid-36 numbers.
+    """
+    fields = _np.asarray(fields)
+    width = fields.dtype.itemsize
+    values = _np.zeros(len(fields), dtype=_np.int64)
+    if not len(fields):
+        return values
+    chars = _np.ascontiguousarray(fields).view(_np.uint8).reshape(len(fields), width)
+    first = chars[:, 0]
+    upper, lower = (first >= ord("A")) & (first <= ord("Z")), (first >= ord("a")) & (first <= ord("z"))
+    hybrid = upper | lower
+    if not hybrid.all():
+        values[~hybrid] = _np.char.strip(fields[~hybrid]).astype(_np.float64).astype(_np.int64)
+    if hybrid.any():
+        digits = _DIGIT_VALUES[lower[hybrid].astype(_np.int64)[:, None], chars[hybrid]]
+        if width < _MIN_WIDTH or (digits < 0).any():
+            raise ValueError("Invalid hybrid-36 numbers in fields: {}".format(
+                fields[hybrid][(digits < 0).any(axis=1) | (width < _MIN_WIDTH)][:5].tolist()))
+        numbers = digits @ (36 ** _np.arange(width - 1, -1, -1, dtype=_np.int64))
+        values[hybrid] = numbers - 10 * 36 ** (width - 1) + 10 ** width + lower[hybrid] * 26 * 36 ** (width - 1)
+    return values
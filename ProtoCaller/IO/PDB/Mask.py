@@ -0,0 +1,236 @@
+import ast as _ast
+import functools as _functools
+import operator as _operator
+import re as _re
+
+import numpy as _np
+
+from .Categorical import Categorical as _Categorical
+
+
+class Mask:
+    """
+    A selection mask which has been parsed once into a tree of conditions and which can then be evaluated on whole
+    arrays of values. A mask consists of conditions of the type "attribute operator literal", e.g. "chainID=='A'" or
+    "type in ['amino_acid', 'amino_acid_modified']", which can be combined using "&", "|" and parentheses. Distance
+    based conditions are written as "within(distance, of=mask)", e.g. "within(6, of=\"resName=='LIG'\")" selects all
+    elements with any atom within 6 Angstroms of the atoms selected by the inner mask.
+
+    Parameters
+    ----------
+    string : str
+        The mask to be compiled.
+
+    Attributes
+    ----------
+    string : str
+        The original mask.
+    """
+    _operators = {
+        _ast.Eq: _operator.eq,
+        _ast.NotEq: _operator.ne,
+        _ast.Lt: _operator.lt,
+        _ast.LtE: _operator.le,
+        _ast.Gt: _operator.gt,
+        _ast.GtE: _operator.ge,
+        _ast.In: None,
+        _ast.NotIn: None,
+    }
+
+    def __init__(self, string):
+        self.string = string
+        self._pos = 0
+        self._tree = self._parseExpression()
+        if self._pos != len(self.string):
+            raise ValueError("Unexpected character '{}' in mask: {}".format(self.string[self._pos], self.string))
+        del self._pos
+
+    def __repr__(self):
+        return "<Mask {}>".format(self.string)
+
+    @property
+    def attributes(self):
+        """[str]: Returns all attributes needed to evaluate the mask."""
+        attributes = []
+
+        def collect(node):
+            if node[0] == "condition":
+                if node[1] not in attributes:
+                    attributes.append(node[1])
+            elif node[0] != "within":
+                for child in node[1]:
+                    collect(child)
+
+        collect(self._tree)
+        return attributes
+
+    def evaluate(self, values, size, within=None):
+        """
+        Evaluates the mask.
+
+        Parameters
+        ----------
+        values : callable
+            A function which takes an attribute name and returns the values of this attribute for all elements as a
+            NumPy array or as a ProtoCaller.IO.PDB.Categorical.Categorical.
+        size : int
+            The number of elements.
+        within : callable, optional
+            A function which takes a distance and a ProtoCaller.IO.PDB.Mask.Mask and returns a boolean array which is
+            True for all elements within this distance of the atoms selected by the mask. Required for masks with
+            distance based conditions.
+
+        Returns
+        -------
+        mask : numpy.ndarray
+            A boolean array which is True for all elements which satisfy the mask.
+        """
+        cache = {}
+
+        def evaluate(node):
+            if node[0] == "condition":
+                _, attribute, operator, literal = node
+                if attribute not in cache:
+                    cache[attribute] = values(attribute)
+                    if not isinstance(cache[attribute], _Categorical):
+                        cache[attribute] = _np.asarray(cache[attribute])
+                return _compare(operator, cache[attribute], literal, size)
+            if node[0] == "within":
+                if within is None:
+                    raise ValueError("Distance based conditions are not supported here: {}".format(self.string))
+                return _np.asarray(within(node[1], node[2]), dtype=bool).reshape(size)
+            results = [evaluate(child) for child in node[1]]
+            reduce = _np.logical_and if node[0] == "and" else _np.logical_or
+            return _functools.reduce(reduce, results)
+
+        return evaluate(self._tree)
+
+    def _parseExpression(self):
+        nodes = [self._parseTerm()]
+        while self._peek() == "|":
+            self._pos += 1
+            nodes += [self._parseTerm()]
+        return nodes[0] if len(nodes) == 1 else ("or", nodes)
+
+    def _parseTerm(self):
+        nodes = [self._parseFactor()]
+        while self._peek() == "&":
+            self._pos += 1
+            nodes += [self._parseFactor()]
+        return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+    def _parseFactor(self):
+        if self._peek() == "(":
+            self._pos += 1
+            node = self._parseExpression()
+            if self._peek() != ")":
+                raise ValueError("Unbalanced parentheses in mask: {}".format(self.string))
+            self._pos += 1
+            return node
+        return self._parseCondition()
+
+    def _parseCondition(self):
+        # read until the next top-level operator while skipping over quotes and brackets
+        start, depth, quote = self._pos, 0, None
+        while self._pos < len(self.string):
+            char = self.string[self._pos]
+            if quote is not None:
+                if char == quote:
+                    quote = None
+            elif char in "'\"":
+                quote = char
+            elif char in "([{":
+                depth += 1
+            elif char in ")]}":
+                if not depth:
+                    break
+                depth -= 1
+            elif char in "&|" and not depth:
+                break
+            self._pos += 1
+        condition = self.string[start:self._pos].strip()
+        if _re.match(r"within\s*\(", condition):
+            return self._parseWithin(condition)
+
+        try:
+            node = _ast.parse("elem." + condition, mode="eval").body
+            assert isinstance(node, _ast.Compare) and len(node.ops) == 1
+            assert isinstance(node.left, _ast.Attribute) and isinstance(node.left.value, _ast.Name)
+            operator = type(node.ops[0])
+            assert operator in self._operators
+            literal = _ast.literal_eval(node.comparators[0])
+        except (AssertionError, SyntaxError, ValueError):
+            raise ValueError("Invalid condition '{}' in mask: {}. Conditions need to be of the form "
+                             "'attribute operator value'".format(condition, self.string))
+        return "condition", node.left.attr, operator, literal
+
+    def _parseWithin(self, condition):
+        try:
+            node = _ast.parse(condition, mode="eval").body
+            assert isinstance(node, _ast.Call) and isinstance(node.func, _ast.Name)
+            arguments = dict(zip(["distance", "of"], [_ast.literal_eval(x) for x in node.args]))
+            for keyword in node.keywords:
+                assert keyword.arg in ["distance", "of"] and keyword.arg not in arguments
+                arguments[keyword.arg] = _ast.literal_eval(keyword.value)
+            distance, of = float(arguments["distance"]), arguments["of"]
+            assert distance >= 0 and isinstance(of, str) and len(arguments) == 2
+        except (AssertionError, KeyError, SyntaxError, TypeError, ValueError):
+            raise ValueError("Invalid condition '{}' in mask: {}. Distance based conditions need to be of the form "
+                             "'within(distance, of=mask)'".format(condition, self.string))
+        return "within", distance, compileMask(of)
+
+    def _peek(self):
+        while self._pos < len(self.string) and self.string[self._pos].isspace():
+            self._pos += 1
+        return self.string[self._pos] if self._pos < len(self.string) else None
+
+
+@_functools.lru_cache(maxsize=1024)
+def compileMask(mask):
+    """
+    Compiles a mask string into a ProtoCaller.IO.PDB.Mask.Mask. The compiled masks are cached by string.
+
+    Parameters
+    ----------
+    mask : str
+        The mask to be compiled.
+
+    Returns
+    -------
+    mask : ProtoCaller.IO.PDB.Mask.Mask
+        The compiled mask.
+    """
+    return Mask(mask)
+
+
+def _compare(operator, values, literal, size):
+    """numpy.ndarray: Applies a comparison to all values, falling back to Python semantics for mixed types."""
+    if isinstance(values, _Categorical):
+        # the comparison is only applied once per category and, if needed, once for missing values (code -1)
+        categories = values.categories.astype(object)
+        if len(values.codes) and values.codes.min() < 0:
+            categories = _np.append(categories, None)
+        return _compare(operator, categories, literal, len(categories))[values.codes]
+    if operator in [_ast.In, _ast.NotIn]:
+        result = _isin(values, literal)
+        return ~result if operator is _ast.NotIn else result
+    function = Mask._operators[operator]
+    if values.dtype != object:
+        try:
+            result = function(values, literal)
+            if isinstance(result, _np.ndarray) and result.shape == (size,):
+                return result
+        except TypeError:
+            pass
+    return _np.array([function(value, literal) for value in values.tolist()], dtype=bool).reshape(size)
+
+
+def _isin(values, container):
+    """numpy.ndarray: A vectorised version of "value in container"."""
+    if isinstance(container, str) or values.dtype == object:
+        return _np.array([value in container for value in values.tolist()], dtype=bool).reshape(len(values))
+    container = _np.asarray(list(container))
+    compatible = {"U", "S"} if values.dtype.kind in "US" else {"b", "i", "u", "f"}
+    if len(container) and container.dtype.kind in compatible:
+        return _np.isin(values, container)
+    return _np.array([value in container.tolist() for value in values.tolist()], dtype=bool).reshape(len(values))
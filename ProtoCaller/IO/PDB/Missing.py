@@ -1,6 +1,12 @@
+import itertools as _itertools
+
 import ProtoCaller as _PC
 
 from . import _Helper_Mixin
+from .Hybrid36 import encodeHybrid36 as _encodeHybrid36, decodeHybrid36 as _decodeHybrid36
+
+# an increasing stamp for every modification of a missing residue or of a list of missing residues
+_modifications = _itertools.count(1)
 
 
 class MissingResidue(_Helper_Mixin.HelperMixin):
@@ -29,6 +35,9 @@ class MissingResidue(_Helper_Mixin.HelperMixin):
     iCode : str
         Code for insertion of residues.
     """
+    # the stamp of the latest modification of any missing residue
+    _last_modification = 0
+
     def __init__(self, resName, chainID, resSeq, iCode=" "):
         self.resName = resName
         self.chainID = chainID
@@ -40,9 +49,8 @@ class MissingResidue(_Helper_Mixin.HelperMixin):
             raise TypeError("Argument needs to be of type Residue")
         else:
             try:
-                str1 = "{:1.1}{:5d}{:1.1}".format(self.chainID, self.resSeq, self.iCode)
-                str2 = "{:1.1}{:5d}{:1.1}".format(other.chainID, other.resSeq, other.iCode)
-                return True if str1 < str2 else False
+                # mmCIF chain identifiers can contain several characters, so the whole identifier is compared
+                return (self.chainID, self.resSeq, self.iCode) < (other.chainID, other.resSeq, other.iCode)
             except TypeError:
                 raise TypeError("Cannot compare an empty residue")
 
@@ -63,11 +71,11 @@ class MissingResidue(_Helper_Mixin.HelperMixin):
 
         # checks
         if key == "chainID":
-            if not isinstance(value, str) or len(value) != 1:
-                raise ValueError("ChainID must be a single character")
-            value = value.upper()
+            # mmCIF files can contain case-sensitive chain identifiers with up to 4 characters
+            if not isinstance(value, str) or not 1 <= len(value) <= 4:
+                raise ValueError("ChainID must be between 1 and 4 characters")
         elif key == "resSeq":
-            value = int(float(value))
+            value = _decodeHybrid36(value)
         elif key == "iCode":
             if not isinstance(value, str) or len(value) > 1:
                 raise ValueError("iCode must be a single character")
@@ -77,10 +85,11 @@ class MissingResidue(_Helper_Mixin.HelperMixin):
 
         # setter
         super(MissingResidue, self).__setattr__("_" + key, value)
+        MissingResidue._last_modification = next(_modifications)
 
     def __str__(self):
-        string = "REMARK 465     {:3.3} {:1.1} {:5d}{:1.1}\n".format(
-            self.resName, self.chainID, self.resSeq, self.iCode)
+        string = "REMARK 465     {:3.3} {:1.1} {:>5.5}{:1.1}\n".format(
+            self.resName, self.chainID, _encodeHybrid36(self.resSeq, 5), self.iCode)
         return string
 
     @property
@@ -118,8 +127,34 @@ class MissingAtoms(MissingResidue, list):
         list.__init__(self, atoms)
 
     def __str__(self):
-        string = "REMARK 470     {:3.3} {:1.1}{:4d}{:1.1}    ".format(
-            self.resName, self.chainID, self.resSeq, self.iCode)
+        string = "REMARK 470     {:3.3} {:1.1}{:>4.4}{:1.1}    ".format(
+            self.resName, self.chainID, _encodeHybrid36(self.resSeq, 4), self.iCode)
         for atom in self:
             string += "{:<5.5}".format(atom)
         return string + "\n"
+
+
+class _MissingResidueList(list):
+    """A list of missing residues which records the stamp of its latest modification, so that quantities derived
+    from it can be cached."""
+    def __init__(self, *args):
+        list.__init__(self, *args)
+        self.modification = next(_modifications)
+
+
+def _modifying(name):
+    """Wraps a list method so that it records a new modification stamp."""
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self.modification = next(_modifications)
+        return result
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+for _name in ["__setitem__", "__delitem__", "__iadd__", "__imul__", "append", "extend", "insert", "remove", "pop",
+              "clear", "sort", "reverse"]:
+    setattr(_MissingResidueList, _name, _modifying(_name))
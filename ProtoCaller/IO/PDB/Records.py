@@ -0,0 +1,244 @@
+import contextlib as _contextlib
+import re as _re
+
+from Bio.Data.IUPACData import protein_letters_3to1 as _3_to_1
+
+import ProtoCaller as _PC
+import ProtoCaller.Utils.fileio as _fileio
+from .Hybrid36 import decodeHybrid36 as _decodeHybrid36
+from .Missing import MissingResidue as _MissingResidue, MissingAtoms as _MissingAtoms
+
+
+class AtomRecord:
+    """
+    A single ATOM / HETATM record. The fields are only decoded from the line when they are accessed.
+
+    Parameters
+    ----------
+    line : str
+        Initialises line.
+    segment : int
+        Initialises segment.
+    model : int
+        Initialises model.
+
+    Attributes
+    ----------
+    line : str
+        The original line.
+    segment : int
+        The number of TER / END records preceding the atom.
+    model : int
+        The index of the MODEL record containing the atom, starting from 0. Files without MODEL records only have
+        model 0.
+    type, serial, name, altLoc, resName, chainID, resSeq, iCode, x, y, z, occupancy, tempFactor, element, charge
+        The atom properties, as in ProtoCaller.IO.PDB.Atom.Atom.
+    """
+    __slots__ = ["line", "segment", "model"]
+    # the columns and converters of all fields
+    _fields = {
+        "type": (0, 6, lambda x: x.upper()),
+        "serial": (6, 11, _decodeHybrid36),
+        "name": (12, 16, str),
+        "altLoc": (16, 17, str),
+        "resName": (17, 20, str),
+        "chainID": (21, 22, lambda x: x or " "),
+        "resSeq": (22, 26, _decodeHybrid36),
+        "iCode": (26, 27, lambda x: x.upper() or " "),
+        "x": (30, 38, float),
+        "y": (38, 46, float),
+        "z": (46, 54, float),
+        "occupancy": (54, 60, str),
+        "tempFactor": (60, 66, str),
+        "element": (76, 78, str),
+        "charge": (78, 80, str),
+    }
+
+    def __init__(self, line, segment=0, model=0):
+        self.line = line
+        self.segment = segment
+        self.model = model
+
+    def __getattr__(self, item):
+        try:
+            start, stop, converter = AtomRecord._fields[item]
+        except KeyError:
+            raise AttributeError("Invalid attribute: {}".format(item))
+        return converter(self.line[start:stop].strip())
+
+    def __repr__(self):
+        return "<AtomRecord {}>".format(self.line.rstrip())
+
+
+class TerRecord:
+    """
+    A TER or END record, which terminates a segment.
+
+    Parameters
+    ----------
+    line : str
+        Initialises line.
+
+    Attributes
+    ----------
+    line : str
+        The original line.
+    """
+    __slots__ = ["line"]
+
+    def __init__(self, line):
+        self.line = line
+
+    def __repr__(self):
+        return "<TerRecord {}>".format(self.line.rstrip())
+
+
+class HeaderRecord:
+    """
+    Any other record, e.g. SSBOND, SITE or MODRES.
+
+    Parameters
+    ----------
+    line : str
+        Initialises line.
+
+    Attributes
+    ----------
+    line : str
+        The original line.
+    record : str
+        The record name, e.g. "SSBOND".
+    """
+    __slots__ = ["line"]
+
+    def __init__(self, line):
+        self.line = line
+
+    def __repr__(self):
+        return "<HeaderRecord {}>".format(self.line.rstrip())
+
+    @property
+    def record(self):
+        """str: Returns the record name."""
+        return self.line[:6].strip()
+
+
+def iterRecords(input):
+    """
+    Lazily reads a PDB file record by record without keeping the file in memory.
+
+    Parameters
+    ----------
+    input : str or file
+        Name of the input PDB file or an open file handle. Files compressed with gzip, bzip2 or xz are decompressed on
+        the fly.
+
+    Returns
+    -------
+    records : generator
+        Yields a ProtoCaller.IO.PDB.Records.AtomRecord for every ATOM / HETATM record, a
+        ProtoCaller.IO.PDB.Missing.MissingResidue for every REMARK 465 record, a
+        ProtoCaller.IO.PDB.Missing.MissingAtoms for every REMARK 470 record, a ProtoCaller.IO.PDB.Records.TerRecord
+        for every TER / END record and a ProtoCaller.IO.PDB.Records.HeaderRecord for everything else.
+    """
+    segment, model = 0, None
+    with _openFile(input) as file:
+        for line in file:
+            if isinstance(line, bytes):
+                line = line.decode()
+            line = line.rstrip("\r\n")
+            if line[:4] == "ATOM" or line[:6] == "HETATM":
+                yield AtomRecord(line, segment, model or 0)
+            elif line[:3] in ["TER", "END"]:
+                segment += 1
+                yield TerRecord(line)
+            elif line[:10] == "REMARK 465" and _re.match(_remark465, line):
+                yield _MissingResidue(*_re.findall(_remark465, line)[0])
+            elif line[:10] == "REMARK 470" and _re.match(_remark470, line):
+                args = _re.findall(_remark470, line)[0]
+                yield _MissingAtoms(*args, atoms=line[21:].split())
+            else:
+                if line[:6] == "MODEL ":
+                    model = 0 if model is None else model + 1
+                yield HeaderRecord(line)
+
+
+def iterResidues(input):
+    """
+    Lazily reads a PDB file residue by residue. Residues are split in the same way as in
+    ProtoCaller.IO.PDB.PDB.
+
+    Parameters
+    ----------
+    input : str or file
+        Name of the input PDB file or an open file handle.
+
+    Returns
+    -------
+    residues : generator
+        Yields a list of ProtoCaller.IO.PDB.Records.AtomRecord for every residue.
+    """
+    residue, identifier = [], None
+    for record in iterRecords(input):
+        if not isinstance(record, AtomRecord):
+            continue
+        current = (record.segment, record.chainID, record.resName, record.resSeq, record.iCode)
+        if current != identifier and residue:
+            yield residue
+            residue = []
+        residue += [record]
+        identifier = current
+    if residue:
+        yield residue
+
+
+def readSequence(input):
+    """
+    Reads the single-character sequence of all missing and non-missing amino acids in a PDB file without creating a
+    ProtoCaller.IO.PDB.PDB object. This is equivalent to ProtoCaller.IO.PDB.PDB.sequence. Only the first model is
+    taken into account.
+
+    Parameters
+    ----------
+    input : str or file
+        Name of the input PDB file or an open file handle.
+
+    Returns
+    -------
+    sequence : str
+        The sequences of all chains separated by "/".
+    """
+    residues = []
+    identifier = None
+    for record in iterRecords(input):
+        if isinstance(record, _MissingAtoms):
+            continue
+        elif isinstance(record, _MissingResidue):
+            residues += [(record.chainID, record.resSeq, record.iCode, "-")]
+        elif isinstance(record, AtomRecord) and not record.model:
+            current = (record.segment, record.chainID, record.resName, record.resSeq, record.iCode)
+            if current != identifier and _PC.RESIDUETYPE(record.resName) in ["amino_acid", "amino_acid_modified"]:
+                residues += [(record.chainID, record.resSeq, record.iCode,
+                              _3_to_1.get(record.resName.capitalize(), "-"))]
+            identifier = current
+    residues.sort(key=lambda x: x[:3])
+
+    sequence = {}
+    for chainID, _, _, code in residues:
+        sequence.setdefault(chainID, []).append(code)
+    return "/".join(["".join(sequence[k]) for k in sorted(sequence.keys())])
+
+
+# residue numbers can also be written in the hybrid-36 format
+_remark465 = r"^REMARK 465\s*([\w]{3})\s*([\w])\s*([-]?[\d]+|[A-Za-z][\dA-Za-z]{4})([\D|\S]?)\s*$"
+_remark470 = r"^REMARK 470\s*([\w]{3})\s*([\w])\s*([\d]+|[A-Za-z][\dA-Za-z]{3})([\D|\S]?)\s*"
+
+
+@_contextlib.contextmanager
+def _openFile(input):
+    """Opens a plain or compressed file name or passes through an open file handle."""
+    if not isinstance(input, str):
+        yield input
+    else:
+        with _fileio.openFile(input) as file:
+            yield file
@@ -1,12 +1,15 @@
 from Bio.Data.IUPACData import protein_letters_3to1 as _3_to_1
+import numpy as _np
 
-import ProtoCaller.Utils.ConditionalList as _CondList
+from .Atom import Atom as _Atom
+from .AtomTable import AtomTable as _AtomTable
 from . import Missing as _Missing
 
 
-class Residue(_Missing.MissingResidue, _CondList.ConditionalList):
+class Residue(_Missing.MissingResidue):
     """
-    Represents a single residue in a PDB file.
+    Represents a single residue in a PDB file. The residue is a view into a range of rows of a
+    ProtoCaller.IO.PDB.AtomTable.AtomTable and behaves like a list of atoms.
 
     Parameters
     ----------
@@ -27,38 +30,114 @@ class Residue(_Missing.MissingResidue, _CondList.ConditionalList):
     # properties which have to be conserved within the whole residue
     _common_properties = ["chainID", "resName", "resSeq", "iCode"]
 
+    _level = "residue"
+    _childClass = _Atom
+
     def __init__(self, atoms=None):
-        if atoms is None:
-            atoms = []
-        _CondList.ConditionalList.__init__(self, atoms, self._checkAtom)
+        if "_table" in self.__dict__:
+            self.clear()
+        else:
+            self._bind(_AtomTable(residue_sizes=[0], chain_sizes=[1], detached=True), 0)
+        if atoms is not None:
+            self.extend(atoms)
 
     def __getattr__(self, item):
         if item in self._common_properties:
-            if not len(self):
+            start, stop = self._rowRange()
+            if start == stop:
                 return None
-            return getattr(self[0], item)
+            return self._table.value(item, start)
         else:
             raise AttributeError("Invalid attribute: {}. Needs to be one of: {}".format(item, self._common_properties))
 
     def __setattr__(self, key, value):
         if key in self._common_properties:
-            for atom in self:
-                setattr(atom, key, value)
-            _Missing.MissingResidue.__setattr__(self, key, value)
+            value = _Atom._validate(key, value)
+            self._table.setValues(key, slice(*self._rowRange()), value)
         else:
-            _CondList.ConditionalList.__setattr__(self, key, value)
+            object.__setattr__(self, key, value)
 
     def __str__(self):
-        return "".join([atom.__str__() for atom in self])
+        return "".join([child.__str__() for child in self])
 
     def __repr__(self):
         return "<Residue of {} atoms>".format(len(self))
 
+    def __len__(self):
+        start, stop = self._childRange()
+        return stop - start
+
+    def __iter__(self):
+        start, stop = self._childRange()
+        return iter([self._child(i) for i in range(start, stop)])
+
+    def __getitem__(self, item):
+        start, stop = self._childRange()
+        if isinstance(item, slice):
+            return [self._child(start + i) for i in range(*item.indices(stop - start))]
+        if item < 0:
+            item += stop - start
+        if not 0 <= item < stop - start:
+            raise IndexError("{} index out of range".format(type(self).__name__))
+        return self._child(start + item)
+
+    def __delitem__(self, item):
+        start, stop = self._childRange()
+        if isinstance(item, slice):
+            positions = [start + i for i in range(*item.indices(stop - start))]
+        else:
+            if item < 0:
+                item += stop - start
+            if not 0 <= item < stop - start:
+                raise IndexError("{} index out of range".format(type(self).__name__))
+            positions = [start + item]
+        self._table.delete(self._childClass._level, positions)
+
+    def __contains__(self, item):
+        return any(child is item or child == item for child in self)
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+    def append(self, item):
+        """Appends an element at the end."""
+        self._insert(len(self), [item])
+
+    def extend(self, items):
+        """Appends several elements at the end."""
+        self._insert(len(self), items)
+
+    def insert(self, index, item):
+        """Inserts an element before index."""
+        self._insert(index, [item])
+
+    def remove(self, item):
+        """Removes the first occurrence of an element."""
+        del self[self.index(item)]
+
+    def clear(self):
+        """Removes all elements."""
+        del self[:]
+
+    def index(self, item):
+        """int: Returns the index of the first occurrence of an element."""
+        for i, child in enumerate(self):
+            if child is item or child == item:
+                return i
+        raise ValueError("{} is not in {}".format(item, type(self).__name__))
+
     @property
     def numberOfAtoms(self):
         """int: Returns the number of atoms."""
         return len(self)
 
+    @property
+    def type(self):
+        """str: Returns the type of the residue, determined by ProtoCaller.RESIDUETYPE. The types of all residues are
+        determined at once and cached in the atom table."""
+        return self._table.residueTypes()[self._position()]
+
     @property
     def sequence(self):
         """str: Returns the single-character code of the amino acid residue."""
@@ -80,14 +159,12 @@ class Residue(_Missing.MissingResidue, _CondList.ConditionalList):
             A list of custom indices. If None, atoms are renumbered sequentially.
         """
         if custom_serials is None:
-            serials = [start + i for i in range(start, start + len(self))]
+            serials = _np.arange(start, start + len(self))
         elif len(custom_serials) == len(self):
-            serials = custom_serials
+            serials = _Atom._validateMany("serial", custom_serials)
         else:
             raise ValueError("Custom number list does not match number of atoms")
-
-        for i, atom in zip(serials, self):
-            atom.serial = i
+        self._table.setValues("serial", slice(*self._rowRange()), serials)
 
     def purgeAtoms(self, atoms, mode):
         """
@@ -101,9 +178,85 @@ class Residue(_Missing.MissingResidue, _CondList.ConditionalList):
             One of "keep" and "discard" - either keeps only the selection or discards the latter.
         """
         assert mode in ["keep", "discard"]
-        atoms_to_remove = atoms if mode == "discard" else [x for x in self if x not in atoms]
-        for atom in atoms_to_remove:
-            self.remove(atom)
+        start, stop = self._rowRange()
+        remove = self._atomMask(atoms, start, stop)
+        if mode == "keep":
+            remove = ~remove
+        self._table.delete("atom", start + _np.flatnonzero(remove))
+
+    def _atomMask(self, atoms, start, stop):
+        """numpy.ndarray: Returns a mask over the atom rows between start and stop which is True for the given atoms.
+        Atoms are matched by identity and atoms outside of this range are ignored."""
+        mask = _np.zeros(stop - start, dtype=bool)
+        for atom in atoms:
+            if isinstance(atom, _Atom) and atom._tableref is self._table:
+                row = self._table.position("atom", atom._key)
+                if row is not None and start <= row < stop:
+                    mask[row - start] = True
+        return mask
+
+    def _bind(self, table, key):
+        """Binds the object to the element with a given key in a table."""
+        object.__setattr__(self, "_table", table)
+        object.__setattr__(self, "_key", key)
+        table._views[self._level][key] = self
+
+    def _position(self):
+        """int: Returns the current position of the element in the table."""
+        position = self._table.position(self._level, self._key)
+        if position is None:
+            raise ValueError("{} no longer exists".format(type(self).__name__))
+        return position
+
+    def _childRange(self):
+        """(int, int): Returns the range of positions of all children in the table."""
+        return self._table.childRange(self._level, self._position())
+
+    def _rowRange(self):
+        """(int, int): Returns the range of atom rows in the table."""
+        return self._table.rowRange(self._level, self._position())
+
+    def _child(self, position):
+        """Returns a view of the child at a given position in the table."""
+        level = self._childClass._level
+        row = position if level == "atom" else None
+        return self._table.view(self._childClass, self._table.keys(level)[position].item(), row=row)
+
+    def _checkChild(self, child):
+        """Checks whether a child can be added to the current object."""
+        self._checkAtom(child)
+
+    def _insert(self, index, items):
+        """Inserts copies of several elements before index. Elements from detached tables are moved instead."""
+        items = [items] if self._isChild(items) else list(items)
+        if len(self):
+            for item in items:
+                self._checkChild(item)
+        if index < 0:
+            index = max(0, index + len(self))
+        level = self._childClass._level
+        i = 0
+        while i < len(items):
+            if not self._isChild(items[i]):
+                raise TypeError("Need to pass a valid object of type {}".format(self._childClass.__name__))
+            table, j = items[i]._table, i + 1
+            while j < len(items) and self._isChild(items[j]) and items[j]._table is table:
+                j += 1
+            positions = [item._position() for item in items[i:j]]
+            if table.detached:
+                table.move(level, positions, self._table, self._level, self._parentPosition(), index)
+            else:
+                self._table.insert(self._level, self._parentPosition(), index, table.extract(level, positions))
+            index += j - i
+            i = j
+
+    def _isChild(self, item):
+        """bool: Returns whether an object can be a child of the current object."""
+        return isinstance(item, self._childClass) and item._level == self._childClass._level
+
+    def _parentPosition(self):
+        """int or None: Returns the position of the object when it acts as a parent of new elements."""
+        return self._position()
 
     def _checkAtom(self, atom):
         """Checks whether the atom has the same chainID, resName, resSeq and iCode as the current object."""
@@ -0,0 +1,216 @@
+import numpy as _np
+
+from .Atom import Atom as _Atom
+from .AtomTable import _expandRanges
+from .Chain import Chain as _Chain
+from .Residue import Residue as _Residue
+
+
+class Selection:
+    """
+    A selection of chains, residues or atoms of a ProtoCaller.IO.PDB.PDB object. The selection only stores the keys of
+    the selected elements in the atom table and creates the views on demand. Selections of the same level can be
+    combined using "|" (union), "&" (intersection) and "-" (difference) and iterating over a selection yields the
+    elements in the order in which they appear in the structure. Elements which are removed from the structure are
+    removed from the selection as well.
+
+    Parameters
+    ----------
+    pdb : ProtoCaller.IO.PDB.PDB
+        Initialises pdb.
+    level : str
+        Initialises level.
+    positions : numpy.ndarray
+        The current positions of the selected elements in the atom table.
+
+    Attributes
+    ----------
+    pdb : ProtoCaller.IO.PDB.PDB
+        The object the selection refers to.
+    level : str
+        One of "chain", "residue" and "atom".
+    """
+    _classes = {"chain": _Chain, "residue": _Residue, "atom": _Atom}
+
+    def __init__(self, pdb, level, positions):
+        if level not in self._classes:
+            raise ValueError("Level needs to be one of: {}".format(list(self._classes)))
+        self.pdb = pdb
+        self.level = level
+        self._table = pdb._table
+        self._positions = _np.unique(_np.asarray(positions, dtype=_np.int64))
+        self._keys = self._table.keys(level)[self._positions]
+        self._version = self._table._version
+
+    @classmethod
+    def fromElements(cls, pdb, elements, level=None):
+        """
+        Creates a selection from a list of elements.
+
+        Parameters
+        ----------
+        pdb : ProtoCaller.IO.PDB.PDB
+            The object the elements belong to.
+        elements : [ProtoCaller.IO.PDB.Chain.Chain or ProtoCaller.IO.PDB.Residue.Residue or \
+ProtoCaller.IO.PDB.Atom.Atom] or ProtoCaller.IO.PDB.Selection.Selection
+            The elements, which all need to be of the same type.
+        level : str or None
+            The level of the elements. Default: the level of the first element or "residue" if there are no elements.
+
+        Returns
+        -------
+        selection : ProtoCaller.IO.PDB.Selection.Selection
+            The resulting selection.
+        """
+        if isinstance(elements, Selection):
+            if elements.pdb is not pdb:
+                raise ValueError("Cannot combine selections of different PDB objects")
+            return elements if level is None else elements.toLevel(level)
+        elements = list(elements)
+        if level is None:
+            level = elements[0]._level if elements and hasattr(elements[0], "_level") else "residue"
+        positions = []
+        for element in elements:
+            if not isinstance(element, cls._classes[level]) or element._level != level or \
+                    element._table is not pdb._table:
+                raise ValueError("Selection contains an element which is not a {} of this PDB: {}".format(level,
+                                                                                                        element))
+            positions += [element._position()]
+        return cls(pdb, level, positions)
+
+    def __len__(self):
+        return len(self.positions())
+
+    def __repr__(self):
+        return "<Selection of {} {}s>".format(len(self), self.level)
+
+    def __iter__(self):
+        keys = self._table.keys(self.level)
+        return (self._view(key, position) for key, position in zip(keys[self.positions()].tolist(),
+                                                                   self.positions().tolist()))
+
+    def __getitem__(self, item):
+        positions = self.positions()
+        if isinstance(item, slice):
+            return Selection(self.pdb, self.level, positions[item])
+        position = positions[item].item()
+        return self._view(self._table.keys(self.level)[position].item(), position)
+
+    def __contains__(self, item):
+        if not isinstance(item, self._classes[self.level]) or item._level != self.level or \
+                item._table is not self._table:
+            return False
+        position, positions = self._table.position(self.level, item._key), self.positions()
+        if position is None:
+            return False
+        index = _np.searchsorted(positions, position)
+        return index < len(positions) and positions[index] == position
+
+    def __eq__(self, other):
+        if isinstance(other, Selection):
+            return self.pdb is other.pdb and self.level == other.level and \
+                   _np.array_equal(self.positions(), other.positions())
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return NotImplemented
+
+    __hash__ = None
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __or__(self, other):
+        return self.union(other)
+
+    def __and__(self, other):
+        return self.intersection(other)
+
+    def __sub__(self, other):
+        return self.difference(other)
+
+    def union(self, other):
+        """ProtoCaller.IO.PDB.Selection.Selection: Returns all elements which are in either selection."""
+        return Selection(self.pdb, self.level, _np.union1d(self.positions(), self._other(other)))
+
+    def intersection(self, other):
+        """ProtoCaller.IO.PDB.Selection.Selection: Returns all elements which are in both selections."""
+        return Selection(self.pdb, self.level, _np.intersect1d(self.positions(), self._other(other)))
+
+    def difference(self, other):
+        """ProtoCaller.IO.PDB.Selection.Selection: Returns all elements which are not in the other selection."""
+        return Selection(self.pdb, self.level, _np.setdiff1d(self.positions(), self._other(other)))
+
+    def positions(self):
+        """numpy.ndarray: Returns the current positions of the selected elements in the atom table in ascending
+        order."""
+        if self._version != self._table._version:
+            keys = self._table.keys(self.level)
+            order = _np.argsort(keys, kind="stable")
+            found = _np.searchsorted(keys[order], self._keys).clip(max=max(len(keys) - 1, 0))
+            exists = keys[order][found] == self._keys if len(keys) else _np.zeros(len(self._keys), dtype=bool)
+            self._positions = _np.sort(order[found[exists]])
+            self._keys = keys[self._positions]
+            self._version = self._table._version
+        return self._positions
+
+    def mask(self):
+        """numpy.ndarray: Returns a boolean array over all elements of the level which is True for the selected
+        elements."""
+        mask = _np.zeros(self._table.count(self.level), dtype=bool)
+        mask[self.positions()] = True
+        return mask
+
+    def toLevel(self, level):
+        """
+        Converts the selection to another level. Chains and residues are converted into everything they contain and
+        atoms and residues into the residues and chains they belong to.
+
+        Parameters
+        ----------
+        level : str
+            One of "chain", "residue" and "atom".
+
+        Returns
+        -------
+        selection : ProtoCaller.IO.PDB.Selection.Selection
+            The resulting selection.
+        """
+        levels = self._table._levels
+        current, positions = self.level, self.positions()
+        while levels.index(current) < levels.index(level):
+            offsets = self._table.offsets(current)
+            positions = _expandRanges(offsets[positions], offsets[positions + 1])
+            current = self._table._child[current]
+        while levels.index(current) > levels.index(level):
+            positions = self._table.parents(current)[positions]
+            current = self._table._parent[current]
+        return Selection(self.pdb, level, positions)
+
+    def writePDB(self, filename=None):
+        """
+        Writes the selected elements as a PDB file, as if all other residues had been purged beforehand.
+
+        Parameters
+        ----------
+        filename : str or None
+            Name of the output file. Default: the original filename of the PDB object.
+
+        Returns
+        -------
+        filename : str
+            The absolute path to the written PDB file.
+        """
+        return self.pdb.writePDB(filename, selection=self)
+
+    def _other(self, other):
+        """numpy.ndarray: Returns the positions of another selection or list of elements, converted to the current
+        level."""
+        return Selection.fromElements(self.pdb, other, self.level).positions()
+
+    def _view(self, key, position):
+        """Returns the view of the element with a given key and position."""
+        return self._table.view(self._classes[self.level], key, row=position if self.level == "atom" else None)
@@ -0,0 +1,102 @@
+import itertools as _itertools
+
+import numpy as _np
+
+
+class CellList:
+    """
+    A spatial index over a set of coordinates. Space is divided into cubic cells and the points are sorted by the
+    cell they belong to, so that all points close to a given position can be found by only looking at the neighbouring
+    cells.
+
+    Parameters
+    ----------
+    coordinates : numpy.ndarray
+        An (N, 3) array of coordinates.
+    cell_size : float
+        The length of a cell in Angstroms. Queries are fastest when this is close to the query distance.
+
+    Attributes
+    ----------
+    cell_size : float
+        The length of a cell in Angstroms.
+    """
+    # the maximum number of query points which are processed at once
+    _chunk_size = 4096
+
+    def __init__(self, coordinates, cell_size):
+        if not cell_size > 0:
+            raise ValueError("Cell size needs to be positive")
+        self.cell_size = float(cell_size)
+        self._coordinates = _np.asarray(coordinates, dtype=_np.float64).reshape(-1, 3)
+        n_points = len(self._coordinates)
+
+        self._origin = self._coordinates.min(axis=0) if n_points else _np.zeros(3)
+        cells = self._cells(self._coordinates)
+        self._shape = cells.max(axis=0) + 1 if n_points else _np.ones(3, dtype=_np.int64)
+        cell_ids = self._cellIds(cells)
+        self._order = _np.argsort(cell_ids, kind="stable")
+        self._cell_ids, starts = _np.unique(cell_ids[self._order], return_index=True)
+        self._starts = _np.append(starts, n_points).astype(_np.int64)
+
+    def __len__(self):
+        return len(self._coordinates)
+
+    def __repr__(self):
+        return "<CellList of {} points>".format(len(self))
+
+    def within(self, points, distance):
+        """
+        Finds all indexed points which are within a given distance of any of the query points.
+
+        Parameters
+        ----------
+        points : numpy.ndarray
+            An (M, 3) array of query coordinates.
+        distance : float
+            The cutoff distance in Angstroms.
+
+        Returns
+        -------
+        mask : numpy.ndarray
+            A boolean array which is True for every indexed point within the cutoff distance.
+        """
+        if distance < 0:
+            raise ValueError("Distance needs to be non-negative")
+        points = _np.asarray(points, dtype=_np.float64).reshape(-1, 3)
+        mask = _np.zeros(len(self), dtype=bool)
+        if not len(points) or not len(self):
+            return mask
+
+        n_shells = int(_np.ceil(distance / self.cell_size))
+        offsets = _np.array(list(_itertools.product(range(-n_shells, n_shells + 1), repeat=3)), dtype=_np.int64)
+        for start in range(0, len(points), self._chunk_size):
+            chunk = points[start:start + self._chunk_size]
+            # all cells which neighbour a query point and lie inside the grid
+            cells = (self._cells(chunk)[:, None, :] + offsets[None, :, :]).reshape(-1, 3)
+            owners = _np.repeat(_np.arange(len(chunk)), len(offsets))
+            inside = ((cells >= 0) & (cells < self._shape)).all(axis=1)
+            cells, owners = cells[inside], owners[inside]
+            cell_ids = self._cellIds(cells)
+            found = _np.searchsorted(self._cell_ids, cell_ids)
+            found[found == len(self._cell_ids)] = 0
+            occupied = self._cell_ids[found] == cell_ids if len(self._cell_ids) else _np.zeros(0, dtype=bool)
+            found, owners = found[occupied], owners[occupied]
+
+            # compare the query points with all points in their neighbouring cells
+            starts, stops = self._starts[found], self._starts[found + 1]
+            lengths = stops - starts
+            candidates = self._order[_np.repeat(stops - _np.cumsum(lengths), lengths) +
+                                     _np.arange(lengths.sum(), dtype=_np.int64)]
+            owners = _np.repeat(owners, lengths)
+            distances = ((self._coordinates[candidates] - chunk[owners]) ** 2).sum(axis=1)
+            mask[candidates[distances <= distance ** 2]] = True
+        return mask
+
+    def _cells(self, coordinates):
+        """numpy.ndarray: Returns the integer cell coordinates of a set of points."""
+        return _np.floor((coordinates - self._origin) / self.cell_size).astype(_np.int64)
+
+    def _cellIds(self, cells):
+        """numpy.ndarray: Returns a unique integer for every cell inside the grid."""
+        return (cells[:, 0] * self._shape[1] + cells[:, 1]) * self._shape[2] + cells[:, 2]
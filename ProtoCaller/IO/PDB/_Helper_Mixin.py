@@ -3,6 +3,8 @@ import logging as _logging
 
 class HelperMixin:
     """A helper class containing some common helper functions."""
+    __slots__ = []
+
     def sameChain(self, obj):
         """bool: Returns whether the object is in the same chain as obj."""
         from . import Chain as _Chain
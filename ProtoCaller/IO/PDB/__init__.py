@@ -1,22 +1,49 @@
+import concurrent.futures as _futures
 import os as _os
 import re as _re
+import string as _string
+import warnings as _warnings
 
-import ProtoCaller.Utils.ConditionalList as _CondList
+import numpy as _np
+import parmed as _pmd
+
+import ProtoCaller as _PC
+import ProtoCaller.Utils.fileio as _fileio
 from . import _Helper_Mixin
+from .Alignment import *
+from .AtomTable import *
+from .Categorical import *
+from .Mask import *
 from .Atom import *
 from .Missing import *
+from .Missing import _MissingResidueList
 from .Residue import *
+from .Records import *
+from .CIF import *
+from .Cache import *
+from .Hybrid36 import *
 from .Chain import *
+from .Selection import *
+from .Spatial import *
 
 
-class PDB(Chain, _CondList.ConditionalList):
+class PDB(Chain):
     """
-    Represents a whole PDB file.
+    Represents a whole PDB file. All atoms are stored in a columnar ProtoCaller.IO.PDB.AtomTable.AtomTable and the
+    chains, residues and atoms are lightweight views into it.
 
     Parameters
     ----------
     input : str
-        Name of the input PDB file.
+        Name of the input PDB or mmCIF file, which can be compressed with gzip, bzip2 or xz.
+    cache : bool or None
+        Whether to load the parsed file from and save it to a binary cache next to the input file. The cache is keyed
+        by the contents of the file and is automatically renewed when the file changes. Only used when all models are
+        read. Default: ProtoCaller.PDBCACHE.
+    models : bool
+        Whether to read all models of a multi-model file, e.g. an NMR ensemble. The topology is always taken from the
+        first model and every further model only adds a frame of coordinates. Otherwise, or if the models contain
+        different atoms, only the first model is read.
 
     Attributes
     ----------
@@ -24,9 +51,20 @@ class PDB(Chain, _CondList.ConditionalList):
     # properties which have to be conserved within the whole PDB
     _common_properties = []
 
-    def __init__(self, input):
-        _CondList.ConditionalList.__init__(self, [])
-        self.readPDB(input)
+    _level = None
+    _childClass = Chain
+    # attributes which refer to residues and are written into the header
+    _header_attributes = ["missing_residues", "missing_atoms", "modified_residues", "disulfide_bonds", "site_residues"]
+
+    def __init__(self, input, cache=None, models=True):
+        if cache is None:
+            cache = _PC.PDBCACHE
+        # the cache always contains all models
+        cache = cache and models
+        if not cache or not self.readCache(input):
+            self.readPDB(input, models=models)
+            if cache:
+                self.writeCache()
 
     def __repr__(self):
         return "<PDB of {} chains>".format(len(self))
@@ -37,6 +75,16 @@ class PDB(Chain, _CondList.ConditionalList):
                 functionality in the future."""
         return "protein"
 
+    @property
+    def missing_residues(self):
+        """[ProtoCaller.IO.PDB.Missing.MissingResidue]: The missing residues. Quantities derived from them are cached
+        until the list or any missing residue is modified."""
+        return self._missing_residues
+
+    @missing_residues.setter
+    def missing_residues(self, value):
+        self._missing_residues = _MissingResidueList(value)
+
     @property
     def filename(self):
         """str: Name of the file corresponding to the PDB object."""
@@ -48,77 +96,347 @@ class PDB(Chain, _CondList.ConditionalList):
         if not _os.path.exists(self._filename):
             raise ValueError("Input '{}' is not a valid filename or PDB code".format(value))
 
-    def readPDB(self, filename):
-        """Reads the input PDB."""
+    def readPDB(self, filename, models=True):
+        """Reads the input PDB and optionally all of its models. mmCIF files are passed on to readCIF()."""
+        if isCIF(filename):
+            return self.readCIF(filename, models=models)
+        self.filename = filename
+        self.disulfide_bonds = []
+        self.site_residues = []
+        self.modified_residues = []
+        self.missing_residues = []
+        self.missing_atoms = []
+
+        # chains and residues are split after every TER / END record and all residue references are resolved after
+        # the atoms have been read
+        atom_lines, segments = [], []
+        model_lines = {}
+        references = []
+        for record in iterRecords(self.filename):
+            if isinstance(record, AtomRecord):
+                if record.model:
+                    if models:
+                        model_lines.setdefault(record.model, []).append(record.line)
+                    continue
+                atom_lines += [record.line]
+                segments += [record.segment]
+            elif isinstance(record, MissingAtoms):
+                self.missing_atoms += [record]
+            elif isinstance(record, MissingResidue):
+                self.missing_residues += [record]
+            elif isinstance(record, HeaderRecord):
+                line = record.line
+                if record.record == "SSBOND":
+                    chainIDs = [line[15], line[29]]
+                    resSeqs = [decodeHybrid36(line[17:21]), decodeHybrid36(line[31:35])]
+                    iCodes = [line[21], line[35]]
+                    references += [(self.disulfide_bonds, True, list(zip(chainIDs, resSeqs, iCodes)))]
+                elif record.record == "SITE":
+                    for i in range(22, len(line.strip()), 11):
+                        chainID, resSeq, iCode = line[i], decodeHybrid36(line[i + 1:i + 5]), line[i + 5]
+                        references += [(self.site_residues, False, [(chainID, resSeq, iCode)])]
+                elif record.record == "MODRES":
+                    chainID, resSeq, iCode = line[16], decodeHybrid36(line[18:22]), line[22]
+                    references += [(self.modified_residues, False, [(chainID, resSeq, iCode)])]
+        self._table = AtomTable.fromLines(atom_lines, segments)
+        self._addModels([model_lines[x] for x in sorted(model_lines)], AtomTable.coordinatesFromLines)
+        self._resolveReferences(references)
+
+    def readCIF(self, filename, models=True):
+        """Reads the input mmCIF file and optionally all of its models."""
         self.filename = filename
-        pdb_string = open(self.filename).readlines()
-        if pdb_string[-1][:3] != "END": pdb_string += ["END" + " " * 80]
-
-        curr_atom, curr_res, curr_chain = None, Residue(), Chain()
-
-        # first populate with all atoms
-        for i, line in enumerate(pdb_string):
-            is_atom = True if line[:4] == "ATOM" or line[:6] == "HETATM" else False
-            is_end = True if line[:3] in ["TER", "END"] or i == len(pdb_string) - 1 else False
-
-            if any([is_atom, is_end]):
-                if is_atom:
-                    curr_atom = Atom(line)
-                if len(curr_res) and any([is_end, not curr_atom.sameResidue(curr_res)]):
-                    curr_chain.append(curr_res)
-                    curr_res = Residue()
-                if len(curr_chain) and any([is_end, not curr_atom.sameChain(curr_chain)]):
-                    self.append(curr_chain)
-                    curr_chain = Chain()
-                if is_atom:
-                    curr_res.append(curr_atom)
+        data = readCIF(filename)
+        atom_site = data["atom_site"]
+
+        def column(category, *items, default=""):
+            # returns the first available item of a category and replaces unknown values with a default
+            for item in items:
+                if item in category:
+                    values = category[item].copy()
+                    values[_np.isin(values, ["?", "."])] = default
+                    return values
+            return _np.full(len(next(iter(category.values()))), default)
+
+        other_models = []
+        if "pdbx_PDB_model_num" in atom_site:
+            model_nums = atom_site["pdbx_PDB_model_num"]
+            if models:
+                for model_num in _np.unique(model_nums[model_nums != model_nums[0]]):
+                    other_models += [{key: value[model_nums == model_num] for key, value in atom_site.items()}]
+            atom_site = {key: value[model_nums == model_nums[0]] for key, value in atom_site.items()}
+        charges = column(atom_site, "pdbx_formal_charge", default="0").astype(_np.float64).astype(_np.int64)
+        columns = {
+            "type": _np.char.upper(column(atom_site, "group_PDB", default="ATOM")),
+            "serial": column(atom_site, "id", default="0").astype(_np.float64).astype(_np.int64),
+            "name": column(atom_site, "auth_atom_id", "label_atom_id"),
+            "altLoc": column(atom_site, "label_alt_id"),
+            "resName": column(atom_site, "auth_comp_id", "label_comp_id"),
+            "chainID": column(atom_site, "auth_asym_id", "label_asym_id", default=" "),
+            "resSeq": column(atom_site, "auth_seq_id", "label_seq_id", default="0").astype(_np.float64).astype(
+                _np.int64),
+            "iCode": column(atom_site, "pdbx_PDB_ins_code", default=" "),
+            "occupancy": column(atom_site, "occupancy"),
+            "tempFactor": column(atom_site, "B_iso_or_equiv"),
+            "element": _np.char.upper(column(atom_site, "type_symbol")),
+            "charge": [("{}{}".format(abs(x), "+" if x > 0 else "-") if x else "") for x in charges.tolist()],
+        }
+        coordinates = _np.stack([column(atom_site, "Cartn_" + x, default="0") for x in "xyz"], axis=1).astype(
+            _np.float64)
+        # the equivalent of a TER record is the end of a polymer, i.e. the first atom without a polymer sequence number
+        polymer = column(atom_site, "label_seq_id") != ""
+        segments = _np.concatenate([[0], _np.cumsum(polymer[:-1] & ~polymer[1:])])
+        self._table = AtomTable.fromColumns(columns, coordinates, segments)
+        self._addModels(other_models, lambda model: _np.stack([column(model, "Cartn_" + x, default="0") for x in "xyz"],
+                                                              axis=1).astype(_np.float64))
 
         self.disulfide_bonds = []
         self.site_residues = []
         self.modified_residues = []
         self.missing_residues = []
         self.missing_atoms = []
+        references = []
+
+        def identifiers(category, prefix="", suffix="", ins_code="PDB_ins_code"):
+            # returns the residue identifiers of all rows of a category
+            return list(zip(column(category, prefix + "auth_asym_id" + suffix, default=" ").tolist(),
+                            column(category, prefix + "auth_seq_id" + suffix, default="0").astype(
+                                _np.float64).astype(_np.int64).tolist(),
+                            column(category, ins_code, default=" ").tolist()))
+
+        # SSBOND
+        if "struct_conn" in data:
+            struct_conn = data["struct_conn"]
+            disulfides = column(struct_conn, "conn_type_id") == "disulf"
+            partners = [identifiers(struct_conn, "ptnr{}_".format(i), ins_code="pdbx_ptnr{}_PDB_ins_code".format(i))
+                        for i in [1, 2]]
+            for i in _np.flatnonzero(disulfides).tolist():
+                references += [(self.disulfide_bonds, True, [partners[0][i], partners[1][i]])]
+
+        # SITE
+        if "struct_site_gen" in data:
+            for identifier in identifiers(data["struct_site_gen"], ins_code="pdbx_auth_ins_code"):
+                references += [(self.site_residues, False, [identifier])]
+
+        # MODRES
+        if "pdbx_struct_mod_residue" in data:
+            for identifier in identifiers(data["pdbx_struct_mod_residue"]):
+                references += [(self.modified_residues, False, [identifier])]
+
+        # REMARK 465
+        if "pdbx_unobs_or_zero_occ_residues" in data:
+            residues = data["pdbx_unobs_or_zero_occ_residues"]
+            missing = (column(residues, "occupancy_flag", default="1") == "1") & \
+                      (column(residues, "PDB_model_num", default="1") == column(residues, "PDB_model_num",
+                                                                                default="1")[:1])
+            resNames = column(residues, "auth_comp_id", "label_comp_id")
+            for i, identifier in enumerate(identifiers(residues)):
+                if missing[i]:
+                    self.missing_residues += [MissingResidue(resNames[i], *identifier)]
+
+        # REMARK 470
+        if "pdbx_unobs_or_zero_occ_atoms" in data:
+            atoms = data["pdbx_unobs_or_zero_occ_atoms"]
+            missing = (column(atoms, "occupancy_flag", default="1") == "1") & \
+                      (column(atoms, "PDB_model_num", default="1") == column(atoms, "PDB_model_num",
+                                                                             default="1")[:1])
+            resNames = column(atoms, "auth_comp_id", "label_comp_id")
+            names = column(atoms, "auth_atom_id", "label_atom_id")
+            missing_atoms = {}
+            for i, identifier in enumerate(identifiers(atoms)):
+                if missing[i]:
+                    key = (resNames[i],) + identifier
+                    if key not in missing_atoms:
+                        missing_atoms[key] = MissingAtoms(*key, atoms=[])
+                        self.missing_atoms += [missing_atoms[key]]
+                    missing_atoms[key].append(names[i])
 
-        # then re-read and create links to other parts of the PDB
-        for line in pdb_string:
-            if line[:6] == "SSBOND":
-                chainIDs = [line[15], line[29]]
-                resSeqs = [int(float(line[17:21])), int(float(line[31:35]))]
-                iCodes = [line[21], line[35]]
-                masks = []
-                for chainID, resSeq, iCode in zip(chainIDs, resSeqs, iCodes):
-                    masks += ["chainID=='{}'&resSeq=={}&iCode=='{}'".format(chainID, resSeq, iCode)]
-                mask = "|".join(masks)
-                self.disulfide_bonds += [self.filter(mask)]
-            elif line[:4] == "SITE":
-                for i in range(22, len(line.strip()), 11):
-                    chainID, resSeq, iCode = line[i], int(float(line[i + 1:i + 5])), line[i + 5]
-                    mask = "chainID=='{}'&resSeq=={}&iCode=='{}'".format(chainID, resSeq, iCode)
-                    self.site_residues += self.filter(mask)
-            elif line[:6] == "MODRES":
-                chainID, resSeq, iCode = line[16], int(float(line[18:22])), line[22]
-                mask = "chainID=='{}'&resSeq=={}&iCode=='{}'".format(chainID, resSeq, iCode)
-                self.modified_residues += self.filter(mask)
+        self._resolveReferences(references)
+
+    def readCache(self, filename):
+        """
+        Reads the parsed input file from its binary cache.
+
+        Parameters
+        ----------
+        filename : str
+            Name of the input PDB or mmCIF file.
+
+        Returns
+        -------
+        success : bool
+            Whether a valid cache was found and read.
+        """
+        arrays = loadCache(filename)
+        if arrays is None:
+            return False
+        self._readArrays(filename, arrays)
+        return True
+
+    def _readArrays(self, filename, arrays):
+        """Initialises the object from the output of toArrays()."""
+        self.filename = filename
+        self._table = AtomTable.fromArrays(arrays)
+
+        def missing(prefix):
+            fields = [arrays[prefix + x].tolist() for x in ["resName", "chainID", "resSeq", "iCode"]]
+            return list(zip(*fields))
+
+        self.missing_residues = [MissingResidue(*x) for x in missing("missing_residues_")]
+        self.missing_atoms = [MissingAtoms(*x, atoms=atoms.split()) for x, atoms in
+                              zip(missing("missing_atoms_"), arrays["missing_atoms_atoms"].tolist())]
+        keys = self._table.keys("residue")
+        residues = [self._table.view(Residue, keys[i].item()) for i in arrays["references"].tolist()]
+        offsets = [0] + _np.cumsum(arrays["reference_sizes"]).tolist()
+        groups = [residues[start:stop] for start, stop in zip(offsets[:-1], offsets[1:])]
+        self.site_residues, self.modified_residues, self.disulfide_bonds = groups[0], groups[1], groups[2:]
+
+    def writeCache(self):
+        """
+        Writes the parsed input file into its binary cache.
+
+        Returns
+        -------
+        cache_filename : str or None
+            The absolute path to the cache file or None if the cache could not be written.
+        """
+        return saveCache(self.filename, self.toArrays())
+
+    def toArrays(self):
+        """
+        Returns the whole object, including the header records, as plain arrays. This is the format of the binary
+        cache and is much cheaper to pickle than the object itself.
+
+        Returns
+        -------
+        arrays : dict
+            A dictionary of NumPy arrays, none of which are object arrays.
+        """
+        arrays = self._table.toArrays()
+        for name in ["missing_residues", "missing_atoms"]:
+            for field, dtype in [("resName", str), ("chainID", str), ("resSeq", _np.int64), ("iCode", str)]:
+                arrays["{}_{}".format(name, field)] = _np.array([getattr(x, field) for x in getattr(self, name)],
+                                                                dtype=dtype)
+        arrays["missing_atoms_atoms"] = _np.array([" ".join(x) for x in self.missing_atoms], dtype=str)
+        # the site residues, the modified residues and each disulfide bond are stored as consecutive groups of
+        # residue positions
+        groups = [self.site_residues, self.modified_residues] + self.disulfide_bonds
+        arrays["references"] = _np.array([self._table.position("residue", x._key) for group in groups
+                                          for x in group], dtype=_np.int64)
+        arrays["reference_sizes"] = _np.array([len(group) for group in groups], dtype=_np.int64)
+        return arrays
+
+    @classmethod
+    def fromArrays(cls, filename, arrays):
+        """
+        Creates an object from the output of toArrays().
+
+        Parameters
+        ----------
+        filename : str
+            Name of the original input file.
+        arrays : dict
+            The arrays returned by toArrays().
+
+        Returns
+        -------
+        pdb : ProtoCaller.IO.PDB.PDB
+            The resulting object.
+        """
+        obj = cls.__new__(cls)
+        obj._readArrays(filename, arrays)
+        return obj
+
+    @classmethod
+    def loadMany(cls, filenames, workers=None, cache=None):
+        """
+        Reads many PDB or mmCIF files in a pool of processes. The files are parsed in the worker processes and sent
+        back as plain arrays (see toArrays()), which are only turned into objects in the calling process.
+
+        Parameters
+        ----------
+        filenames : [str]
+            Names of the input files.
+        workers : int or None
+            The number of worker processes. 1 reads all files in the current process. Default: the number of CPUs.
+        cache : bool or None
+            Whether to use the binary cache of each input file. Default: ProtoCaller.PDBCACHE.
+
+        Returns
+        -------
+        pdbs : [ProtoCaller.IO.PDB.PDB or None]
+            The resulting objects in the order of the input files. Files which could not be read are None.
+        failures : dict
+            The exceptions raised while reading each file which could not be read.
+        """
+        filenames = [_os.path.abspath(filename) for filename in filenames]
+        if cache is None:
+            cache = _PC.PDBCACHE
+        if workers is None:
+            workers = _os.cpu_count() or 1
+        workers = max(1, min(workers, len(filenames)))
+
+        results = []
+        if workers == 1:
+            for filename in filenames:
+                try:
+                    results += [(_loadArrays(filename, cache), None)]
+                except Exception as e:
+                    results += [(None, e)]
+        else:
+            with _futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                for future in [executor.submit(_loadArrays, filename, cache) for filename in filenames]:
+                    try:
+                        results += [(future.result(), None)]
+                    except Exception as e:
+                        results += [(None, e)]
+
+        pdbs, failures = [], {}
+        for filename, (arrays, exception) in zip(filenames, results):
+            if exception is not None:
+                _warnings.warn("Could not read {}: {}".format(filename, exception))
+                failures[filename] = exception
+                pdbs += [None]
             else:
-                match = _re.findall(r"^REMARK 465\s*([\w]{3})\s*([\w])\s*([-]?[\d]+)([\D|\S]?)\s*$", line)
-                if len(match) != 0:
-                    self.missing_residues += [MissingResidue(*match[0])]
-                    continue
+                pdbs += [cls.fromArrays(filename, arrays)]
+        return pdbs, failures
 
-                match = _re.findall(r"^REMARK 470\s*([\w]{3})\s*([\w])\s*([\d]+)([\D|\S]?)\s*", line)
-                if len(match) != 0:
-                    args = match[0]
-                    arr = line[21:].split()
-                    self.missing_atoms += [MissingAtoms(*args, atoms=arr)]
+    def _addModels(self, models, parse):
+        """Adds the coordinates of further models as frames. If any model does not contain the same number of atoms as
+        the first model, only the first model is kept."""
+        frames = []
+        for i, model in enumerate(models):
+            frames += [parse(model)]
+            if len(frames[-1]) != len(self._table):
+                _warnings.warn("Model {} contains {} atoms instead of {}. Only the first model is read".format(
+                    i + 2, len(frames[-1]), len(self._table)))
+                return
+        if frames:
+            self._table.addFrames(_np.stack(frames))
 
-    def writePDB(self, filename=None):
+    def _resolveReferences(self, references):
+        """Resolves the residue identifiers of header records and adds the residues to the respective lists."""
+        for target, grouped, identifiers in references:
+            positions = sorted(set(sum([self._residuePositions(*x) for x in identifiers], [])))
+            residues = [self._table.view(Residue, self._table.keys("residue")[i].item()) for i in positions]
+            if grouped:
+                target.append(residues)
+            else:
+                target.extend(residues)
+
+    def writePDB(self, filename=None, selection=None, model=None):
         """
         Writes the object as a PDB file.
 
         Parameters
         ----------
         filename : str or None
-            Name of the output file. Default: original filename.
+            Name of the output file, which is compressed if it ends in ".gz", ".bz2" or ".xz". Default: original
+            filename.
+        selection : ProtoCaller.IO.PDB.Selection.Selection or [ProtoCaller.IO.PDB.Chain.Chain or \
+ProtoCaller.IO.PDB.Residue.Residue or ProtoCaller.IO.PDB.Atom.Atom or ProtoCaller.IO.PDB.Missing.MissingResidue] or None
+            Only writes these elements, as if all other residues had been purged beforehand. Default: all elements.
+        model : int or None
+            The index of the model whose coordinates are written. Default: the current model.
 
         Returns
         -------
@@ -126,64 +444,259 @@ class PDB(Chain, _CondList.ConditionalList):
             The absolute path to the written PDB file.
         """
         if filename is None: filename = self.filename
-        with open(filename, "w") as file:
-            # write SEQRES
+        if model is not None:
+            current_model = self.model
+            self.model = model
+            try:
+                return self.writePDB(filename, selection)
+            finally:
+                self.model = current_model
+        if selection is None:
+            rows = _np.ones(len(self._table), dtype=bool)
+            headers = {name: getattr(self, name) for name in self._header_attributes}
             total_residue_list = self.totalResidueList()
-            chainIDs = [x.chainID for x in total_residue_list]
-            chain_lengths = {x: chainIDs.count(x) for x in set(chainIDs)}
-            line, curr_chainID, i, j = None, None, None, None
-            for residue in total_residue_list:
-                if residue.chainID != curr_chainID:
-                    if line is not None:
-                        file.write(line + "\n")
-                    curr_chainID = residue.chainID
-                    i, j = 1, 1
-                    line = "SEQRES {:>3d} {:1.1}  {:>3d}  ".format(i, curr_chainID, chain_lengths[curr_chainID])
-                if j == 14:
-                    file.write(line + "\n")
-                    i += 1
-                    j = 1
-                    line = "SEQRES {:>3d} {:1.1}  {:>3d}  ".format(i, curr_chainID, chain_lengths[curr_chainID])
-                line += "{} ".format(residue.resName)
-                j += 1
-            if j != 1:
-                file.write(line + "\n")
-
-            # write missing atoms and residues
-            for residue in self.missing_residues + self.missing_atoms:
-                file.write(residue.__str__())
-
-            # write modified residues
-            for i, residue in enumerate(self.modified_residues):
-                file.write("MODRES {:>4d} {:>3.3} {:1.1} {:>4d}{:1.1}\n".format(i + 1, residue.resName, residue.chainID,
-                                                                                residue.resSeq, residue.iCode))
-
-            #write disulfide bonds
-            for i, pair in enumerate(self.disulfide_bonds):
-                template = "SSBOND{:>4d} CYS {:1.1} {:>4d}{:1.1}   CYS {:>1.1} {:>4d}{:1.1}\n"
-                file.write(template.format(i + 1, pair[0].chainID, pair[0].resSeq, pair[0].iCode,
-                                           pair[1].chainID, pair[1].resSeq, pair[1].iCode))
-
-            # write site residues
-            for i in range(0, len(self.site_residues), 4):
-                str_list = ["SITE   {:>3d} DUM{:>3d} ".format(i // 4 + 1, len(self.site_residues))]
-                for residue in self.site_residues[i:min(i + 4, len(self.site_residues))]:
-                    str_list += "{:>3.3} {:1.1}{:>4d}{:1.1} ".format(residue.resName, residue.chainID, residue.resSeq,
-                                                                     residue.iCode)
-                file.write("".join(str_list) + "\n")
-
-            # write all residues
-            for chain in self:
-                file.write(chain.__str__())
-                if chain.type == "chain":
-                    file.write("TER\n")
+        else:
+            rows, headers, total_residue_list = self._selectRows(selection)
+
+        strings = []
+        # PDB files only have room for single-character chain identifiers
+        pdb_chainIDs = self._pdbChainIDs()
+        # write SEQRES
+        chainIDs = [pdb_chainIDs.get(x.chainID, x.chainID) for x in total_residue_list]
+        chain_lengths = {x: chainIDs.count(x) for x in set(chainIDs)}
+        line, curr_chainID, i, j = None, None, None, None
+        for chainID, residue in zip(chainIDs, total_residue_list):
+            if chainID != curr_chainID:
+                if line is not None:
+                    strings += [line + "\n"]
+                curr_chainID = chainID
+                i, j = 1, 1
+                line = "SEQRES {:>3d} {:1.1}  {:>3d}  ".format(i, curr_chainID, chain_lengths[curr_chainID])
+            if j == 14:
+                strings += [line + "\n"]
+                i += 1
+                j = 1
+                line = "SEQRES {:>3d} {:1.1}  {:>3d}  ".format(i, curr_chainID, chain_lengths[curr_chainID])
+            line += "{} ".format(residue.resName)
+            j += 1
+        if line is not None:
+            strings += [line + "\n"]
+
+        # write missing atoms and residues
+        for residue in headers["missing_residues"] + headers["missing_atoms"]:
+            if residue.chainID in pdb_chainIDs:
+                args = (residue.resName, pdb_chainIDs[residue.chainID], residue.resSeq, residue.iCode)
+                residue = MissingAtoms(*args, atoms=list(residue)) if isinstance(residue, MissingAtoms) else \
+                    MissingResidue(*args)
+            strings += [residue.__str__()]
+
+        # write modified residues
+        for i, residue in enumerate(headers["modified_residues"]):
+            strings += ["MODRES {:>4d} {:>3.3} {:1.1} {:>4.4}{:1.1}\n".format(
+                i + 1, residue.resName, pdb_chainIDs.get(residue.chainID, residue.chainID),
+                encodeHybrid36(residue.resSeq, 4), residue.iCode)]
+
+        #write disulfide bonds
+        for i, pair in enumerate(headers["disulfide_bonds"]):
+            template = "SSBOND{:>4d} CYS {:1.1} {:>4.4}{:1.1}   CYS {:>1.1} {:>4.4}{:1.1}\n"
+            strings += [template.format(i + 1, pdb_chainIDs.get(pair[0].chainID, pair[0].chainID),
+                                        encodeHybrid36(pair[0].resSeq, 4), pair[0].iCode,
+                                        pdb_chainIDs.get(pair[1].chainID, pair[1].chainID),
+                                        encodeHybrid36(pair[1].resSeq, 4), pair[1].iCode)]
+
+        # write site residues
+        site_residues = headers["site_residues"]
+        for i in range(0, len(site_residues), 4):
+            str_list = ["SITE   {:>3d} DUM{:>3d} ".format(i // 4 + 1, len(site_residues))]
+            for residue in site_residues[i:min(i + 4, len(site_residues))]:
+                str_list += "{:>3.3} {:1.1}{:>4.4}{:1.1} ".format(residue.resName,
+                                                                  pdb_chainIDs.get(residue.chainID, residue.chainID),
+                                                                  encodeHybrid36(residue.resSeq, 4), residue.iCode)
+            strings += ["".join(str_list) + "\n"]
+
+        # write all residues in chunks, so that very large structures are never formatted into a single string
+        selected, terminate = self._terminalRows(rows)
+        with _fileio.openFile(filename, "w") as file:
+            file.write("".join(strings))
+            for lines in self._table.iterFormattedLines(selected, terminate=terminate, chainIDs=pdb_chainIDs):
+                file.write(lines)
             file.write("END")
 
         return _os.path.abspath(filename)
 
+    def _pdbChainIDs(self):
+        """dict: Maps all chain identifiers with more than one character, e.g. from mmCIF files, onto unused single
+        characters and warns about the renaming, so that distinct chains stay distinct in PDB files. Empty if all
+        chain identifiers fit into a PDB file."""
+        chainIDs = self._table.levelColumn("chain", "chainID").tolist()
+        chainIDs += [x.chainID for x in self.missing_residues + self.missing_atoms]
+        chainIDs = list(dict.fromkeys(x for x in chainIDs if x is not None))
+        long_chainIDs = [x for x in chainIDs if len(x) > 1]
+        if not long_chainIDs:
+            return {}
+        available = [x for x in _string.ascii_uppercase + _string.ascii_lowercase + _string.digits
+                     if x not in chainIDs]
+        if len(long_chainIDs) > len(available):
+            raise ValueError("Cannot write {} chains with identifiers longer than one character to a PDB file: only "
+                             "{} single-character identifiers are unused".format(len(long_chainIDs), len(available)))
+        mapping = {}
+        for chainID in long_chainIDs:
+            # keep the first character if it is still unused
+            mapping[chainID] = chainID[0] if chainID[0] in available else available[0]
+            available.remove(mapping[chainID])
+        _warnings.warn("Chain identifiers longer than one character have been renamed in the PDB file: {}".format(
+            ", ".join("{} -> {}".format(*x) for x in mapping.items())))
+        return mapping
+
+    def _terminalRows(self, rows):
+        """Returns the indices of the selected atom rows and whether each of them is followed by a TER record, which
+        terminates all chains that contain amino acids."""
+        selected = _np.flatnonzero(rows)
+        residue_offsets = _np.concatenate([[0], _np.cumsum(rows)])[self._table.rowOffsets("residue")]
+        residue_counts = _np.diff(residue_offsets)
+        amino_acids = (self._values("residue", "type") == "amino_acid") & (residue_counts > 0)
+        protein_chains = _np.bincount(self._table.parents("residue"), weights=amino_acids,
+                                      minlength=self._table.count("chain")) > 0
+        chains = _np.searchsorted(self._table.rowOffsets("chain"), selected, side="right") - 1
+        last = _np.ones(len(selected), dtype=bool)
+        last[:-1] = chains[1:] != chains[:-1]
+        return selected, last & protein_chains[chains]
+
+    def toParmed(self, selection=None, bonds=True):
+        """
+        Converts the object into a ParmEd Structure without writing any files. All models are converted into frames.
+
+        Parameters
+        ----------
+        selection : ProtoCaller.IO.PDB.Selection.Selection or [ProtoCaller.IO.PDB.Chain.Chain or \
+ProtoCaller.IO.PDB.Residue.Residue or ProtoCaller.IO.PDB.Atom.Atom] or None
+            Only converts these elements. Default: all elements.
+        bonds : bool
+            Whether to assign bonds based on residue templates and distances, as parmed.load_file does.
+
+        Returns
+        -------
+        structure : parmed.structure.Structure
+            The resulting structure.
+        """
+        rows = _np.ones(len(self._table), dtype=bool) if selection is None else self._selectRows(selection)[0]
+        selected, terminate = self._terminalRows(rows)
+        columns = {name: self._table.column(name)[selected].tolist() for name in
+                   ["serial", "name", "altLoc", "resName", "chainID", "resSeq", "iCode"]}
+
+        # the properties derived from the element, the charge, the occupancy and the B-factor are only converted once
+        # per unique value
+        def convert(name, function):
+            unique, inverse = _np.unique(self._table.column(name)[selected], return_inverse=True)
+            return _np.array([function(x) for x in unique.tolist()] + [None], dtype=object)[inverse].tolist()
+
+        symbols = convert("element", lambda x: x.strip().capitalize())
+        symbols = [x if x in _pmd.periodic_table.AtomicNum else _pmd.periodic_table.element_by_name(name)
+                   for x, name in zip(symbols, columns["name"])]
+        charges = convert("charge", lambda x: int(x[::-1]) if x.strip() else None)
+        occupancies = convert("occupancy", lambda x: float(x) if x.strip() else 0.)
+        bfactors = convert("tempFactor", lambda x: float(x) if x.strip() else 0.)
+
+        structure = _pmd.Structure()
+        for i in range(len(selected)):
+            atom = _pmd.Atom(atomic_number=_pmd.periodic_table.AtomicNum.get(symbols[i], 0), name=columns["name"][i],
+                             mass=_pmd.periodic_table.Mass.get(symbols[i], 0.), occupancy=occupancies[i],
+                             bfactor=bfactors[i], altloc=columns["altLoc"][i].strip(), number=columns["serial"][i],
+                             formal_charge=charges[i])
+            structure.add_atom(atom, columns["resName"][i], columns["resSeq"][i], columns["chainID"][i].strip(),
+                               columns["iCode"][i].strip())
+        for i in _np.flatnonzero(terminate).tolist():
+            structure.atoms[i].residue.ter = True
+
+        if bonds:
+            structure.assign_bonds()
+        structure.unchange()
+        structure.coordinates = self._table.frames[:, selected]
+        return structure
+
+    @classmethod
+    def fromParmed(cls, structure, filename=None):
+        """
+        Creates an object from a ParmEd Structure without writing any files. All frames are converted into models.
+
+        Parameters
+        ----------
+        structure : parmed.structure.Structure
+            The input structure.
+        filename : str or None
+            The file the object corresponds to. It does not need to exist and is used as the default output of
+            writePDB().
+
+        Returns
+        -------
+        pdb : ProtoCaller.IO.PDB.PDB
+            The resulting object. Disulfide bonds are detected from the bonds of the structure.
+        """
+        atoms = structure.atoms
+        residues = [atom.residue for atom in atoms]
+        resnames = [residue.name for residue in structure.residues]
+        hetatm = {x: not any(y.has(x) for y in [_pmd.residue.AminoAcidResidue, _pmd.residue.RNAResidue,
+                                                _pmd.residue.DNAResidue]) for x in set(resnames)}
+        columns = {
+            "type": ["HETATM" if hetatm[residue.name] else "ATOM" for residue in residues],
+            "serial": [atom.number if atom.number > 0 else i + 1 for i, atom in enumerate(atoms)],
+            "name": [atom.name for atom in atoms],
+            "altLoc": [atom.altloc for atom in atoms],
+            "resName": [residue.name for residue in residues],
+            "chainID": [residue.chain for residue in residues],
+            "resSeq": [residue.number for residue in residues],
+            "iCode": [residue.insertion_code for residue in residues],
+            "occupancy": ["{:.2f}".format(atom.occupancy) for atom in atoms],
+            "tempFactor": ["{:.2f}".format(atom.bfactor) for atom in atoms],
+            "element": [_pmd.periodic_table.Element[atom.atomic_number].upper() if atom.atomic_number > 0 else ""
+                        for atom in atoms],
+            "charge": ["{:d}{}".format(abs(atom.formal_charge), "+" if atom.formal_charge > 0 else "-")
+                       if atom.formal_charge else "" for atom in atoms],
+        }
+        # chains and residues are split after every residue which is followed by a TER record
+        ter = _np.array([residue.ter for residue in structure.residues], dtype=_np.int64)
+        segments = _np.concatenate([[0], _np.cumsum(ter)[:-1]])[[residue.idx for residue in residues]] \
+            if len(atoms) else []
+        frames = structure.get_coordinates() if structure.coordinates is not None else \
+            _np.zeros((1, len(atoms), 3))
+
+        obj = cls.__new__(cls)
+        obj._filename = _os.path.abspath(filename) if filename is not None else None
+        obj._table = AtomTable.fromColumns(columns, frames, segments)
+        obj.missing_residues, obj.missing_atoms, obj.modified_residues, obj.site_residues = [], [], [], []
+        obj.disulfide_bonds = []
+        references = []
+        for bond in structure.bonds:
+            if bond.atom1.residue is not bond.atom2.residue and bond.atom1.name == bond.atom2.name == "SG":
+                identifiers = [(x.residue.chain, x.residue.number, x.residue.insertion_code)
+                               for x in [bond.atom1, bond.atom2]]
+                references += [(obj.disulfide_bonds, True, identifiers)]
+        obj._resolveReferences(references)
+        return obj
+
+    def partitionHetatms(self):
+        """
+        Groups all residues of chains which contain no amino acids by their type in a single pass over the structure.
+
+        Returns
+        -------
+        selections : [ProtoCaller.IO.PDB.Selection.Selection]
+            The residues of each type in the order in which they appear in the structure.
+        moltypes : [str]
+            Their corresponding moltypes in the order in which they first appear.
+        """
+        residue_types = self._values("residue", "type")
+        hetatm_chains = self._values("chain", "type") != "chain"
+        positions = _np.flatnonzero(hetatm_chains[self._table.parents("residue")] & (residue_types != None))
+        moltypes, first, inverse = _np.unique(residue_types[positions].astype(str), return_index=True,
+                                              return_inverse=True)
+        order = _np.argsort(first)
+        selections = [Selection(self, "residue", positions[inverse == i]) for i in order]
+        return selections, moltypes[order].tolist()
+
     def writeHetatms(self, filebase=None):
         """
-        Partitions every type of HETATM molecules into a separate PDB file.
+        Partitions every type of HETATM molecules into a separate PDB file. Each file is written at once.
 
         Parameters
         ----------
@@ -197,18 +710,15 @@ class PDB(Chain, _CondList.ConditionalList):
         moltypes : [str]
             Their corresponding moltypes.
         """
-        if filebase is None: filebase = _os.path.splitext(self.filename)[0]
+        if filebase is None: filebase = _os.path.splitext(_fileio.splitCompression(self.filename)[0])[0]
         filenames = []
-        moltypes = []
-        for chain in self.filter("type!='chain'", type="chains"):
-            for residue in chain:
-                filename = _os.path.abspath("%s_%s.pdb" % (filebase, residue.type))
-                mode = "w" if filename not in filenames else "a"
-                with open(filename, mode) as file:
-                    file.write(residue.__str__())
-                if filename not in filenames:
-                    filenames += [filename]
-                    moltypes += [residue.type]
+        selections, moltypes = self.partitionHetatms()
+        chainIDs = self._pdbChainIDs() if selections else {}
+        for selection, moltype in zip(selections, moltypes):
+            filename = _os.path.abspath("%s_%s.pdb" % (filebase, moltype))
+            with open(filename, "w") as file:
+                file.write(self._table.formatLines(selection.toLevel("atom").positions(), chainIDs=chainIDs))
+            filenames += [filename]
         return filenames, moltypes
 
     def filter(self, mask, type="residues"):
@@ -224,45 +734,186 @@ class PDB(Chain, _CondList.ConditionalList):
 
         Returns
         -------
-        total_list : list
+        selection : ProtoCaller.IO.PDB.Selection.Selection
             All elements satisfying the given conditions.
         """
-        def add(elem):
-            nonlocal i, condition, all_elems, curr_list
-            if i == 0:
-                all_elems += [elem]
-            if eval("elem" + "." + condition, globals(), vars()):
-                curr_list += [elem]
-
-        all_elems = []
-        all_sets = []
-        expr = r"[^\(\)&|]+"
-        conditions = [x for x in _re.findall(expr, mask) if x not in [None, ""]]
-
-        for i, condition in enumerate(conditions):
-            curr_list = []
-            for chain in self:
-                if type != "chains":
-                    for residue in chain:
-                        if type != "residues":
-                            for atom in residue:
-                                add(atom)
-                        else:
-                            add(residue)
+        level = {"chains": "chain", "residues": "residue"}.get(type, "atom")
+        return Selection(self, level, _np.flatnonzero(self._evaluateMask(level, compileMask(mask))))
+
+    def within(self, distance, of, type="residues"):
+        """
+        Returns all elements with any atom within a given distance of a selection. The distances are looked up in a
+        cached spatial index over all atoms.
+
+        Parameters
+        ----------
+        distance : float
+            The cutoff distance in Angstroms.
+        of : str or ProtoCaller.IO.PDB.Selection.Selection or [ProtoCaller.IO.PDB.Chain.Chain or \
+ProtoCaller.IO.PDB.Residue.Residue or ProtoCaller.IO.PDB.Atom.Atom] or numpy.ndarray
+            The reference selection as a mask, as elements of this PDB or as an (M, 3) array of coordinates.
+        type : str
+            The type of objects to be returned. One of "chains", "residues" and "atoms".
+
+        Returns
+        -------
+        selection : ProtoCaller.IO.PDB.Selection.Selection
+            All elements within the cutoff distance.
+        """
+        level = {"chains": "chain", "residues": "residue"}.get(type, "atom")
+        return Selection(self, level, _np.flatnonzero(self._withinMask(level, distance, of)))
+
+    def residue(self, chainID, resSeq, iCode=" "):
+        """
+        Looks up a residue by its identifiers using a hash index, which is much faster than the equivalent filter.
+
+        Parameters
+        ----------
+        chainID : str
+            The chain identifier.
+        resSeq : int
+            The residue sequence number.
+        iCode : str
+            The insertion code.
+
+        Returns
+        -------
+        residue : ProtoCaller.IO.PDB.Residue.Residue or None
+            The first residue with these identifiers or None if there is no such residue.
+        """
+        positions = self._residuePositions(chainID, resSeq, iCode)
+        if not positions:
+            return None
+        return self._table.view(Residue, self._table.keys("residue")[positions[0]].item())
+
+    def _residuePositions(self, chainID, resSeq, iCode=" "):
+        """[int]: Returns the positions of all residues with the given identifiers."""
+        chainID, resSeq, iCode = chainID.strip() or " ", decodeHybrid36(resSeq), iCode.strip().upper() or " "
+        index = self._table.residueIndex()
+        if (chainID, resSeq, iCode) not in index:
+            chainID = chainID.upper()
+        return index.get((chainID, resSeq, iCode), [])
+
+    def _selectRows(self, selection):
+        """Returns the selected atom rows, the header records and the total residue list corresponding to a selection
+        as if all other residues had been purged."""
+        rows = _np.zeros(len(self._table), dtype=bool)
+        missing_residues = []
+        if isinstance(selection, Selection):
+            rows[Selection.fromElements(self, selection, "atom").positions()] = True
+            selection = []
+        for item in selection:
+            if isinstance(item, (Atom, Residue)) and item._table is self._table:
+                if isinstance(item, Atom):
+                    rows[item._position()] = True
                 else:
-                    add(chain)
+                    start, stop = item._rowRange()
+                    rows[start:stop] = True
+            elif isinstance(item, MissingResidue) and not isinstance(item, Residue):
+                missing_residues += [item]
+            else:
+                raise ValueError("Selection contains an element which is not part of this PDB: {}".format(item))
+
+        residue_offsets = _np.concatenate([[0], _np.cumsum(rows)])[self._table.rowOffsets("residue")]
+        keys = self._table.keys("residue")[_np.diff(residue_offsets) > 0].tolist()
+        residues = [self._table.view(Residue, key) for key in keys]
+
+        identifiers = {(x.resName, x.chainID, x.resSeq, x.iCode) for x in residues + missing_residues}
+        selected = lambda x: (x.resName, x.chainID, x.resSeq, x.iCode) in identifiers
+        headers = {name: [x for x in getattr(self, name) if selected(x)] for name in self._header_attributes
+                   if name != "disulfide_bonds"}
+        headers["disulfide_bonds"] = [x for x in self.disulfide_bonds if selected(x[0]) and selected(x[1])]
 
-            all_sets += [frozenset(curr_list)]
-            mask = _re.sub(r"(\A|{0})({1})(\Z|{0})".format("[\(\)&|]+", _re.escape(condition)),
-                           r"\1all_sets[%d]\3" % i, mask)
+        total_residue_list = headers["missing_residues"] + [x for x in residues if x.type in ["amino_acid",
+                                                                                             "amino_acid_modified"]]
+        return rows, headers, PDB.sortResidueList(total_residue_list)
 
-        total_set = eval(mask, globals(), locals())
-        return [x for x in all_elems if x in total_set]
+    def _evaluateMask(self, level, mask):
+        """numpy.ndarray: Evaluates a compiled mask for all elements of a given level."""
+        return mask.evaluate(lambda attribute: self._values(level, attribute), self._table.count(level),
+                             within=lambda distance, of: self._withinMask(level, distance, of))
+
+    def _withinMask(self, level, distance, of):
+        """numpy.ndarray: Returns whether any atom of each element of a given level is within a given distance of a
+        selection."""
+        if isinstance(of, str):
+            of = compileMask(of)
+        if isinstance(of, Mask):
+            points = self._table.coordinates[self._evaluateMask("atom", of)]
+        elif isinstance(of, _np.ndarray):
+            points = of
+        else:
+            points = self._table.coordinates[self._selectRows(of)[0]]
+        # very small cells only slow down the lookup
+        selected = self._table.cellList(max(distance, 2.)).within(points, distance)
+        if level == "atom":
+            return selected
+        n_elements = self._table.count(level)
+        owners = _np.repeat(_np.arange(n_elements), _np.diff(self._table.rowOffsets(level)))
+        return _np.bincount(owners[selected], minlength=n_elements) > 0
+
+    def _values(self, level, attribute):
+        """numpy.ndarray or ProtoCaller.IO.PDB.Categorical.Categorical: Returns the values of an attribute for all
+        elements of a given level. String properties are returned as codes, which are compared once per category."""
+        if attribute == "type" and level != "atom":
+            residue_types = self._table.residueTypes()
+            if level == "residue":
+                return residue_types
+            parents = self._table.parents("residue")
+            n_chains = self._table.count("chain")
+            has_residues = _np.bincount(parents, minlength=n_chains) > 0
+            has_amino_acids = _np.bincount(parents, weights=residue_types == "amino_acid", minlength=n_chains) > 0
+            chain_types = _np.where(has_amino_acids, "chain", "molecules").astype(object)
+            chain_types[~has_residues] = None
+            return chain_types
+        if attribute in self._table._categorical:
+            return self._table.levelCategorical(level, attribute)
+        if attribute in ["x", "y", "z"] or attribute in self._table._dtypes:
+            return self._table.levelColumn(level, attribute)
+        cls = {"chain": Chain, "residue": Residue, "atom": Atom}[level]
+        values = _np.empty(self._table.count(level), dtype=object)
+        values[:] = [getattr(self._table.view(cls, key), attribute) for key in self._table.keys(level).tolist()]
+        return values
 
     @property
     def numberOfResidues(self):
         """int: Returns the total number of Residues and MissingResidues."""
-        return sum([chain.numberOfResidues for chain in self]) + len(self.missing_residues)
+        return self._table.count("residue") + len(self.missing_residues)
+
+    @property
+    def table(self):
+        """ProtoCaller.IO.PDB.AtomTable.AtomTable: The columnar store of all atoms."""
+        return self._table
+
+    @property
+    def numberOfModels(self):
+        """int: Returns the number of models."""
+        return len(self._table.frames)
+
+    @property
+    def model(self):
+        """int: The index of the current model. All coordinates are read from and written to this model. Changing the
+        model does not copy any data."""
+        return self._table.frame
+
+    @model.setter
+    def model(self, value):
+        self._table.frame = value
+
+    @property
+    def frames(self):
+        """numpy.ndarray: An (n_models, N, 3) array of the coordinates of all models."""
+        return self._table.frames
+
+    @property
+    def coordinates(self):
+        """numpy.ndarray: An (N, 3) array of the coordinates of the current model. This is a view into the atom table,
+        so changes to the array change the atoms."""
+        return self._table.coordinates
+
+    @coordinates.setter
+    def coordinates(self, value):
+        self._table.coordinates = value
 
     @property
     def numberOfChains(self):
@@ -270,29 +921,46 @@ class PDB(Chain, _CondList.ConditionalList):
         return len(self)
 
     def reNumberResidues(self, start=1, custom_resSeqs=None, custom_iCodes=None):
+        """
+        Renumbers all residues and missing residues in the order given by sorting them by chain identifier, number and
+        insertion code. Missing atoms are renumbered together with their residues.
+
+        Parameters
+        ----------
+        start : int, optional
+            Initial index.
+        custom_resSeqs : [int] or None, optional
+            A list of custom resSeqs. If None, residues are renumbered sequentially.
+        custom_iCodes : [str] or None, optional
+            A list of custom iCodes. If None, residues are renumbered sequentially.
+        """
         if custom_resSeqs is None:
-            custom_resSeqs = [start + i for i in range(self.numberOfResidues)]
+            custom_resSeqs = _np.arange(start, start + self.numberOfResidues)
         if custom_iCodes is None:
             custom_iCodes = [" "] * len(custom_resSeqs)
         if not len(custom_resSeqs) == len(custom_iCodes) == self.numberOfResidues:
             raise ValueError("Custom number of residues does not match chain number of residues")
+        custom_resSeqs, custom_iCodes = list(custom_resSeqs), list(custom_iCodes)
 
-        unsorted_nonmissing_residues = [res for chain in self for res in chain]
-        all_sorted_residues = PDB.sortResidueList(unsorted_nonmissing_residues + self.missing_residues)
-        missing_residues_indices = [i for i, x in enumerate(all_sorted_residues) if x in self.missing_residues]
-        nonmissing_residues_indices = list({i for i in range(self.numberOfResidues)} - set(missing_residues_indices))
+        # a single stable sort of all residues followed by all missing residues
+        n_residues = self._table.count("residue")
+        old = {name: self._table.levelColumn("residue", name).tolist() for name in ["chainID", "resSeq", "iCode"]}
+        keys = [_np.array(old[name] + [getattr(x, name) for x in self.missing_residues])
+                for name in ["chainID", "resSeq", "iCode"]]
+        order = _np.lexsort(keys[::-1])
+        missing = order >= n_residues
+        missing_indices, nonmissing_indices = _np.flatnonzero(missing), _np.flatnonzero(~missing)
 
         # update missing residues
-        for i, residue in enumerate(self.missing_residues):
-            idx = missing_residues_indices[i]
+        for residue, idx in zip(self.missing_residues, missing_indices.tolist()):
             residue.resSeq, residue.iCode = custom_resSeqs[idx], custom_iCodes[idx]
 
         # update all other residues
-        number_dict = {}
-        for i, residue in enumerate(unsorted_nonmissing_residues):
-            idx = nonmissing_residues_indices[i]
-            number_dict[(residue.resSeq, residue.iCode)] = (custom_resSeqs[idx], custom_iCodes[idx])
-            residue.resSeq, residue.iCode = custom_resSeqs[idx], custom_iCodes[idx]
+        new_resSeqs = [custom_resSeqs[idx] for idx in nonmissing_indices.tolist()]
+        new_iCodes = [custom_iCodes[idx] for idx in nonmissing_indices.tolist()]
+        number_dict = dict(zip(zip(old["resSeq"], old["iCode"]), zip(new_resSeqs, new_iCodes)))
+        self._setResidueNumbers(_np.arange(n_residues), Atom._validateMany("resSeq", new_resSeqs),
+                                Atom._validateMany("iCode", new_iCodes))
 
         # update missing atoms
         for atom in self.missing_atoms:
@@ -301,62 +969,78 @@ class PDB(Chain, _CondList.ConditionalList):
     def purgeAtoms(self, atoms):
         raise NotImplementedError("Inherited function not implemented for object of type 'PDB'")
 
-    def purgeEmpty(self):
-        for chain in self:
-            chain.purgeEmpty()
+    def _position(self):
+        return None
+
+    def _rowRange(self):
+        return 0, len(self._table)
 
+    def _checkChild(self, child):
+        pass
+
+    def purgeEmpty(self):
+        n_atoms = _np.diff(self._table.offsets("residue"))
+        self._table.delete("residue", _np.flatnonzero(n_atoms == 0))
         Chain.purgeEmpty(self)
 
     def purgeResidues(self, residues, mode):
-        assert mode in ["keep", "discard"]
-
-        if self.missing_atoms:
-            data_residues = [(x.resName, x.chainID, x.resSeq, x.iCode) for x in residues]
-            data_missing_atoms = [(x.resName, x.chainID, x.resSeq, x.iCode) for x in self.missing_atoms]
-            if mode == "keep":
-                self.missing_atoms = [self.missing_atoms[i] for i in range(len(self.missing_atoms))
-                                      if data_missing_atoms[i] in data_residues]
-            else:
-                self.missing_atoms = [self.missing_atoms[i] for i in range(len(self.missing_atoms))
-                                      if data_missing_atoms[i] not in data_residues]
+        """
+        Removes or keeps the selected residues and updates the header records accordingly.
 
-        for name in ["missing_residues", "modified_residues", "site_residues"]:
-            if mode == "keep":
-                setattr(self, name, [item for item in getattr(self, name) if item in residues])
-            else:
-                setattr(self, name, [item for item in getattr(self, name) if item not in residues])
+        Parameters
+        ----------
+        residues : ProtoCaller.IO.PDB.Selection.Selection or [ProtoCaller.IO.PDB.Residue.Residue]
+            Residues to be removed or kept. Selections are matched exactly, while residues in a list are matched by
+            their identifiers.
+        mode : str
+            One of "keep" and "discard" - either keeps only the selection or discards the latter.
+        """
+        assert mode in ["keep", "discard"]
+        if isinstance(residues, Selection):
+            positions = Selection.fromElements(self, residues, "residue").positions()
+            columns = [self._table.levelColumn("residue", x)[positions].tolist() for x in Residue._common_properties]
+            identifiers = {(resName, chainID, resSeq, iCode) for chainID, resName, resSeq, iCode in zip(*columns)}
+            remove = _np.ones(self._table.count("residue"), dtype=bool)
+            remove[positions] = False
+            if mode == "discard":
+                remove = ~remove
+        else:
+            residues = list(residues)
+            # residues are matched by their identifiers, the same as with the == operator
+            identifiers = {(x.resName, x.chainID, x.resSeq, x.iCode) for x in residues}
+            remove = self._residueMask(residues, mode, 0, self._table.count("residue"))
 
-        for i in reversed(range(len(self.disulfide_bonds))):
-            if mode == "keep":
-                if self.disulfide_bonds[i][0] not in residues or self.disulfide_bonds[i][1] not in residues:
-                    del self.disulfide_bonds[i]
-            else:
-                if self.disulfide_bonds[i][0] in residues or self.disulfide_bonds[i][1] in residues:
-                    del self.disulfide_bonds[i]
+        keep = mode == "keep"
+        # whether a header record is conserved
+        selected = lambda x: ((x.resName, x.chainID, x.resSeq, x.iCode) in identifiers) == keep
+        for name in ["missing_atoms", "missing_residues", "modified_residues", "site_residues"]:
+            setattr(self, name, [item for item in getattr(self, name) if selected(item)])
+        self.disulfide_bonds[:] = [x for x in self.disulfide_bonds if selected(x[0]) and selected(x[1])]
 
-        for chain in self:
-            chain.purgeResidues([residue for residue in residues if residue in chain], mode=mode)
+        self._table.delete("residue", remove)
         self.purgeEmpty()
 
     @property
     def sequence(self):
         """str: Returns the single-character sequence of all amino acids in
                 the protein."""
-        try:
-            residues = self.totalResidueList()
-            seq = {}
-            for res in residues:
-                if res.chainID not in seq.keys():
-                    seq[res.chainID] = []
-                seq[res.chainID] += [res.sequence]
-            seq = "/".join(["".join(seq[k]) for k in sorted(seq.keys())])
-        except:
-            seq = ""
-        return seq
+        def sequence():
+            try:
+                residues = self.totalResidueList()
+                seq = {}
+                for res in residues:
+                    if res.chainID not in seq.keys():
+                        seq[res.chainID] = []
+                    seq[res.chainID] += [res.sequence]
+                return "/".join(["".join(seq[k]) for k in sorted(seq.keys())])
+            except:
+                return ""
+        return self._table.derived("sequence", sequence, key=self._missingResiduesKey())
 
     def totalResidueList(self, sort=True):
         """
-        Returns only missing and non-missing residues with no HETATM molecules.
+        Returns only missing and non-missing residues with no HETATM molecules. The list is cached until the structure,
+        any atom property apart from the coordinates or the missing residues change.
 
         Parameters
         ----------
@@ -368,10 +1052,24 @@ class PDB(Chain, _CondList.ConditionalList):
         total_res : [ProtoCaller.IO.PDB.Residue.Residue]
             All residues in the PDB file.
         """
-        total_res = self.missing_residues + self.filter("type in ['amino_acid', 'amino_acid_modified']")
-        if sort:
-            PDB.sortResidueList(total_res)
-        return total_res
+        def totalResidueList():
+            selection = self.filter("type in ['amino_acid', 'amino_acid_modified']")
+            total_res = self.missing_residues + list(selection)
+            if not sort:
+                return total_res
+            # the sort keys of the residues in the table are read from the columns at once, which is identical to
+            # sortResidueList() but avoids three attribute lookups per residue
+            keys = [(x.chainID, x.resSeq, x.iCode) for x in self.missing_residues]
+            keys += zip(*[self._table.levelColumn("residue", name)[selection.positions()].tolist()
+                          for name in ["chainID", "resSeq", "iCode"]])
+            return [total_res[i] for i in sorted(range(len(total_res)), key=keys.__getitem__)]
+        return list(self._table.derived(("totalResidueList", sort), totalResidueList,
+                                        key=self._missingResiduesKey()))
+
+    def _missingResiduesKey(self):
+        """tuple: Returns the modification stamps of the list of missing residues and of the latest change to any
+        missing residue. Quantities which depend on the missing residues are recomputed whenever this changes."""
+        return self._missing_residues.modification, MissingResidue._last_modification
 
     @staticmethod
     def sortResidueList(residuelist):
@@ -381,3 +1079,9 @@ class PDB(Chain, _CondList.ConditionalList):
         sortingfunc = lambda res: (res.chainID, res.resSeq, res.iCode)
         residuelist.sort(key=sortingfunc)
         return residuelist
+
+
+def _loadArrays(filename, cache):
+    """dict: Reads a PDB or mmCIF file and returns it as plain arrays. Used by the worker processes of
+    PDB.loadMany()."""
+    return PDB(filename, cache=cache).toArrays()
@@ -1,3 +1,7 @@
+import contextlib as _contextlib
+import copy as _copy
+
+
 class ConditionalList(list):
     """
     A class that conditionally accepts new elements based on user-defined functions.
@@ -13,36 +17,110 @@ class ConditionalList(list):
         A callable which optionally transforms the input after the checks and before addition to the list.
     """
     def __init__(self, input_list, *checkfuncs, transformfunc=None):
-        if checkfuncs is None: checkfuncs = []
-        if not isinstance(input_list, list):
-            input_list = [input_list]
         for checkfunc in checkfuncs:
             if not hasattr(checkfunc, "__call__"):
                 raise TypeError("Need to pass a callable function as a parameter")
-            for item in input_list:
-                checkfunc(item)
-        if transformfunc is not None:
-            input_list = [transformfunc(x) for x in input_list]
-        list.__init__(self, input_list)
         self._checkfuncs = list(checkfuncs)
         self._transformfunc = transformfunc
+        self.__dict__.setdefault("_trusted", 0)
+        if not isinstance(input_list, list):
+            input_list = [input_list]
+        list.__init__(self, self._validateAll(input_list))
+
+    @classmethod
+    def fromTrusted(cls, input_list, *args, **kwargs):
+        """
+        Creates a list from elements which are known to be valid, without running any checks or transformations on
+        them. Elements which are added later are checked as usual.
+
+        Parameters
+        ----------
+        input_list : list
+            The elements of the list.
+        args
+            Further positional arguments to be passed to the constructor.
+        kwargs
+            Further keyword arguments to be passed to the constructor.
+
+        Returns
+        -------
+        conditional_list : ProtoCaller.Utils.ConditionalList.ConditionalList
+            The resulting list.
+        """
+        obj = cls.__new__(cls)
+        obj._trusted = 1
+        cls.__init__(obj, input_list, *args, **kwargs)
+        obj._trusted = 0
+        return obj
+
+    @_contextlib.contextmanager
+    def trusted(self):
+        """
+        A context manager in which elements are added without any checks or transformations, e.g. when copying
+        elements from another list with the same conditions. The caller is responsible for their validity.
+        """
+        self._trusted += 1
+        try:
+            yield self
+        finally:
+            self._trusted -= 1
 
-    def __getattribute__(self, item):
-        if item in ["__add__", "__iadd__", "append", "extend", "insert", "remove"]:
-            return self._check(super().__getattribute__(item))
-        return super().__getattribute__(item)
-
-    def _check(self, listfunc):
-        def decorated(*args):
-            if self:
-                items = args[-1]
-                if not isinstance(items, list):
-                    items = [items]
-                for checkfunc in self._checkfuncs:
-                    for item in items:
-                        checkfunc(item)
-                if self._transformfunc is not None:
-                    items = [self._transformfunc(x) for x in items]
-                    return listfunc(*args[:-1], items)
-            return listfunc(*args)
-        return decorated
+    def copy(self):
+        """
+        Returns a shallow copy with the same type and conditions. The elements are already valid, so they are added
+        through trusted() instead of being checked and transformed again.
+        """
+        obj = self.__class__.__new__(self.__class__)
+        obj.__dict__.update(self.__dict__, _trusted=0)
+        with obj.trusted():
+            obj.extend(self)
+        return obj
+
+    def __copy__(self):
+        return self.copy()
+
+    def __deepcopy__(self, memo):
+        obj = self.__class__.__new__(self.__class__)
+        memo[id(self)] = obj
+        obj.__dict__.update(_copy.deepcopy(self.__dict__, memo), _trusted=0)
+        with obj.trusted():
+            obj.extend(_copy.deepcopy(list(self), memo))
+        return obj
+
+    def __add__(self, other):
+        return list.__add__(self, self._validateAll(other))
+
+    def __iadd__(self, other):
+        list.extend(self, self._validateAll(other))
+        return self
+
+    def append(self, item):
+        list.append(self, self._validate(item))
+
+    def extend(self, items):
+        list.extend(self, self._validateAll(items))
+
+    def insert(self, index, item):
+        list.insert(self, index, self._validate(item))
+
+    def remove(self, item):
+        list.remove(self, self._validate(item))
+
+    def _validate(self, item):
+        """Checks and transforms a single element."""
+        if self._trusted:
+            return item
+        for checkfunc in self._checkfuncs:
+            checkfunc(item)
+        return item if self._transformfunc is None else self._transformfunc(item)
+
+    def _validateAll(self, items):
+        """Checks all elements of a batch before transforming any of them, so that no element is added if any of
+        them is invalid."""
+        items = list(items)
+        if self._trusted:
+            return items
+        for checkfunc in self._checkfuncs:
+            for item in items:
+                checkfunc(item)
+        return items if self._transformfunc is None else [self._transformfunc(x) for x in items]
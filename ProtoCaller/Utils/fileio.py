@@ -1,7 +1,13 @@
 import atexit as _atexit
+import bz2 as _bz2
+import gzip as _gzip
+import lzma as _lzma
 import os as _os
 import shutil as _shutil
 
+# functions which open the supported compressed formats, keyed by file extension
+_COMPRESSIONS = {".gz": _gzip.open, ".bz2": _bz2.open, ".xz": _lzma.open}
+
 
 class Dir:
     """
@@ -102,3 +108,50 @@ def checkFileExists(files):
         raise ValueError("File(s) {} do(es) not exist. Please provide valid filename(s).".format(files))
 
     return files[0] if single_file else files
+
+
+def splitCompression(filename):
+    """
+    Splits the extension of a supported compression format (gzip, bzip2 or xz) from a filename.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the file.
+
+    Returns
+    -------
+    filename : str
+        The filename without the compression extension, e.g. "1bji.pdb" for "1bji.pdb.gz".
+    compression : str
+        The compression extension, e.g. ".gz", or an empty string for uncompressed files.
+    """
+    base, extension = _os.path.splitext(filename)
+    if extension.lower() in _COMPRESSIONS:
+        return base, extension.lower()
+    return filename, ""
+
+
+def openFile(filename, mode="r"):
+    """
+    Opens a file which can be compressed with gzip, bzip2 or xz, depending on its extension. Compressed files are
+    decompressed while reading or compressed while writing without creating any intermediate files.
+
+    Parameters
+    ----------
+    filename : str
+        Name of the file.
+    mode : str
+        The mode in which the file is opened. Text mode is the default, as with the built-in open().
+
+    Returns
+    -------
+    file : file
+        The open file handle.
+    """
+    compression = splitCompression(filename)[1]
+    if not compression:
+        return open(filename, mode)
+    if "b" not in mode and "t" not in mode:
+        mode += "t"
+    return _COMPRESSIONS[compression](filename, mode)
@@ -80,24 +80,20 @@ class PDBDownloader:
         if self._ligands:
             return self._ligands
 
-        pdb_obj = _PDB.PDB(self.getPDB())
-        matches = []
         full_ligand_names = []
         urls = []
-        for chain in pdb_obj:
-            for residue in chain:
-                if isinstance(residue, _PDB.Residue):
-                    type = _PC.RESIDUETYPE(residue.resName)
-                    if any([x in type for x in ["cofactor", "ligand"]]):
-                        matches += [residue]
-                        full_ligand_names += ["{}_{}_{}_{}{}_NO_H".format(
-                            self.code.lower(), residue.resName, residue.chainID, residue.resSeq, residue.iCode.strip())]
-                        url = f"https://models.rcsb.org/v1/{self.code.lower()}/ligand?auth_asym_id={residue.chainID}&" \
-                              f"label_comp_id={residue.resName}&auth_seq_id={residue.resSeq}&encoding=sdf&" \
-                              f"copy_all_categories=false"
-                        if len(residue.iCode.strip()):
-                            url += f"&pdbx_PDB_ins_code={residue.iCode}"
-                        urls += [url]
+        for atoms in _PDB.iterResidues(self.getPDB()):
+            residue = atoms[0]
+            type = _PC.RESIDUETYPE(residue.resName)
+            if any([x in type for x in ["cofactor", "ligand"]]):
+                full_ligand_names += ["{}_{}_{}_{}{}_NO_H".format(
+                    self.code.lower(), residue.resName, residue.chainID, residue.resSeq, residue.iCode.strip())]
+                url = f"https://models.rcsb.org/v1/{self.code.lower()}/ligand?auth_asym_id={residue.chainID}&" \
+                      f"label_comp_id={residue.resName}&auth_seq_id={residue.resSeq}&encoding=sdf&" \
+                      f"copy_all_categories=false"
+                if len(residue.iCode.strip()):
+                    url += f"&pdbx_PDB_ins_code={residue.iCode}"
+                urls += [url]
 
         filename_list = []
         _logging.info("Downloading ligand files from the Protein Data Bank...")
@@ -121,25 +117,30 @@ class PDBDownloader:
 
     def getPDB(self):
         """
-        Downloads the PDB file from the Protein Data Bank.
+        Downloads the PDB file from the Protein Data Bank. Large assemblies which are not available in the legacy PDB
+        format are downloaded as mmCIF files instead.
 
         Returns
         -------
         pdb : str
-            Returns the absolute path to the PDB file downloaded from the Protein Data Bank.
+            Returns the absolute path to the PDB or mmCIF file downloaded from the Protein Data Bank.
         """
         if self._pdb:
             return self._pdb
 
-        pdb_url = "https://files.rcsb.org/download/{}.pdb".format(self.code.upper())
-        pdb_filename = self._code + ".pdb"
-        try:
-            r = _requests.get(pdb_url)
-            with open(pdb_filename, "wb") as f:
-                f.write(r.content)
-            self._pdb = _os.path.abspath(pdb_filename)
-        except _requests.HTTPError:
-            _logging.warning("Could not download file: %s from %s" % (pdb_filename, pdb_url))
+        for extension in [".pdb", ".cif"]:
+            pdb_url = "https://files.rcsb.org/download/{}{}".format(self.code.upper(), extension)
+            pdb_filename = self._code + extension
+            try:
+                r = _requests.get(pdb_url)
+                r.raise_for_status()
+                with open(pdb_filename, "wb") as f:
+                    f.write(r.content)
+                self._pdb = _os.path.abspath(pdb_filename)
+                break
+            except _requests.HTTPError:
+                _logging.warning("Could not download file: %s from %s" % (pdb_filename, pdb_url))
+        else:
             return -1
 
         return self._pdb
@@ -1,9 +1,7 @@
-import copy as _copy
 import logging as _logging
 import os as _os
 import tarfile as _tarfile
 import time as _time
-import warnings as _warnings
 
 from selenium.common import exceptions as _exceptions
 from selenium.webdriver.firefox import options as _options
@@ -13,7 +11,8 @@ from selenium.webdriver.support import wait as _wait
 import seleniumrequests as _seleniumrequests
 
 import ProtoCaller as _PC
-from ProtoCaller.IO.PDB import PDB as _PDB
+from ProtoCaller.IO.PDB import PDB as _PDB, \
+    ResidueAlignment as _ResidueAlignment
 
 __all__ = ["PDBReader", "ligandReader", "charmmguiTransform"]
 
@@ -187,8 +186,9 @@ def charmmguiTransform(filename, **kwargs):
 
     Parameters
     ----------
-    filename : str
-        Name of the input PDB file.
+    filename : str or ProtoCaller.IO.PDB.PDB
+        Name of the input PDB file or the corresponding object, which is then
+        fixed in place instead of being re-read from its file.
     kwargs
         Keyword arguments to be passed to PDBReader.
 
@@ -197,6 +197,10 @@ def charmmguiTransform(filename, **kwargs):
     filename_output : str
         Absolute path to the modified file.
     """
+    pdb_original = filename if isinstance(filename, _PDB) else None
+    if pdb_original is not None:
+        filename = pdb_original.filename
+
     tgz = _tarfile.open(PDBReader(filename, **kwargs), "r:gz")
     paths = []
     for member in tgz:
@@ -221,7 +225,9 @@ def charmmguiTransform(filename, **kwargs):
         pdb_obj += pdb_add
 
     filename_output = _os.path.splitext(filename)[0] + "_charmmgui.pdb"
-    return fixCharmmguiPDB(pdb_obj, filename, filename_output=filename_output)
+    return fixCharmmguiPDB(pdb_obj,
+                           filename if pdb_original is None else pdb_original,
+                           filename_output=filename_output)
 
 
 def fixCharmmguiPDB(pdb_modified, filename_original, filename_output=None):
@@ -232,8 +238,9 @@ def fixCharmmguiPDB(pdb_modified, filename_original, filename_output=None):
     ----------
     pdb_modified : ProtoCaller.IO.PDB.PDB
         PDB object containing all fixed residues created by CHARMM-GUI.
-    filename_original : str
-        Name of the original PDB file.
+    filename_original : str or ProtoCaller.IO.PDB.PDB
+        Name of the original PDB file or the corresponding object, which is
+        then fixed in place.
     filename_output : str
         Name of the fixed output PDB file.
 
@@ -243,31 +250,14 @@ def fixCharmmguiPDB(pdb_modified, filename_original, filename_output=None):
         The absolute path to the fixed output PDB file.
     """
 
-    pdb_original = _PDB(filename_original)
-
-    for miss_res in pdb_original.missing_residues:
-        filter = "chainID=='{}'&resSeq=={}&iCode=='{}'".format(
-            miss_res.chainID, miss_res.resSeq, miss_res.iCode)
-        fixed_res = _copy.copy(pdb_modified.filter(filter)[0])
-        fixed_res.chainID = miss_res.chainID
-        fixed_res.resSeq = miss_res.resSeq
-        if fixed_res.resName != miss_res.resName:
-            _warnings.warn("Mismatch between original residue name ({}) "
-                           "and the residue name output by CHARMM-GUI ({}) in "
-                           "chain {}, residue number {}.".format(
-                miss_res.resName, fixed_res.resName,
-                miss_res.chainID, miss_res.resSeq))
-        chain = pdb_original.filter("chainID=='{}'".format(miss_res.chainID),
-                                    type="chains")[0]
-
-        if miss_res > chain[-1]:
-            chain.append(fixed_res)
-        else:
-            for i, res in enumerate(chain):
-                if res > miss_res:
-                    chain.insert(i, fixed_res)
-                    break
-    pdb_original.missing_residues = []
+    pdb_original = filename_original \
+        if isinstance(filename_original, _PDB) else _PDB(filename_original)
+
+    alignment = _ResidueAlignment(pdb_original.missing_residues,
+                                  [residue for chain in pdb_modified
+                                   for residue in chain],
+                                  by="number", source="CHARMM-GUI")
+    alignment.fillMissingResidues(pdb_original)
 
     pdb_original.reNumberAtoms()
     pdb_original.reNumberResidues()
@@ -275,4 +265,6 @@ def fixCharmmguiPDB(pdb_modified, filename_original, filename_output=None):
         filename_output = _os.path.splitext(pdb_original.filename)[0] + \
                           "_modified.pdb"
 
-    return pdb_original.writePDB(filename_output)
+    # the object now corresponds to the fixed file
+    pdb_original.filename = pdb_original.writePDB(filename_output)
+    return pdb_original.filename
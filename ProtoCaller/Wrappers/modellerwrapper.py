@@ -4,7 +4,6 @@ if not _PC.MODELLER:
     raise ImportError("BioSimSpace module cannot be imported")
 
 from contextlib import redirect_stdout as _redirect_stdout
-import copy as _copy
 import logging as _logging
 import os as _os
 import re as _re
@@ -24,7 +23,8 @@ class MyLoop(_modellerautomodel.loopmodel):
     def __init__(self, filename=None, *args, **kwargs):
         super(MyLoop, self).__init__(*args, **kwargs)
         if filename is not None:
-            self.pdb = _IO.PDB.PDB(filename)
+            self.pdb = filename if isinstance(filename, _IO.PDB.PDB) \
+                else _IO.PDB.PDB(filename)
             self.total_residue_list = self.pdb.totalResidueList()
             self.transformed_total_residue_list = self._transform_id(self.total_residue_list)
             self.transformed_missing_residue_list = [self.transformed_total_residue_list[i]
@@ -64,8 +64,9 @@ def modellerTransform(filename_pdb, filename_fasta, add_missing_atoms,
 
     Parameters
     ----------
-    filename_pdb : str
-        Name of the input PDB file.
+    filename_pdb : str or ProtoCaller.IO.PDB.PDB
+        Name of the input PDB file or the corresponding object, which is then
+        fixed in place instead of being re-read from its file.
     filename_fasta : str
         Name of the input sequence FASTA file.
     add_missing_atoms : bool
@@ -81,6 +82,11 @@ def modellerTransform(filename_pdb, filename_fasta, add_missing_atoms,
     filename_output : str
         Absolute path to the modified file.
     """
+    pdb_original = filename_pdb \
+        if isinstance(filename_pdb, _IO.PDB.PDB) else None
+    if pdb_original is not None:
+        filename_pdb = pdb_original.filename
+
     if not pdb_code:
         pdb_code = _os.path.splitext(_os.path.basename(filename_pdb))[0]
     _logging.basicConfig(stream=_sys.stdout)
@@ -96,7 +102,8 @@ def modellerTransform(filename_pdb, filename_fasta, add_missing_atoms,
         m = MyLoop(env=env,
                    alnfile=filename_pir,
                    knowns="PROT",
-                   filename=filename_pdb,
+                   filename=filename_pdb if pdb_original is None
+                   else pdb_original,
                    sequence=pdb_code.upper(),  # code of the target
                    loop_assess_methods=_modeller.automodel.assess.DOPE)
 
@@ -141,7 +148,7 @@ def FASTA2PIR(filename_pdb, filename_fasta):
     filename_output : str
         Name of the output PIR file.
     """
-    sequence = _IO.PDB.PDB(filename_pdb).sequence.replace("/", "-")
+    sequence = _IO.PDB.readSequence(filename_pdb).replace("/", "-")
     sequence_lines = [sequence[i:i+80] for i in range(0, len(sequence), 80)]
     file = open(filename_fasta).readlines()
     pdb_code = ""
@@ -204,41 +211,17 @@ def fixModellerPDB(model, add_missing_atoms, filename_output=None):
 
     pdb_modified = _IO.PDB.PDB(filename_modified)
 
-    all_res_mod = pdb_modified.totalResidueList()
-    all_res_orig = model.pdb.totalResidueList()
-    if len(all_res_orig) != len(all_res_mod):
-        raise ValueError("Mismatch between original number of residues ({}) "
-                         "and number of residues output by Modeller ({}).".
-                         format(len(all_res_orig), len(all_res_mod)))
-
-    for miss_res in model.pdb.missing_residues:
-        fixed_res = _copy.copy(all_res_mod[all_res_orig.index(miss_res)])
-        fixed_res.chainID = miss_res.chainID
-        fixed_res.resSeq = miss_res.resSeq
-        if fixed_res.resName != miss_res.resName:
-            _warnings.warn("Mismatch between original residue name ({}) "
-                           "and the residue name output by Modeller ({}) in "
-                           "chain {}, residue number {}.".format(
-                           miss_res.resName, fixed_res.resName,
-                           miss_res.chainID, miss_res.resSeq))
-        chain = model.pdb.filter("chainID=='{}'".format(miss_res.chainID),
-                                 type="chains")[0]
-
-        if miss_res > chain[-1]:
-            chain.append(fixed_res)
-        else:
-            for i, res in enumerate(chain):
-                if res > miss_res:
-                    chain.insert(i, fixed_res)
-                    break
-    model.pdb.missing_residues = []
+    alignment = _IO.PDB.ResidueAlignment(model.pdb.totalResidueList(),
+                                         pdb_modified.totalResidueList(),
+                                         source="Modeller")
+    alignment.fillMissingResidues(model.pdb)
 
     if add_missing_atoms:
-        for missing_atom in model.pdb.missing_atoms:
-            filter = "chainID=='{}'&resSeq=={}&iCode=='{}'".format(
-                missing_atom.chainID, missing_atom.resSeq, missing_atom.iCode)
-            res = model.pdb.filter(filter)[0]
-            fixed_res = all_res_mod[all_res_orig.index(res)]
+        residues = [model.pdb.residue(x.chainID, x.resSeq, x.iCode)
+                    for x in model.pdb.missing_atoms]
+        for missing_atom, res, fixed_res in zip(model.pdb.missing_atoms,
+                                                residues,
+                                                alignment.match(residues)):
             fixed_res.chainID = missing_atom.chainID
             fixed_res.resSeq = missing_atom.resSeq
             res.__init__(fixed_res)
@@ -250,4 +233,6 @@ def fixModellerPDB(model, add_missing_atoms, filename_output=None):
         filename_output = _os.path.splitext(model.pdb.filename)[0] + \
                           "_modified.pdb"
 
-    return model.pdb.writePDB(filename_output)
+    # the object now corresponds to the fixed file
+    model.pdb.filename = model.pdb.writePDB(filename_output)
+    return model.pdb.filename
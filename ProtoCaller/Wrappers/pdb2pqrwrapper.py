@@ -4,7 +4,8 @@
 import os as _os
 import warnings as _warnings
 
-from ProtoCaller.IO.PDB import PDB as _PDB
+from ProtoCaller.IO.PDB import PDB as _PDB, \
+    ResidueAlignment as _ResidueAlignment
 from ProtoCaller.Utils.runexternal import runExternal as _runExternal
 
 __all__ = ["pdb2pqrTransform"]
@@ -16,8 +17,9 @@ def pdb2pqrTransform(filename, pdb2pqr_executable="pdb2pqr30", **kwargs):
 
     Parameters
     ----------
-    filename : str
-        Name of input file.
+    filename : str or ProtoCaller.IO.PDB.PDB
+        Name of input file or the corresponding object, which is then fixed in
+        place instead of being re-read from its file.
     pdb2pqr_executable : str
         Name or path to the pdb2pqr executable.
     kwargs:
@@ -40,6 +42,9 @@ def pdb2pqrTransform(filename, pdb2pqr_executable="pdb2pqr30", **kwargs):
     }
 
     default_kwargs = {**default_kwargs, **kwargs}
+    pdb_original = filename if isinstance(filename, _PDB) else None
+    if pdb_original is not None:
+        filename = pdb_original.filename
     filename_output = _os.path.splitext(filename)[0] + "_pdb2pqr.pdb"
     command = f"{pdb2pqr_executable} {filename} {filename_output}"
     for k, v in default_kwargs.items():
@@ -49,7 +54,9 @@ def pdb2pqrTransform(filename, pdb2pqr_executable="pdb2pqr30", **kwargs):
             command += f" {v}"
     _runExternal(command, procname="PDB2PQR")
 
-    return fixPdb2pqrPDB(filename_output, filename, filename_output)
+    return fixPdb2pqrPDB(filename_output,
+                         filename if pdb_original is None else pdb_original,
+                         filename_output)
 
 
 def fixPdb2pqrPDB(filename_modified, filename_original, filename_output=None):
@@ -60,8 +67,9 @@ def fixPdb2pqrPDB(filename_modified, filename_original, filename_output=None):
     ----------
     filename_modified : str
         Name of the modified PDB file.
-    filename_original : str
-        Name of the original PDB file.
+    filename_original : str or ProtoCaller.IO.PDB.PDB
+        Name of the original PDB file or the corresponding object, which is
+        then fixed in place.
     filename_output : str
         Name of the fixed output PDB file.
 
@@ -70,13 +78,15 @@ def fixPdb2pqrPDB(filename_modified, filename_original, filename_output=None):
     filename_output : str
         The absolute path to the fixed output PDB file.
     """
-    pdb_original = _PDB(filename_original)
+    pdb_original = filename_original \
+        if isinstance(filename_original, _PDB) else _PDB(filename_original)
     pqr_modified = _PDB(filename_modified)
 
-    for res_orig in pdb_original.filter("type=='amino_acid'"):
-        filter = "chainID=='{}'&resSeq=={}&iCode=='{}'".format(
-            res_orig.chainID, res_orig.resSeq, res_orig.iCode)
-        res_mod = pqr_modified.filter(filter)[0]
+    residues = list(pdb_original.filter("type=='amino_acid'"))
+    alignment = _ResidueAlignment(residues, [residue for chain in pqr_modified
+                                             for residue in chain],
+                                  by="number", source="PDB2PQR")
+    for res_orig, res_mod in zip(residues, alignment.match(residues)):
         res_orig.clear()
         res_orig.__init__(res_mod)
         for atom in res_orig:
@@ -98,4 +108,6 @@ def fixPdb2pqrPDB(filename_modified, filename_original, filename_output=None):
         filename_output = _os.path.splitext(pdb_original.filename)[0] + \
                           "_modified.pdb"
 
-    return pdb_original.writePDB(filename_output)
+    # the object now corresponds to the fixed file
+    pdb_original.filename = pdb_original.writePDB(filename_output)
+    return pdb_original.filename
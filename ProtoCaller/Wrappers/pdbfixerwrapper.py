@@ -1,11 +1,10 @@
-import copy as _copy
 import os as _os
-import warnings as _warnings
 
 import pdbfixer as _pdbfix
 from simtk.openmm.app import PDBFile as _PDBFile
 
-from ProtoCaller.IO.PDB import PDB as _PDB
+from ProtoCaller.IO.PDB import PDB as _PDB, \
+    ResidueAlignment as _ResidueAlignment
 
 __all__ = ["pdbfixerTransform"]
 
@@ -17,8 +16,9 @@ def pdbfixerTransform(filename, replace_nonstandard_residues,
 
     Parameters
     ----------
-    filename : str
-        Name of the input PDB file.
+    filename : str or ProtoCaller.IO.PDB.PDB
+        Name of the input PDB file or the corresponding object, which is then
+        fixed in place instead of being re-read from its file.
     replace_nonstandard_residues : bool
         Whether to replace nonstandard residues with their standard equivalents.
     add_missing_residues : bool
@@ -31,6 +31,10 @@ def pdbfixerTransform(filename, replace_nonstandard_residues,
     filename_output : str
         Absolute path to the modified file.
     """
+    pdb_original = filename if isinstance(filename, _PDB) else None
+    if pdb_original is not None:
+        filename = pdb_original.filename
+
     if not replace_nonstandard_residues and not add_missing_atoms \
             and not add_missing_residues:
         return _os.path.abspath(filename)
@@ -57,7 +61,8 @@ def pdbfixerTransform(filename, replace_nonstandard_residues,
     filename_output = _os.path.splitext(filename)[0] + "_pdbfixer.pdb"
     _PDBFile.writeFile(fix.topology, fix.positions, open(filename_output, "w"))
 
-    return fixPDBFixerPDB(filename_output, filename,
+    return fixPDBFixerPDB(filename_output,
+                          filename if pdb_original is None else pdb_original,
                           replace_nonstandard_residues, add_missing_residues,
                           add_missing_atoms, filename_output)
 
@@ -72,8 +77,9 @@ def fixPDBFixerPDB(filename_modified, filename_original,
     ----------
     filename_modified : str
         Name of the modified PDB file.
-    filename_original : str
-        Name of the original PDB file.
+    filename_original : str or ProtoCaller.IO.PDB.PDB
+        Name of the original PDB file or the corresponding object, which is
+        then fixed in place.
     replace_nonstandard_residues : bool
         Whether to replace nonstandard residues with their standard equivalents.
     add_missing_residues : bool
@@ -88,7 +94,8 @@ def fixPDBFixerPDB(filename_modified, filename_original,
     filename_output : str
         The absolute path to the fixed output PDB file.
     """
-    pdb_original = _PDB(filename_original)
+    pdb_original = filename_original \
+        if isinstance(filename_original, _PDB) else _PDB(filename_original)
     pdb_modified = _PDB(filename_modified)
 
     all_res_mod = pdb_modified.totalResidueList()
@@ -96,20 +103,19 @@ def fixPDBFixerPDB(filename_modified, filename_original,
         all_res_orig = pdb_original.totalResidueList()
     else:
         if replace_nonstandard_residues:
-            all_res_orig = pdb_original.filter("type in ['amino_acid', "
-                                               "'amino_acid_modified']")
+            all_res_orig = list(pdb_original.filter("type in ['amino_acid', "
+                                                    "'amino_acid_modified']"))
         else:
-            all_res_orig = pdb_original.filter("type=='amino_acid'")
+            all_res_orig = list(pdb_original.filter("type=='amino_acid'"))
         _PDB.sortResidueList(all_res_orig)
 
-    if len(all_res_orig) != len(all_res_mod):
-        raise ValueError("Mismatch between original number of residues ({}) "
-                         "and number of residues output by PDBFixer ({}).".
-                         format(len(all_res_orig), len(all_res_mod)))
+    alignment = _ResidueAlignment(all_res_orig, all_res_mod,
+                                  source="PDBFixer")
 
     if replace_nonstandard_residues:
-        for mod_res in pdb_original.modified_residues:
-            fixed_res = all_res_mod[all_res_orig.index(mod_res)]
+        modified_residues = pdb_original.modified_residues
+        for mod_res, fixed_res in zip(modified_residues,
+                                      alignment.match(modified_residues)):
             fixed_res.chainID = mod_res.chainID
             fixed_res.resSeq = mod_res.resSeq
             fixed_res.iCode = mod_res.iCode
@@ -118,34 +124,14 @@ def fixPDBFixerPDB(filename_modified, filename_original,
         pdb_original.modified_residues = []
 
     if add_missing_residues:
-        for miss_res in pdb_original.missing_residues:
-            fixed_res = _copy.copy(all_res_mod[all_res_orig.index(miss_res)])
-            fixed_res.chainID = miss_res.chainID
-            fixed_res.resSeq = miss_res.resSeq
-            if fixed_res.resName != miss_res.resName:
-                _warnings.warn("Mismatch between original residue name ({}) "
-                               "and the residue name output by PDBFixer ({}) "
-                               "in chain {}, residue number {}.".format(
-                                miss_res.resName, fixed_res.resName,
-                                miss_res.chainID, miss_res.resSeq))
-            chain = pdb_original.filter("chainID=='{}'".format(
-                miss_res.chainID), type="chains")[0]
-
-            if miss_res > chain[-1]:
-                chain.append(fixed_res)
-            else:
-                for i, res in enumerate(chain):
-                    if res > miss_res:
-                        chain.insert(i, fixed_res)
-                        break
-        pdb_original.missing_residues = []
+        alignment.fillMissingResidues(pdb_original)
 
     if add_missing_atoms:
-        for missing_atom in pdb_original.missing_atoms:
-            filter = "chainID=='{}'&resSeq=={}&iCode=='{}'".format(
-                missing_atom.chainID, missing_atom.resSeq, missing_atom.iCode)
-            res = pdb_original.filter(filter)[0]
-            fixed_res = all_res_mod[all_res_orig.index(res)]
+        residues = [pdb_original.residue(x.chainID, x.resSeq, x.iCode)
+                    for x in pdb_original.missing_atoms]
+        for missing_atom, res, fixed_res in zip(pdb_original.missing_atoms,
+                                                residues,
+                                                alignment.match(residues)):
             fixed_res.chainID = missing_atom.chainID
             fixed_res.resSeq = missing_atom.resSeq
             res.__init__(fixed_res)
@@ -158,4 +144,6 @@ def fixPDBFixerPDB(filename_modified, filename_original,
         filename_output = _os.path.splitext(pdb_original.filename)[0] + \
                           "_modified.pdb"
 
-    return pdb_original.writePDB(filename_output)
+    # the object now corresponds to the fixed file
+    pdb_original.filename = pdb_original.writePDB(filename_output)
+    return pdb_original.filename
@@ -30,7 +30,8 @@ def openFileAsRdkit(filename, **kwargs):
     Parameters
     ----------
     filename:
-        The name of the input file.
+        The name of the input file. Files compressed with gzip, bzip2 or xz
+        are decompressed on the fly.
     kwargs
         Keyword arguments to be supplied to the more specialised RDKit
         functions.
@@ -40,18 +41,33 @@ def openFileAsRdkit(filename, **kwargs):
     mol : rdkit.Chem.rdchem.Mol
         The file loaded as an RDKit Mol object.
     """
-    extension = filename.split(".")[-1].lower()
+    uncompressed, compression = _fileio.splitCompression(filename)
+    extension = uncompressed.split(".")[-1].lower()
 
     func_dict = {
         "mol": _Chem.MolFromMolFile,
         "mol2": _Chem.MolFromMol2File,
         "pdb": _Chem.MolFromPDBFile,
     }
+    # the equivalent functions for compressed files, which are read from memory
+    block_func_dict = {
+        "mol": _Chem.MolFromMolBlock,
+        "mol2": _Chem.MolFromMol2Block,
+        "pdb": _Chem.MolFromPDBBlock,
+    }
 
     if extension in func_dict.keys():
-        mol = func_dict[extension](filename, **kwargs)
+        if compression:
+            with _fileio.openFile(filename) as file:
+                mol = block_func_dict[extension](file.read(), **kwargs)
+        else:
+            mol = func_dict[extension](filename, **kwargs)
     elif extension == "sdf":
-        mol = _Chem.SDMolSupplier(filename, **kwargs)[0]
+        if compression:
+            with _fileio.openFile(filename, "rb") as file:
+                mol = next(_Chem.ForwardSDMolSupplier(file, **kwargs), None)
+        else:
+            mol = _Chem.SDMolSupplier(filename, **kwargs)[0]
     else:
         raise TypeError("Unrecognised input extension for RDKit: {}".format(
             extension))
@@ -3,6 +3,7 @@ import platform as _platform
 import re as _re
 import subprocess as _subprocess
 import sys as _sys
+import types as _types
 import warnings as _warnings
 
 HOMEDIR = _os.path.dirname(_os.path.abspath(__file__))
@@ -55,24 +56,6 @@ _os.environ["SIRE_SILENT_PHONEHOME"] = "1"
 ENGINES = ["GROMACS"]
 
 #identifiers for different chemical groups
-def RESIDUETYPE(res):
-    namesdict = {
-        "water": WATERNAMES,
-        "simple_anion": SIMPLEANIONNAMES,
-        "complex_anion": COMPLEXANIONNAMES,
-        "simple_cation": SIMPLECATIONNAMES,
-        "complex_cation": COMPLEXCATIONNAMES,
-        "amino_acid": AMINOACIDNAMES,
-        "amino_acid_modified": MODIFIEDAMINOACIDNAMES,
-        "cofactor": COFACTORNAMES,
-    }
-
-    res = res.upper().strip()
-    for key, value in namesdict.items():
-        if res in value:
-            return key
-    return "ligand"
-
 WATERNAMES = ["HOH", "WAT", "H2O", "SOL"]
 SIMPLEANIONNAMES = ["CL", "BR", "F", "I"]
 COMPLEXANIONNAMES = ["SO4", "PO4", "CO3"]
@@ -90,6 +73,24 @@ except ImportError:
 
 COFACTORNAMES = ["ATP", "ADP", "GTP", "GDP", "FMN", "FAD", "HEM", "HEME", "NAD", "NAI", "NAP", "NDP"]
 
+# a read-only map from every known residue name to its type, built once. If a name belongs to several groups, the
+# first group takes precedence
+_RESIDUETYPES = {}
+for _type, _names in [("water", WATERNAMES), ("simple_anion", SIMPLEANIONNAMES),
+                      ("complex_anion", COMPLEXANIONNAMES), ("simple_cation", SIMPLECATIONNAMES),
+                      ("complex_cation", COMPLEXCATIONNAMES), ("amino_acid", AMINOACIDNAMES),
+                      ("amino_acid_modified", MODIFIEDAMINOACIDNAMES), ("cofactor", COFACTORNAMES)]:
+    for _name in _names:
+        _RESIDUETYPES.setdefault(_name, _type)
+_RESIDUETYPES = _types.MappingProxyType(_RESIDUETYPES)
+del _type, _names, _name
+
+
+def RESIDUETYPE(res):
+    """str: Returns the type of a residue name: one of the keys of the groups above or "ligand" otherwise."""
+    return _RESIDUETYPES.get(res.upper().strip(), "ligand")
+
+
 AMBERPROTEINFFS = ["ff14SB", "ff14SBonlysc", "ff99SB", "ff15ipq", "ff15ipq-vac", "fb15", "ff03.r1"]
 AMBERLIGANDFFS = ["gaff2", "gaff"]
 AMBERWATERFFS = ["tip3p"]
@@ -105,6 +106,9 @@ WATERFFS = AMBERWATERFFS
 
 HEADLESS_CHARMMGUI = True
 
+# whether parsed PDB files are cached in a binary file next to the original file
+PDBCACHE = False
+
 try:
     import BioSimSpace as _BSS
     BIOSIMSPACE = True
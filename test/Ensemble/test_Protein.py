@@ -1,5 +1,6 @@
 import ProtoCaller as PC
 from ProtoCaller.Ensemble import Protein, Ligand
+import ProtoCaller.IO.PDB as PDB
 from ProtoCaller.Parametrise import Params
 from ProtoCaller.Utils.fileio import Dir
 
@@ -7,6 +8,8 @@ if PC.BIOSIMSPACE:
     import BioSimSpace as BSS
 
 import pytest
+from Bio.Seq import Seq
+from Bio.SeqRecord import SeqRecord
 
 
 def test_prepare_1bji():
@@ -34,3 +37,46 @@ def test_prepare_1bji():
             else:
                 # TODO: add support for ParmEd topologies when the Morph class is fully functional
                 pass
+
+
+def test_trim_terminal_missing_residues_3ZG0():
+    with Dir(PC.TESTDIR + "/shared"):
+        pdb = PDB.PDB("3ZG0.pdb")
+        pdb.missing_residues += [PDB.MissingResidue("ALA", "A", 25), PDB.MissingResidue("ALA", "A", 26),
+                                 PDB.MissingResidue("GLY", "A", 700)]
+        sequences = dict(zip(["A", "B"], pdb.sequence.split("/")))
+        fastas = {chainID: SeqRecord(Seq(sequence), id=chainID) for chainID, sequence in sequences.items()}
+
+        # only the terminal missing residues are removed from the sequences, the gap in chain B is kept
+        missing_residues = Protein._trimTerminalMissingResidues(pdb.totalResidueList(), fastas)
+        assert [(x.chainID, x.resSeq) for x in missing_residues] == [("B", x) for x in range(605, 612)]
+        assert str(fastas["A"].seq) == sequences["A"].strip("-") != sequences["A"]
+        assert str(fastas["B"].seq) == sequences["B"] and sequences["B"].count("-") == 7
+
+
+def test_filter_distance_3ZG0():
+    with Dir(PC.TESTDIR + "/Ensemble"):
+        with Dir("temp", temp=True):
+            pdb = PDB.PDB(PC.TESTDIR + "/shared/3ZG0.pdb")
+            # the reference ligand and the other ligands are taken from the PDB file, so they share its frame
+            files = {}
+            for chainID, resSeq, resName in [("A", 1403, "AI8"), ("A", 1676, "1W8"), ("B", 1676, "1W8")]:
+                files[chainID, resSeq] = pdb.writePDB("3ZG0_{}_{}_{}.pdb".format(resName, chainID, resSeq),
+                                                      selection=[pdb.residue(chainID, resSeq)])
+            ligand_ref = Ligand(files["A", 1403], name="3ZG0_AI8_A_1403", workdir=".", minimise=False)
+            coordinates = ligand_ref.molecule.GetConformer().GetPositions()
+            expected = pdb.filter("type=='water'") & pdb.within(5., of=coordinates)
+
+            # without missing residues no FASTA file is needed
+            pdb.missing_residues = []
+            protein = Protein(pdb_file=pdb.writePDB("3ZG0_complete.pdb"), ligands=[files["A", 1676], files["B", 1676]],
+                              ligand_ref=ligand_ref, name="3ZG0", workdir=".")
+            # 1W8 A1676 is about 56 Angstroms away from the reference ligand and 1W8 B1676 about 64 Angstroms
+            protein.filter(waters=5., ligands=58.)
+            waters = protein.pdb_obj.filter("type=='water'")
+            assert len(expected) == 5
+            assert [(x.chainID, x.resSeq) for x in waters] == [(x.chainID, x.resSeq) for x in expected]
+            assert [x.name for x in protein.ligands] == ["3ZG0_1W8_A_1676"]
+
+            with pytest.raises(ValueError):
+                protein.filter(cofactors="nearby")
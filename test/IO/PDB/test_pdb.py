@@ -2,7 +2,14 @@ import ProtoCaller as PC
 import ProtoCaller.IO.PDB as PDB
 from ProtoCaller.Utils.fileio import Dir
 
+import bz2
 import copy
+import gzip
+import io
+import lzma
+import numpy as np
+import parmed
+import pytest
 import tempfile
 
 
@@ -81,3 +88,642 @@ def test_deepcopy_1bji():
 
         obj2.purgeResidues(obj2.filter("type=='amino_acid'"), mode="keep")
         assert 3067 == obj2.numberOfAtoms != obj.numberOfAtoms
+
+
+def test_table_1bji():
+    with Dir(PC.TESTDIR + "/shared"):
+        obj = PDB.PDB("1bji.pdb")
+        table = obj.table
+
+        assert table.coordinates.shape == (3398, 3)
+        assert obj[0] is obj[0]
+        assert obj[0][0][0].x == table.coordinates[0, 0]
+
+        # views write through to the table
+        obj[0][0].resSeq = 1000
+        assert (table.column("resSeq")[:len(obj[0][0])] == 1000).all()
+
+        # removed residues keep their atoms and can be reinserted
+        residue = obj[0][5]
+        n_atoms = len(residue)
+        obj[0].remove(residue)
+        assert obj.numberOfAtoms == 3398 - n_atoms
+        assert len(residue) == n_atoms
+        obj[0].insert(5, residue)
+        assert obj[0][5] is residue
+        assert obj.numberOfAtoms == 3398
+
+
+def test_filter_1bji():
+    with Dir(PC.TESTDIR + "/shared"):
+        obj = PDB.PDB("1bji.pdb")
+        residues = [residue for chain in obj for residue in chain]
+        atoms = [atom for residue in residues for atom in residue]
+
+        selection = obj.filter("type in ['amino_acid', 'amino_acid_modified']&(resSeq<100|chainID!='A')")
+        assert selection == [x for x in residues if x.type in ["amino_acid", "amino_acid_modified"] and
+                             (x.resSeq < 100 or x.chainID != "A")]
+        assert obj.filter("type!='chain'", type="chains") == [x for x in obj if x.type != "chain"]
+        assert obj.filter("name=='CA'&x>0", type="atoms") == [x for x in atoms if x.name == "CA" and x.x > 0]
+        assert obj.filter("numberOfAtoms>20") == [x for x in residues if x.numberOfAtoms > 20]
+
+        with pytest.raises(ValueError):
+            obj.filter("resSeq=100")
+
+
+def test_categorical_1bji():
+    with Dir(PC.TESTDIR + "/shared"):
+        obj = PDB.PDB("1bji.pdb")
+        table = obj.table
+        lines = table.formatLines()
+        atoms = [atom for chain in obj for residue in chain for atom in residue]
+
+        # string properties are stored as small integer codes into a vocabulary
+        resnames = table.levelCategorical("atom", "resName")
+        assert resnames.codes.dtype == np.int8
+        assert len(resnames.categories) == len(set(x.resName for x in atoms))
+        assert list(table.column("resName")) == [x.resName for x in atoms]
+        assert table.nbytes < 100 * len(table)
+
+        assert obj.filter("resName=='HOH'", type="atoms") == [x for x in atoms if x.resName == "HOH"]
+        assert obj.filter("chainID in ['B', 'C']") == [x for chain in obj for x in chain if x.chainID in ["B", "C"]]
+        assert obj.filter("element!='C'&name<'CB'", type="atoms") == [x for x in atoms if x.element != "C" and
+                                                                        x.name < "CB"]
+
+        # new values extend the vocabulary and values are only decoded on demand
+        resname = obj[0][0].resName
+        obj[0][0].resName = "NEW"
+        assert obj[0][0][0].resName == "NEW"
+        assert obj.filter("resName=='NEW'") == [obj[0][0]]
+        obj[0][0].resName = resname
+        assert table.formatLines() == lines
+
+        # residues with different vocabularies are merged when they are moved between structures
+        other = PDB.PDB("3ZG0.pdb")
+        obj[0].insert(0, other[0][0])
+        residue = obj[0][0]
+        assert residue.resName == "ASP" and residue._table is table
+        assert len(obj.filter("resName=='ASP'", type="atoms")) == \
+               len([x for x in atoms if x.resName == "ASP"]) + len(residue)
+        obj[0].remove(residue)
+        assert table.formatLines() == lines
+
+
+def test_residue_types_1bji():
+    with Dir(PC.TESTDIR + "/shared"):
+        obj = PDB.PDB("1bji.pdb")
+        assert PC.RESIDUETYPE(" hoh") == "water" and PC.RESIDUETYPE("CA") == "simple_cation"
+        assert PC.RESIDUETYPE("XYZ") == "ligand"
+        with pytest.raises(TypeError):
+            PC._RESIDUETYPES["XYZ"] = "cofactor"
+
+        types = obj.table.residueTypes()
+        assert types is obj.table.residueTypes()
+        assert list(types) == [residue.type for chain in obj for residue in chain]
+        assert [chain.type for chain in obj] == ["chain", "molecules"]
+
+        # the cache follows changes of the residue names
+        residue = obj[1][-1]
+        residue.resName = "ATP"
+        assert residue.type == "cofactor"
+        assert residue in obj.filter("type=='cofactor'")
+
+
+def test_derived_1bji(monkeypatch):
+    with Dir(PC.TESTDIR + "/shared"):
+        obj = PDB.PDB("1bji.pdb")
+        residues, sequence = obj.totalResidueList(), obj.sequence
+        assert obj.numberOfResidues == len(residues) + 202 == 590
+
+        # repeated reads do not filter the structure again
+        with monkeypatch.context() as m:
+            m.setattr(PDB.PDB, "filter", None)
+            assert obj.totalResidueList() == residues and obj.totalResidueList() is not residues
+            assert obj.sequence == sequence
+            assert obj[0].type == "chain"
+
+        # any change invalidates the cached values
+        obj[0][0].resName = "HOH"
+        assert obj.sequence == sequence[1:]
+        obj.missing_residues.append(PDB.MissingResidue("ALA", "A", 1))
+        assert obj.totalResidueList()[0].resSeq == 1 and obj.sequence == "-" + sequence[1:]
+        obj.missing_residues[0].resSeq = 10000
+        assert obj.totalResidueList()[-1].resSeq == 10000 and obj.sequence == sequence[1:] + "-"
+        del obj.missing_residues[0]
+        assert obj.sequence == sequence[1:]
+        obj.missing_residues = [PDB.MissingResidue("GLY", "A", 1)]
+        assert obj.sequence == "-" + sequence[1:]
+        obj.purgeResidues(obj.filter("type=='amino_acid'"), "discard")
+        assert obj.sequence == "-" and obj[0].type == "molecules"
+
+
+def test_residue_index_1bji():
+    with Dir(PC.TESTDIR + "/shared"):
+        obj = PDB.PDB("1bji.pdb")
+        residue = obj[0][10]
+
+        assert obj.residue(residue.chainID, residue.resSeq, residue.iCode) is residue
+        assert obj.residue(residue.chainID, str(residue.resSeq)) is residue
+        assert obj.residue("Z", 10000) is None
+        assert all(obj.residue(x.chainID, x.resSeq, x.iCode) is x for x in obj.site_residues)
+
+        # the index follows changes in the residue identifiers
+        residue.resSeq = 10000
+        assert obj.residue(residue.chainID, 10000) is residue
+
+
+def test_renumber_1bji():
+    with Dir(PC.TESTDIR + "/shared"):
+        obj = PDB.PDB("1bji.pdb")
+        obj.missing_residues = [PDB.MissingResidue("ALA", "A", 70), PDB.MissingResidue("SER", "A", 500)]
+        obj.missing_atoms = [PDB.MissingAtoms("ARG", "A", 82, atoms=["CB"])]
+        n_before = len([x for chain in obj for x in chain if (x.chainID, x.resSeq) <= ("A", 500)])
+        obj.reNumberResidues(start=5)
+
+        # the missing residues keep their place when sorted by number
+        assert [(x.resSeq, x.iCode) for x in obj.missing_residues] == [(5, " "), (6 + n_before, " ")]
+        assert (obj[0][0].resSeq, obj[0][-1].resSeq, obj[1][0].resSeq) == (6, 393, 394)
+        assert [(x.resSeq, x.iCode) for x in obj.missing_atoms] == [(6, " ")]
+        assert {atom.resSeq for atom in obj[0][0]} == {6}
+
+        obj[0].reNumberResidues(custom_resSeqs=[1] * len(obj[0]), custom_iCodes=["a"] * len(obj[0]))
+        assert {(x.resSeq, x.iCode) for x in obj[0]} == {(1, "A")}
+        obj.reNumberAtoms(start=10)
+        assert [atom.serial for atom in obj[0][0]][:2] == [10, 11]
+        obj[1][0].reNumberAtoms(start=1)
+        assert [atom.serial for atom in obj[1][0]][:2] == [1, 2]
+
+
+def test_purge_1bji():
+    with Dir(PC.TESTDIR + "/shared"):
+        obj = PDB.PDB("1bji.pdb")
+        residues = [residue for chain in obj for residue in chain]
+        bond = obj.disulfide_bonds[0]
+
+        obj.purgeResidues([bond[0]] + residues[-10:], mode="discard")
+        assert len(obj.disulfide_bonds) == 8
+        assert bond[0] not in obj.site_residues
+        assert sum(len(x) for x in obj) == len(residues) - 11
+
+        residue = obj[0][0]
+        atoms = list(residue)
+        residue.purgeAtoms(atoms[:2], mode="discard")
+        assert list(residue) == atoms[2:]
+        obj[0].purgeAtoms(atoms[2:], mode="keep")
+        assert len(obj[0]) == 1 and list(obj[0][0]) == atoms[2:]
+
+
+def test_alignment_3ZG0():
+    with Dir(PC.TESTDIR + "/shared"):
+        obj, expected = PDB.PDB("3ZG0.pdb"), PDB.PDB("3ZG0.pdb")
+        missing_residues = list(obj.missing_residues)
+        assert len(missing_residues) == 7
+
+        # pretend that an external tool has modelled the missing residues using residues from another structure
+        donors = PDB.PDB("1bji.pdb")[0][:len(missing_residues)]
+        for donor, miss_res in zip(donors, missing_residues):
+            donor.chainID, donor.resSeq, donor.iCode = miss_res.chainID, miss_res.resSeq, miss_res.iCode
+        alignment = PDB.ResidueAlignment(missing_residues, donors, by="number", source="test")
+        assert alignment.unmatched() == []
+        assert len(alignment.renamed()) == sum(x.resName != y.resName for x, y in zip(missing_residues, donors))
+        with pytest.raises(ValueError, match="LYS A9999"):
+            alignment.match([PDB.MissingResidue("LYS", "A", 9999)])
+        with pytest.raises(ValueError, match="Mismatch between original number of residues"):
+            PDB.ResidueAlignment(obj.totalResidueList(), donors)
+
+        # the result is the same as inserting the residues one at a time
+        for miss_res, donor in zip(expected.missing_residues, donors):
+            chain = expected.filter("chainID=='{}'".format(miss_res.chainID), type="chains")[0]
+            if miss_res > chain[-1]:
+                chain.append(donor)
+            else:
+                for i, res in enumerate(chain):
+                    if res > miss_res:
+                        chain.insert(i, donor)
+                        break
+        with pytest.warns(UserWarning, match="residue names output by test"):
+            alignment.fillMissingResidues(obj)
+        assert obj.missing_residues == []
+        assert obj.table.formatLines() == expected.table.formatLines()
+
+
+def test_within_3ZG0():
+    with Dir(PC.TESTDIR + "/shared"):
+        obj = PDB.PDB("3ZG0.pdb")
+        ligand = obj.filter("resName=='AI8'")
+        coordinates = obj.table.coordinates[[atom._position() for residue in ligand for atom in residue]]
+
+        def distance(residue):
+            return min(((coordinates - [atom.x, atom.y, atom.z]) ** 2).sum(axis=1).min() for atom in residue) ** 0.5
+
+        expected = [x for x in obj.filter("type=='water'") if distance(x) <= 4]
+        assert expected
+        assert obj.filter("type=='water'&within(4, of=\"resName=='AI8'\")") == expected
+        assert [x for x in obj.within(4, of=ligand) if x.type == "water"] == expected
+        assert [x for x in obj.within(4, of=coordinates) if x.type == "water"] == expected
+
+        # only a few spatial indices with different cell sizes are kept at once
+        for cutoff in range(2, 12):
+            assert obj.within(cutoff, of=coordinates) == obj.within(np.float32(cutoff), of=coordinates)
+        assert list(obj.table._cache["cellList"]) == [float(x) for x in range(12 - PDB.AtomTable._max_cell_lists, 12)]
+
+        # the spatial index follows changes in the coordinates
+        atom = obj[0][0][0]
+        atom.x = 1000
+        assert obj.within(0.1, of=np.array([[1000, atom.y, atom.z]]), type="atoms") == [atom]
+
+        with pytest.raises(ValueError):
+            obj.filter("within(-1, of=\"resName=='AI8'\")")
+
+
+def test_hetatms_3ZG0():
+    with Dir(PC.TESTDIR + "/shared"):
+        obj = PDB.PDB("3ZG0.pdb")
+        selections, moltypes = obj.partitionHetatms()
+        assert moltypes == ["ligand", "complex_cation", "simple_anion", "water"]
+        assert [{x.type for x in selection} for selection in selections] == [{x} for x in moltypes]
+        assert sum(len(x) for x in selections) == len(list(obj.filter("type!='chain'", type="chains").toLevel(
+            "residue")))
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            filenames, types = obj.writeHetatms(tempdir + "/3ZG0")
+            assert types == moltypes
+            for filename, selection in zip(filenames, selections):
+                assert open(filename).read() == "".join(residue.__str__() for residue in selection)
+
+            # a selection without amino acids has no SEQRES records
+            ligand = obj.residue("A", 1403)
+            filename = obj.writePDB(tempdir + "/ligand.pdb", selection=[ligand])
+            assert "SEQRES" not in open(filename).read()
+            assert [(x.resName, x.chainID, x.resSeq, len(x)) for x in PDB.PDB(filename)[0]] == \
+                [(ligand.resName, "A", 1403, len(ligand))]
+
+
+def test_records_3ZG0():
+    with Dir(PC.TESTDIR + "/shared"):
+        obj = PDB.PDB("3ZG0.pdb")
+        records = list(PDB.iterRecords("3ZG0.pdb"))
+
+        assert sum(isinstance(x, PDB.AtomRecord) for x in records) == obj.numberOfAtoms
+        assert sum(type(x) is PDB.MissingResidue for x in records) == len(obj.missing_residues)
+        assert len(list(PDB.iterResidues("3ZG0.pdb"))) == sum(len(x) for x in obj)
+        assert PDB.readSequence("3ZG0.pdb") == obj.sequence
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            with open("3ZG0.pdb", "rb") as file_in, gzip.open(tempdir + "/3ZG0.pdb.gz", "wb") as file_out:
+                file_out.write(file_in.read())
+            obj_gz = PDB.PDB(tempdir + "/3ZG0.pdb.gz")
+            assert obj_gz.numberOfAtoms == obj.numberOfAtoms
+            assert len(obj_gz.site_residues) == len(obj.site_residues)
+
+
+def test_atom_line():
+    line = "HETATM 3001 O    HOH A 501      10.123  -4.500  22.000  1.00 30.00           O  "
+    atom = PDB.Atom(line)
+
+    assert not hasattr(atom, "__dict__")
+    assert (atom.type, atom.serial, atom.resName, atom.resSeq, atom.iCode) == ("HETATM", 3001, "HOH", 501, " ")
+    assert atom.__str__() == line.strip() + "\n"
+
+    atom.x = 1
+    assert atom.x == 1.
+    with pytest.raises(ValueError):
+        atom.chainID = "ABCDE"
+    with pytest.raises(ValueError):
+        PDB.Atom("REMARK 465")
+
+
+def test_hybrid36_1bji(monkeypatch):
+    for value, width, string in [(99999, 5, "99999"), (100000, 5, "A0000"), (43770016, 5, "a0000"),
+                                 (87440031, 5, "zzzzz"), (-999, 4, "-999"), (10000, 4, "A000")]:
+        assert PDB.encodeHybrid36(value, width) == string
+        assert PDB.decodeHybrid36(string) == value
+    with pytest.raises(ValueError):
+        PDB.encodeHybrid36(87440032, 5)
+    # mixed-case digits, non-alphanumeric characters and hybrid-36 numbers which are too short are typos
+    for string in ["Aa00", "aA000", "A0-00", "nan", "A", "zz"]:
+        with pytest.raises(ValueError):
+            PDB.decodeHybrid36(string)
+    with pytest.raises(ValueError):
+        PDB.MissingResidue("ALA", "A", "Aa00")
+    with pytest.raises(ValueError):
+        PDB.Hybrid36._decodeHybrid36Array(np.array([b"A000", b"Aa00"]))
+    with pytest.raises(ValueError):
+        PDB.Hybrid36._decodeHybrid36Array(np.array([b"A00"]))
+    assert PDB.Hybrid36._decodeHybrid36Array(np.array([b"A000", b"a000", b"  12"])).tolist() == [10000, 1223056, 12]
+
+    with Dir(PC.TESTDIR + "/shared"):
+        obj = PDB.PDB("1bji.pdb")
+        table = obj.table
+        serials = np.arange(99000, 99000 + len(table)) * 11
+        resSeqs = np.repeat(np.arange(9990, 9990 + table.count("residue")), np.diff(table.rowOffsets("residue")))
+        table.setValues("serial", slice(None), serials)
+        table.setValues("resSeq", slice(None), resSeqs)
+        obj.disulfide_bonds[0][0].resSeq = 12345
+        resSeqs = table.column("resSeq").copy()
+
+        # the lines are formatted in chunks, which are identical to formatting atom by atom
+        monkeypatch.setattr(PDB.AtomTable, "_chunk_size", 1000)
+        lines = table.formatLines()
+        assert lines == "".join(atom.__str__() for chain in obj for residue in chain for atom in residue)
+        assert max(len(line) for line in lines.splitlines()) <= 80
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            obj_new = PDB.PDB(obj.writePDB(tempdir + "/1bji.pdb"))
+            assert (obj_new.table.column("serial") == serials).all()
+            assert (obj_new.table.column("resSeq") == resSeqs).all()
+            assert obj_new.table.formatLines() == lines
+            assert obj_new.disulfide_bonds[0][0].resSeq == 12345
+            assert obj_new[0][-1][0].serial == obj[0][-1][0].serial
+
+
+def test_write_selection_1bji():
+    with Dir(PC.TESTDIR + "/shared"):
+        obj = PDB.PDB("1bji.pdb")
+        obj[0][0][0].x = 12345.6789
+        obj[0][0][1].serial = 123456
+        assert obj.table.formatLines() == "".join(atom.__str__() for chain in obj for residue in chain
+                                                  for atom in residue)
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            obj.writePDB(tempdir + "/selection.pdb", selection=obj.filter("type=='amino_acid'"))
+            obj.purgeResidues(obj.filter("type=='amino_acid'"), mode="keep")
+            obj.writePDB(tempdir + "/purged.pdb")
+            assert open(tempdir + "/selection.pdb").read() == open(tempdir + "/purged.pdb").read()
+
+
+def test_selection_1bji():
+    with Dir(PC.TESTDIR + "/shared"):
+        obj = PDB.PDB("1bji.pdb")
+        amino_acids = obj.filter("type=='amino_acid'")
+        waters = obj.filter("type=='water'")
+        chain_a = obj.filter("chainID=='A'")
+        assert isinstance(amino_acids, PDB.Selection)
+        assert len(amino_acids | waters) == len(amino_acids) + len(waters)
+        assert not amino_acids & waters
+        assert list(amino_acids & chain_a) == [x for x in amino_acids if x.chainID == "A"]
+        assert list(chain_a - amino_acids) == [x for x in chain_a if x not in amino_acids]
+        assert obj[0][0] in amino_acids and obj[0][0] not in waters
+        assert len(amino_acids.toLevel("atom")) == 3067
+        assert [x.chainID for x in amino_acids.toLevel("atom").toLevel("chain")] == \
+               sorted({x.chainID for x in amino_acids})
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            amino_acids.writePDB(tempdir + "/selection.pdb")
+            obj.writePDB(tempdir + "/list.pdb", selection=list(amino_acids))
+            assert open(tempdir + "/selection.pdb").read() == open(tempdir + "/list.pdb").read()
+
+        # selections follow the structure when other residues are removed
+        first = amino_acids[0]
+        obj.purgeResidues(waters, mode="discard")
+        assert not obj.filter("type=='water'") and not waters
+        assert amino_acids[0] is first
+        obj.purgeResidues(amino_acids[1:], mode="discard")
+        assert list(amino_acids) == [first]
+
+
+def test_models_1bji():
+    with Dir(PC.TESTDIR + "/shared"):
+        lines = [line for line in open("1bji.pdb").read().splitlines() if line[:4] == "ATOM" or line[:6] == "HETATM"]
+        shifted = [line[:30] + "{:8.3f}".format(float(line[30:38]) + 1) + line[38:] for line in lines]
+        obj = PDB.PDB("1bji.pdb")
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            with open(tempdir + "/models.pdb", "w") as file:
+                file.write("\n".join(["MODEL        1"] + lines + ["ENDMDL", "MODEL        2"] + shifted +
+                                     ["ENDMDL", "END"]))
+            models = PDB.PDB(tempdir + "/models.pdb")
+            assert models.numberOfModels == 2
+            assert models.frames.shape == (2, 3398, 3)
+            assert models.numberOfAtoms == 3398
+            assert PDB.PDB(tempdir + "/models.pdb", models=False).numberOfModels == 1
+
+            # switching the model does not copy the coordinates
+            atom = models[0][0][0]
+            models.model = 1
+            assert atom.x == obj[0][0][0].x + 1
+            assert np.shares_memory(models.table.coordinates, models.frames)
+
+            models.writePDB(tempdir + "/model0.pdb", model=0)
+            assert models.model == 1
+            assert PDB.PDB(tempdir + "/model0.pdb").table.formatLines() == obj.table.formatLines()
+
+            models.purgeResidues(models.filter("type=='amino_acid'"), mode="keep")
+            assert models.frames.shape == (2, 3067, 3)
+
+
+def test_parmed_1bji():
+    with Dir(PC.TESTDIR + "/shared"):
+        obj = PDB.PDB("1bji.pdb")
+        structure = obj.toParmed()
+        reference = parmed.load_file("1bji.pdb")
+        assert [(x.name, x.atomic_number, x.residue.name, x.residue.number, x.residue.chain) for x in structure] == \
+               [(x.name, x.atomic_number, x.residue.name, x.residue.number, x.residue.chain) for x in reference]
+        assert np.allclose(structure.coordinates, obj.coordinates)
+        waters = obj.filter("type=='water'")
+        assert len(obj.toParmed(waters, bonds=False).residues) == len(waters) == 191
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            converted = PDB.PDB.fromParmed(reference, tempdir + "/converted.pdb")
+            assert converted.table.formatLines() == obj.table.formatLines()
+            assert [(x[0].resSeq, x[1].resSeq) for x in converted.disulfide_bonds] == \
+                   [(x[0].resSeq, x[1].resSeq) for x in obj.disulfide_bonds]
+            assert PDB.PDB(converted.writePDB()).numberOfAtoms == obj.numberOfAtoms
+
+        # the coordinates are a view into the object
+        obj.coordinates[0, 0] = 100.
+        assert obj[0][0][0].x == 100.
+
+
+_cif = """data_TEST
+#
+_entry.id TEST
+#
+loop_
+_atom_site.group_PDB
+_atom_site.id
+_atom_site.type_symbol
+_atom_site.label_atom_id
+_atom_site.label_alt_id
+_atom_site.label_comp_id
+_atom_site.label_asym_id
+_atom_site.label_seq_id
+_atom_site.pdbx_PDB_ins_code
+_atom_site.Cartn_x
+_atom_site.Cartn_y
+_atom_site.Cartn_z
+_atom_site.occupancy
+_atom_site.B_iso_or_equiv
+_atom_site.pdbx_formal_charge
+_atom_site.auth_seq_id
+_atom_site.auth_comp_id
+_atom_site.auth_asym_id
+_atom_site.auth_atom_id
+_atom_site.pdbx_PDB_model_num
+ATOM   1 N N   . CYS A 1 ? 1.000 2.000 3.000 1.00 10.00 ? 5 CYS AA N   1
+ATOM   2 S SG  . CYS A 1 ? 1.500 2.500 3.500 1.00 10.00 ? 5 CYS AA SG  1
+ATOM   3 N N   . CYS A 2 ? 4.000 5.000 6.000 1.00 11.00 ? 6 CYS AA N   1
+ATOM   4 S SG  . CYS A 2 ? 4.500 5.500 6.500 1.00 11.00 ? 6 CYS AA SG  1
+HETATM 5 O "O1'" . HOH B . ? 7.000 8.000 9.000 0.50 12.00 1 101 HOH AA "O1'" 1
+ATOM   6 N N   . CYS A 1 ? 9.000 9.000 9.000 1.00 10.00 ? 5 CYS AA N   2
+#
+loop_
+_struct_conn.id
+_struct_conn.conn_type_id
+_struct_conn.ptnr1_auth_asym_id
+_struct_conn.ptnr1_auth_seq_id
+_struct_conn.pdbx_ptnr1_PDB_ins_code
+_struct_conn.ptnr2_auth_asym_id
+_struct_conn.ptnr2_auth_seq_id
+_struct_conn.pdbx_ptnr2_PDB_ins_code
+disulf1 disulf AA 5 ? AA 6 ?
+covale1 covale AA 5 ? AA 101 ?
+#
+loop_
+_pdbx_unobs_or_zero_occ_residues.id
+_pdbx_unobs_or_zero_occ_residues.PDB_model_num
+_pdbx_unobs_or_zero_occ_residues.occupancy_flag
+_pdbx_unobs_or_zero_occ_residues.auth_asym_id
+_pdbx_unobs_or_zero_occ_residues.auth_comp_id
+_pdbx_unobs_or_zero_occ_residues.auth_seq_id
+_pdbx_unobs_or_zero_occ_residues.PDB_ins_code
+1 1 1 AA MET 4 ?
+#
+_pdbx_unobs_or_zero_occ_atoms.id 1
+_pdbx_unobs_or_zero_occ_atoms.PDB_model_num 1
+_pdbx_unobs_or_zero_occ_atoms.occupancy_flag 1
+_pdbx_unobs_or_zero_occ_atoms.auth_asym_id AA
+_pdbx_unobs_or_zero_occ_atoms.auth_comp_id CYS
+_pdbx_unobs_or_zero_occ_atoms.auth_seq_id 6
+_pdbx_unobs_or_zero_occ_atoms.PDB_ins_code ?
+_pdbx_unobs_or_zero_occ_atoms.auth_atom_id
+;CB
+;
+#
+"""
+
+
+def test_read_cif(monkeypatch):
+    with tempfile.TemporaryDirectory() as tempdir:
+        with open(tempdir + "/test.cif", "w") as file:
+            file.write(_cif)
+        assert PDB.isCIF(tempdir + "/test.cif")
+        obj = PDB.PDB(tempdir + "/test.cif")
+
+        assert obj.numberOfAtoms == 5
+        assert [len(chain) for chain in obj] == [2, 1]
+        assert obj[0].chainID == "AA"
+        assert obj[1][0][0].name == "O1'"
+        assert obj[1][0][0].charge == "1+"
+        assert (obj[0][1][0].x, obj[0][1][0].resSeq, obj[0][1][0].iCode) == (4., 6, " ")
+        assert len(obj.disulfide_bonds) == 1 and len(obj.disulfide_bonds[0]) == 2
+        assert [(x.resName, x.chainID, x.resSeq) for x in obj.missing_residues] == [("MET", "AA", 4)]
+        assert [list(x) for x in obj.missing_atoms] == [["CB"]]
+        assert obj.residue("AA", 6) is obj[0][1]
+
+        # the file is read line by line and large loops are tokenized in chunks
+        class LinesOnly(io.StringIO):
+            def read(self, *args):
+                raise AssertionError("The whole file is read at once")
+
+        expected = PDB.readCIF(tempdir + "/test.cif")
+        monkeypatch.setattr(PDB.CIF, "_chunk_lines", 2)
+        categories = PDB.readCIF(LinesOnly(_cif))
+        assert categories.keys() == expected.keys()
+        for category in expected:
+            assert categories[category].keys() == expected[category].keys()
+            assert all((categories[category][x] == expected[category][x]).all() for x in expected[category])
+        assert categories["atom_site"]["auth_atom_id"].tolist() == ["N", "SG", "N", "SG", "O1'", "N"]
+        assert categories["pdbx_unobs_or_zero_occ_atoms"]["auth_atom_id"].tolist() == ["CB"]
+
+
+def test_write_cif_chains():
+    # two chains which share their first character and a case-sensitive single-character chain
+    cif = _cif.replace("6 CYS AA", "6 CYS AB").replace("AA 6 ?", "AB 6 ?").replace("101 HOH AA", "101 HOH a")
+    cif = cif.replace("_pdbx_unobs_or_zero_occ_atoms.auth_asym_id AA", "_pdbx_unobs_or_zero_occ_atoms.auth_asym_id AB")
+    with tempfile.TemporaryDirectory() as tempdir:
+        with open(tempdir + "/test.cif", "w") as file:
+            file.write(cif)
+        obj = PDB.PDB(tempdir + "/test.cif")
+        assert [chain.chainID for chain in obj] == ["AA", "AB", "a"]
+        assert obj.residue("a", 101) is obj[2][0]
+        assert obj.residue("A", 101) is None
+        assert [x.chainID for x in sorted([PDB.MissingResidue("GLY", "AB", 1), PDB.MissingResidue("GLY", "AA", 2)])] \
+            == ["AA", "AB"]
+
+        with pytest.warns(UserWarning, match="AA -> A, AB -> B"):
+            obj.writePDB(tempdir + "/test.pdb")
+        new = PDB.PDB(tempdir + "/test.pdb")
+        assert [chain.chainID for chain in new] == ["A", "B", "a"]
+        assert [residue.resSeq for chain in new for residue in chain] == [5, 6, 101]
+        assert [(x.chainID, x.resSeq) for x in new.missing_residues] == [("A", 4)]
+        assert [(x.chainID, x.resSeq) for x in new.missing_atoms] == [("B", 6)]
+        assert [(x.chainID, x.resSeq) for x in new.disulfide_bonds[0]] == [("A", 5), ("B", 6)]
+        assert [chain.chainID for chain in obj] == ["AA", "AB", "a"]
+
+
+def test_compressed_1bji():
+    with tempfile.TemporaryDirectory() as tempdir:
+        with open(PC.TESTDIR + "/shared/1bji.pdb", "rb") as file:
+            contents = file.read()
+        expected = PDB.PDB(PC.TESTDIR + "/shared/1bji.pdb")
+
+        for extension, module in [(".gz", gzip), (".bz2", bz2), (".xz", lzma)]:
+            filename = tempdir + "/1bji.pdb" + extension
+            with module.open(filename, "wb") as file:
+                file.write(contents)
+            assert not PDB.isCIF(filename)
+            assert PDB.readSequence(filename) == expected.sequence
+            obj = PDB.PDB(filename, cache=False)
+            assert obj.filename == filename
+            assert obj.table.formatLines() == expected.table.formatLines()
+            assert [len(getattr(obj, x)) for x in obj._header_attributes] == [0, 0, 3, 9, 74]
+
+            # output files are compressed in the same way
+            output = obj.writePDB(tempdir + "/output.pdb" + extension)
+            with module.open(output, "rt") as file:
+                assert file.read() == open(expected.writePDB(tempdir + "/output.pdb")).read()
+            assert obj.writeHetatms()[0][0] == tempdir + "/1bji_ligand.pdb"
+
+        with lzma.open(tempdir + "/test.cif.xz", "wt") as file:
+            file.write(_cif)
+        assert PDB.isCIF(tempdir + "/test.cif.xz")
+        assert PDB.PDB(tempdir + "/test.cif.xz").numberOfAtoms == 5
+
+
+def test_cache_1bji():
+    with tempfile.TemporaryDirectory() as tempdir:
+        filename = tempdir + "/1bji.pdb"
+        with open(PC.TESTDIR + "/shared/1bji.pdb") as file:
+            contents = file.read()
+        with open(filename, "w") as file:
+            file.write(contents)
+
+        obj = PDB.PDB(filename, cache=True)
+        assert PDB.loadCache(filename) is not None
+        cached = PDB.PDB(filename, cache=True)
+        assert cached.table.formatLines() == obj.table.formatLines()
+        assert [len(getattr(cached, x)) for x in cached._header_attributes] == [0, 0, 3, 9, 74]
+        assert cached.disulfide_bonds[0][0] is cached.residue("A", 92)
+
+        # the cache is invalidated as soon as the file changes
+        with open(filename, "w") as file:
+            file.write(contents.replace("HETATM 3069", "HETATM 9999"))
+        assert PDB.loadCache(filename) is None
+        assert PDB.PDB(filename, cache=True).filter("serial==9999")
+
+
+def test_load_many():
+    with Dir(PC.TESTDIR + "/shared"):
+        filenames = ["1bji.pdb", "nonexistent.pdb", "3ZG0.pdb"]
+        with pytest.warns(UserWarning):
+            pdbs, failures = PDB.PDB.loadMany(filenames, workers=2)
+
+        assert pdbs[1] is None
+        assert list(failures) == [PC.TESTDIR + "/shared/nonexistent.pdb"]
+        for filename, obj in zip(filenames[::2], pdbs[::2]):
+            expected = PDB.PDB(filename)
+            assert obj.filename == expected.filename
+            assert obj.table.formatLines() == expected.table.formatLines()
+            assert [len(getattr(obj, x)) for x in obj._header_attributes] == \
+                   [len(getattr(expected, x)) for x in expected._header_attributes]
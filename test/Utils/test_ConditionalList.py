@@ -0,0 +1,49 @@
+from ProtoCaller.Utils.ConditionalList import ConditionalList
+
+import copy
+import pytest
+
+
+def _checkPositive(x):
+    if x <= 0:
+        raise ValueError("Value needs to be positive")
+
+
+def test_ConditionalList():
+    lst = ConditionalList([1, 2], _checkPositive, transformfunc=lambda x: 10 * x)
+    assert lst == [10, 20]
+    lst.append(3)
+    lst.insert(0, 4)
+    lst += [5]
+    assert lst == [40, 10, 20, 30, 50]
+    lst.remove(1)
+    assert lst == [40, 20, 30, 50]
+
+    # invalid batches are rejected as a whole
+    with pytest.raises(ValueError):
+        lst.extend([6, -1])
+    assert lst == [40, 20, 30, 50]
+    with pytest.raises(ValueError):
+        ConditionalList([], _checkPositive).append(-1)
+
+    # a list is appended as a single element, as in PerturbationList.append([ligand1, ligand2])
+    pairs = ConditionalList([], transformfunc=tuple)
+    pairs.append([1, 2])
+    assert pairs == [(1, 2)]
+
+    # trusted elements are neither checked nor transformed
+    with lst.trusted():
+        lst.extend([-1, 0])
+    assert lst[-2:] == [-1, 0]
+    trusted = ConditionalList.fromTrusted([-1], _checkPositive, transformfunc=lambda x: 10 * x)
+    assert trusted == [-1]
+    trusted.append(2)
+    assert trusted == [-1, 20]
+
+    # copies keep the type and the conditions without transforming the elements again
+    for copied in [trusted.copy(), copy.copy(trusted), copy.deepcopy(trusted)]:
+        assert type(copied) is ConditionalList and copied == [-1, 20]
+        copied.append(3)
+        assert copied == [-1, 20, 30] and trusted == [-1, 20]
+        with pytest.raises(ValueError):
+            copied.append(-1)
@@ -57,3 +57,18 @@ def test_protonate_1bji():
                     continue
                 if residue.resName in size_dict.keys():
                     assert len(residue) == size_dict[residue.resName]
+
+
+def test_protonate_in_place_1bji():
+    with Dir(PC.TESTDIR + "/shared"):
+        with Dir("temp", temp=True):
+            copyfile("../1bji.pdb", "1bji.pdb")
+            obj = PDB.PDB("1bji.pdb")
+            file_pdb2pqr = pdb2pqrTransform(obj)
+
+            # the object is fixed in place and corresponds to the output file
+            assert obj.filename == file_pdb2pqr
+            obj_protonated = PDB.PDB(file_pdb2pqr)
+            assert len(obj.missing_atoms) == len(obj_protonated.missing_atoms) == 0
+            assert len(obj.disulfide_bonds) == len(obj_protonated.disulfide_bonds) == 9
+            assert [len(x) for x in obj] == [len(x) for x in obj_protonated]